@@ -1,31 +1,131 @@
 from __future__ import annotations
 
+import asyncio
+import dataclasses
+import datetime
+import logging
 import pathlib
+import signal
+import time
+from typing import Iterable
 
-import discord
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
+import discord
 from discord.ext import commands
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
+from app.command_tree import CommandTree
 import app.config
+from app.cooldowns import CooldownTable
 from app.database.database_handler import DatabaseHandler, create_database_directory
-from app.logger import setup_logging
-from app.message_responses.responders import handle_responses
+from app.gateway import get_gateway_profile
+from app.http_client import HttpClient
+from app.leader import LeaderElection
+from app.logger import LOG_FILE_NAME, set_logging_level, setup_logging, stop_logging
+from app.message_responses.message_filter import MessageFilter
+from app.message_responses.responders import RESPONDER_ENGINE, handle_responses
+from app.metrics import (
+    ON_MESSAGE_SECONDS,
+    BotMetrics,
+    observe_app_command,
+    start_metrics_server,
+)
+from app.reminders.delivery import ReminderDelivery
+from app.reminders.scheduler import ReminderScheduler
+from app.startup import STARTUP_TIMELINE, StartupTimeline
+from app.tracing import (
+    TRACES_FILE_NAME,
+    JsonlSpanExporter,
+    Tracer,
+    create_discord_trace_config,
+)
+
+logger = logging.getLogger(__name__)
+
+COMMAND_FINGERPRINTS_FILE_NAME = "command_fingerprints.json"
+REMINDERS_LEASE_NAME = "reminders"
+
+
+def process_file_name(file_name: str, shard_ids: list[int] | None) -> str:
+    """Make the name of a file written by one process unique among processes running other shards.
+
+    Args:
+        file_name (str): The name of the file, e.g. bot.log.
+        shard_ids (list[int] | None): The shards run by the process, None if it runs all of them.
+
+    Returns:
+        str: The name of the file, e.g. bot-shards-0-1.log.
+    """
 
+    if shard_ids is None:
+        return file_name
 
-class Bot(commands.Bot):
-    """Bot wrapper around the discord Bot class."""
+    stem, dot, extension = file_name.partition(".")
+    return f"{stem}-shards-{'-'.join(map(str, shard_ids))}{dot}{extension}"
+
+
+class Bot(commands.AutoShardedBot):
+    """Bot wrapper around the discord Bot class.
+
+    Several processes can run different shards of the bot against one database, set with
+    SHARD_IDS and SHARD_COUNT. Reminders and uptime checks are only run by the process
+    elected as the leader.
+    """
 
     def __init__(self) -> None:
-        app_id: str = app.config.get_app_id()
-        command_prefix: str = app.config.get_command_prefix()
+        settings = app.config.get_settings()
 
         super().__init__(
-            command_prefix=commands.when_mentioned_or(command_prefix),
-            intents=discord.Intents.all(),
-            application_id=app_id,
+            command_prefix=commands.when_mentioned_or(settings.command_prefix),
+            application_id=settings.app_id,
+            shard_ids=settings.shard_ids,
+            shard_count=settings.shard_count,
+            tree_cls=CommandTree,
+            http_trace=create_discord_trace_config(),
+            **get_gateway_profile(settings.gateway_profile).client_options(),
         )
 
+        self.span_exporter: JsonlSpanExporter = JsonlSpanExporter(
+            path=f"{settings.logging_path}/" + process_file_name(TRACES_FILE_NAME, self.shard_ids),
+            max_bytes=settings.log_max_bytes,
+            backup_count=settings.log_backup_count,
+        )
+        self.tracer: Tracer = Tracer(
+            self.span_exporter,
+            sample_rate=settings.trace_sample_rate,
+            slow_threshold=settings.trace_slow_threshold,
+        )
+
+        digest_after = datetime.timedelta(seconds=settings.reminder_digest_after)
+        self.reminder_scheduler: ReminderScheduler = ReminderScheduler(
+            wait_until_ready=self.wait_until_ready,
+            backlog_rate=settings.reminder_backlog_rate,
+            digest_after=digest_after,
+        )
+        self.reminder_delivery: ReminderDelivery = ReminderDelivery(
+            self,
+            max_workers=settings.reminder_delivery_workers,
+            coalesce_window=settings.reminder_coalesce_window,
+            digest_after=digest_after,
+        )
+        self.message_filter: MessageFilter = MessageFilter(
+            command_prefix=settings.command_prefix,
+            responder_engine=RESPONDER_ENGINE,
+            disabled_guilds=settings.responders_disabled_guilds,
+            disabled_channels=settings.responders_disabled_channels,
+        )
+        self.http_client: HttpClient = HttpClient()
+        self.cooldowns: CooldownTable = CooldownTable()
+        self.leader_election: LeaderElection = LeaderElection(
+            REMINDERS_LEASE_NAME,
+            on_elected=self.reminder_scheduler.activate,
+            on_demoted=self.reminder_scheduler.deactivate,
+        )
+        self.startup_timeline: StartupTimeline = STARTUP_TIMELINE
+        self.command_sync_task: asyncio.Task[None] | None = None
+        self.settings_reload_task: asyncio.Task[None] | None = None
+        self.bot_metrics: BotMetrics | None = None
+
     async def get_list_of_cogs(self, path: str) -> list[str]:
         """Get a list of cogs from a given path.
 
@@ -40,42 +140,171 @@ class Bot(commands.Bot):
         return [f"{path.replace('/', '.')}.{file.stem}" for file in python_files]
 
     async def load_cogs(self) -> None:
-        """Load all cogs from the cogs directory."""
+        """Load all cogs from the cogs directory concurrently."""
+
+        await asyncio.gather(
+            *(
+                self.startup_timeline.measure(f"cog {cog}", self.load_extension(cog))
+                for cog in await self.get_list_of_cogs("app/cogs")
+            )
+        )
+
+    async def sync_guilds(self, guilds: Iterable[discord.abc.Snowflake] | None = None) -> None:
+        """Sync the commands of the guilds whose commands changed.
+
+        Args:
+            guilds (Iterable[discord.abc.Snowflake], optional): The guilds to sync. Defaults
+                to the configured guilds.
+        """
+
+        settings = app.config.get_settings()
+        await self.tree.sync_changed(
+            settings.guilds if guilds is None else guilds,
+            fingerprints_path=f"{settings.data_path}/{COMMAND_FINGERPRINTS_FILE_NAME}",
+        )
+
+    def on_sighup(self) -> None:
+        """Reload the settings in the background when the process receives SIGHUP."""
+
+        self.settings_reload_task = asyncio.create_task(self.reload_settings())
 
-        for cog in await self.get_list_of_cogs("app/cogs"):
-            await self.load_extension(cog)
+    async def reload_settings(self) -> None:
+        """Reload the settings, applying the changes of the reloadable ones.
 
-    async def sync_guilds(self) -> None:
-        """Sync the guilds the bot is in with the database."""
+        Invalid settings are logged and the current settings are kept.
+        """
+
+        current = app.config.get_settings()
+        try:
+            loaded = app.config.load_settings()
+        except app.config.InvalidSettings as error:
+            logger.error(f"Keeping the current settings: {error}")
+            return
+
+        changed = current.changed_fields(loaded)
+        if changed - app.config.RELOADABLE_SETTINGS:
+            logger.warning(
+                f"Changes of {sorted(changed - app.config.RELOADABLE_SETTINGS)} apply after a restart"
+            )
+
+        reloaded = {
+            name: getattr(loaded, name) for name in changed & app.config.RELOADABLE_SETTINGS
+        }
+        if not reloaded:
+            logger.info("Reloaded the settings, nothing to apply")
+            return
 
-        for guild in app.config.get_guilds():
-            await self.tree.sync(guild=guild)
+        settings = dataclasses.replace(current, **reloaded)
+        app.config.set_settings(settings)
+
+        set_logging_level(settings.logging_level)
+        self.message_filter.set_disabled(
+            settings.responders_disabled_guilds, settings.responders_disabled_channels
+        )
+        if "guild_ids" in reloaded:
+            self.tree.move_guild_commands(current.guilds, settings.guilds)
+            removed_guilds = [
+                guild for guild in current.guilds if guild.id not in settings.guild_ids
+            ]
+            await self.sync_guilds([*settings.guilds, *removed_guilds])
+
+        logger.info(f"Reloaded the settings {sorted(reloaded)}")
 
     async def setup_hook(self) -> None:
-        """Perform asynchronous setup after the bot is logged in."""
-        await setup_logging(level=app.config.get_logging_level())
+        """Perform asynchronous setup after the bot is logged in.
+
+        Independent steps run concurrently and the command sync runs in the background,
+        since the commands synced before are usable while it's running.
+        """
+
+        timeline = self.startup_timeline
+
+        settings = app.config.get_settings()
+
+        with timeline.phase("logging"):
+            await setup_logging(
+                level=settings.logging_level,
+                file_name=process_file_name(LOG_FILE_NAME, self.shard_ids),
+            )
+            self.span_exporter.start()
+
+        create_database_directory(database_path=settings.database_path)
+        self.database_handler = DatabaseHandler(database_path=settings.database_path)
+        await asyncio.gather(
+            timeline.measure("database", self.database_handler.create_database()),
+            timeline.measure("http client", self.http_client.start()),
+        )
+        await timeline.measure("cooldowns", self.cooldowns.start(self.session))
+
+        if settings.metrics_port is not None:
+            self.bot_metrics = BotMetrics(self)
+            self.bot_metrics.start()
+            start_metrics_server(settings.metrics_port)
 
-        create_database_directory(database_path=app.config.get_database_path())
-        self.database_handler = DatabaseHandler(database_path=app.config.get_database_path())
-        await self.database_handler.create_database()
         self.scheduler: AsyncIOScheduler = AsyncIOScheduler()
 
-        await self.load_cogs()
-        await self.sync_guilds()
+        await timeline.measure("cogs", self.load_cogs())
+        self.command_sync_task = asyncio.create_task(
+            timeline.measure("command sync", self.sync_guilds())
+        )
+
+        asyncio.get_running_loop().add_signal_handler(signal.SIGHUP, self.on_sighup)
 
         self.scheduler.start()
+        self.reminder_scheduler.start()
+        self.leader_election.start(self.session)
         await super().setup_hook()
 
+    async def on_ready(self) -> None:
+        """Executes when the bot is connected and its caches are filled."""
+
+        self.startup_timeline.mark_ready()
+
     async def on_message(self, message: discord.Message) -> None:
         """Executes when a message is sent in a channel the bot can see."""
 
-        await handle_responses(message=message)
-        await super().on_message(message)
+        started = time.perf_counter()
+        decision = self.message_filter.check(message)
+
+        if decision.run_responders:
+            await handle_responses(message=message)
+
+        if decision.run_commands:
+            await super().on_message(message)
+
+        ON_MESSAGE_SECONDS.observe(time.perf_counter() - started)
+
+    async def on_app_command_completion(
+        self,
+        interaction: discord.Interaction,
+        command: discord.app_commands.Command | discord.app_commands.ContextMenu,
+    ) -> None:
+        """Executes when an app command finished successfully."""
+
+        observe_app_command(interaction, command.qualified_name)
 
     async def close(self) -> None:
         """Called when the bot is shutting down."""
 
+        if self.command_sync_task is not None:
+            self.command_sync_task.cancel()
+
+        if self.bot_metrics is not None:
+            await self.bot_metrics.stop()
+
+        await self.reminder_scheduler.stop()
+        await self.leader_election.stop()
+        await self.cooldowns.stop()
+        await self.http_client.close()
         await super().close()
+        self.span_exporter.stop()
+        stop_logging()
+
+    @property
+    def tree(self) -> CommandTree:
+        """Command tree of the bot."""
+
+        return super().tree  # type: ignore
 
     @property
     def session(self) -> async_sessionmaker[AsyncSession]:
@@ -0,0 +1,101 @@
+import logging
+import resource
+
+import discord
+from discord import app_commands
+from discord.ext import commands
+
+import app.bot
+from app.config import get_guilds, get_settings
+from app.cooldowns import cooldown
+
+logger = logging.getLogger(__name__)
+
+
+class Diagnostics(commands.Cog):
+    def __init__(self, bot: app.bot.Bot) -> None:
+        self.bot = bot
+
+    @app_commands.command(
+        name="message_stats",
+        description="Show how many messages were short-circuited by the message filter.",
+    )
+    @cooldown(1, 10)
+    @app_commands.default_permissions(administrator=True)
+    @app_commands.guilds(*get_guilds())
+    async def _message_stats(self, interaction: discord.Interaction) -> None:
+        """Handles the /message_stats command.
+
+        Args:
+            interaction (discord.Interaction): The interaction object.
+        """
+
+        await interaction.response.defer(ephemeral=True, thinking=True)
+
+        stats = self.bot.message_filter.stats.as_dict()
+        lines = [f"{name}: {value}" for name, value in stats.items()]
+        await interaction.followup.send("```" + "\n".join(lines) + "```", ephemeral=True)
+
+    @app_commands.command(
+        name="startup",
+        description="Show how long the phases of the bot's startup took.",
+    )
+    @cooldown(1, 10)
+    @app_commands.default_permissions(administrator=True)
+    @app_commands.guilds(*get_guilds())
+    async def _startup(self, interaction: discord.Interaction) -> None:
+        """Handles the /startup command.
+
+        Args:
+            interaction (discord.Interaction): The interaction object.
+        """
+
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        await interaction.followup.send(
+            "```" + self.bot.startup_timeline.format() + "```", ephemeral=True
+        )
+
+    @app_commands.command(
+        name="memory",
+        description="Show the sizes of the bot's caches and its memory usage.",
+    )
+    @cooldown(1, 10)
+    @app_commands.default_permissions(administrator=True)
+    @app_commands.guilds(*get_guilds())
+    async def _memory(self, interaction: discord.Interaction) -> None:
+        """Handles the /memory command.
+
+        Args:
+            interaction (discord.Interaction): The interaction object.
+        """
+
+        await interaction.response.defer(ephemeral=True, thinking=True)
+
+        guilds = self.bot.guilds
+        # ru_maxrss is in kilobytes on Linux
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        sizes = {
+            "gateway profile": get_settings().gateway_profile,
+            "guilds": len(guilds),
+            "channels": sum(len(guild.channels) for guild in guilds),
+            "threads": sum(len(guild.threads) for guild in guilds),
+            "members": sum(len(guild.members) for guild in guilds),
+            "users": len(self.bot.users),
+            "emojis": len(self.bot.emojis),
+            "private channels": len(self.bot.private_channels),
+            "messages": len(self.bot.cached_messages),
+            "peak RSS": f"{peak_rss:.1f} MiB",
+        }
+
+        lines = [f"{name}: {value}" for name, value in sizes.items()]
+        await interaction.followup.send("```" + "\n".join(lines) + "```", ephemeral=True)
+
+
+async def setup(bot: app.bot.Bot) -> None:
+    """Add the Diagnostics cog to the bot.
+
+    Args:
+        bot (app.bot.Bot): the bot instance to which the cog should be added.
+    """
+
+    await bot.add_cog(Diagnostics(bot))
@@ -1,25 +1,53 @@
 import datetime
 import logging
+from textwrap import shorten
 
 import discord
-from apscheduler.triggers.cron import CronTrigger
 from discord import app_commands
 from discord.ext import commands
-from sqlalchemy import delete
-from sqlalchemy.future import select
+from sqlalchemy import ColumnElement, delete, select, update
+from sqlalchemy.dialects.sqlite import insert
 
 import app.bot
 from app.cogs.utils.message_utils import join_texts
-from app.cogs.utils.reminder_utils import get_date, validate_text
+from app.cogs.utils.reminder_utils import (
+    describe_recurrence,
+    get_date,
+    get_recurrence_columns,
+    target_date_autocomplete,
+    validate_text,
+)
 from app.config import get_guilds
+from app.cooldowns import cooldown
+from app.database.models.base import OUTBOX_FAILED
+from app.database.models.group_reminder_signups import GroupReminderSignups
 from app.database.models.group_reminders import GroupReminders
+from app.reminders.delivery import DIGEST_SUMMARY_LENGTH, Destination, OutgoingMessage
+from app.reminders.outbox import ReminderOutbox
 
 logger = logging.getLogger(__name__)
 
+GROUP_REMINDER_KIND = "group_reminder"
+
 
 class GroupReminder(commands.Cog):
     def __init__(self, bot: app.bot.Bot) -> None:
         self.bot = bot
+        self.outbox: ReminderOutbox[GroupReminders] = ReminderOutbox(
+            bot.session, GroupReminders, dependent_models=(GroupReminderSignups,)
+        )
+        # signup message ID -> (group reminder ID, author ID) of the pending group reminders
+        self.signup_messages: dict[int, tuple[int, int]] = {}
+        # group reminder ID -> (user ID, emoji) pairs of the reactions to its signup message
+        self.signups: dict[int, set[tuple[int, str]]] = {}
+
+    async def cog_load(self) -> None:
+        """Load the tracked signups and register group reminders in the reminder scheduler."""
+
+        await self.load_signups()
+        await self.bot.reminder_scheduler.register(
+            GROUP_REMINDER_KIND, self.outbox.load_pending, self.send_due_reminders
+        )
 
     async def send_signup_message(
         self,
@@ -27,6 +55,7 @@ class GroupReminder(commands.Cog):
         reminder_text: str,
         author_id: int,
         remind_date: str,
+        recurrence: str | None = None,
     ) -> discord.Message:
         """Send a signup message to a channel to which users can react.
 
@@ -35,6 +64,7 @@ class GroupReminder(commands.Cog):
             reminder_text (str): The message to send with the reminder.
             author_id (int): The user ID of the author of the reminder.
             remind_date (str): The date of the reminder.
+            recurrence (str, optional): The recurrence rule of the reminder. Defaults to None.
 
         Returns:
             discord.Message: The message that was sent.
@@ -44,7 +74,7 @@ class GroupReminder(commands.Cog):
             join_texts(
                 f"Reminder created by <@{author_id}> with message:",
                 f"```{reminder_text}```",
-                f"You will be reminded on {remind_date} UTC.",
+                f"You will be reminded on {remind_date} UTC{describe_recurrence(recurrence)}.",
                 "React to this message if you want to get the reminder as well!",
                 separator="\n",
             ),
@@ -57,157 +87,393 @@ class GroupReminder(commands.Cog):
         name="group_reminder",
         description="Set a group reminder to be sent to all users which react to a message.",
     )
-    @app_commands.checks.cooldown(1, 60)
+    @cooldown(1, 60)
     @app_commands.guilds(*get_guilds())
+    @app_commands.autocomplete(target_date=target_date_autocomplete)
     async def _group_remindme(
         self,
         interaction: discord.Interaction,
         target_date: str,
         reminder_text: str,
+        repeat: str | None = None,
+        repeat_until: str | None = None,
+        repeat_count: app_commands.Range[int, 1, 1000] | None = None,
     ) -> None:
         """Function which handles the /remindme command.
 
         Args:
             interaction (discord.Interaction): The interaction that triggered the command.
-            target_date (str): The date in YYYY-mm-DD HH:MM format, assuming UTC.
+            target_date (str): The date in YYYY-mm-DD HH:MM format in UTC, or e.g. "in 2h" or "fri 8:15" in local time.
             reminder_text (str): The message to send with the reminder.
             send_direct_message (bool, optional): Whether or not to send a direct message to the user. Defaults to False.
+            repeat (str, optional): How often to repeat the reminder, e.g. "1w" or "0 10 * * mon". Defaults to None.
+            repeat_until (str, optional): The date of the last repetition in YYYY-mm-DD HH:MM format. Defaults to None.
+            repeat_count (int, optional): The number of times to send the reminder. Defaults to None.
         """
 
         await interaction.response.defer(ephemeral=True, thinking=True)
         await validate_text(reminder_text)
         reminder_dt: datetime.datetime = get_date(target_date)
+        recurrence_columns = get_recurrence_columns(
+            reminder_dt, repeat, repeat_until, repeat_count
+        )
 
         signup_message = await self.send_signup_message(
             interaction.channel,  # type: ignore
             reminder_text=reminder_text,
             author_id=interaction.user.id,
             remind_date=reminder_dt.strftime("%Y-%m-%d %H:%M"),
+            recurrence=recurrence_columns["Recurrence"],
         )
 
         reminder = GroupReminders(
             AuthorID=interaction.user.id,
-            RemindDate=reminder_dt.strftime("%Y-%m-%d %H:%M"),
+            RemindAt=reminder_dt,
             CreationDate=datetime.datetime.utcnow().strftime("%Y-%m-%d %H:%M"),
             ChannelID=interaction.channel_id,
             Message=reminder_text,
             SignupMessageID=signup_message.id,
+            SignupsTracked=True,
+            **recurrence_columns,
         )
 
         async with self.bot.session() as session:
             session.add(reminder)
             await session.commit()
+            # before the next await, so that no reaction event arrives unregistered from now on
+            self.signup_messages[signup_message.id] = (reminder.ReminderID, interaction.user.id)
+
+        await self.store_early_signups(reminder)
+
+        self.bot.reminder_scheduler.schedule(GROUP_REMINDER_KIND, reminder.ReminderID, reminder_dt)
+        await interaction.followup.send(
+            f"Reminder set for {reminder_dt}{describe_recurrence(reminder.Recurrence)}"
+        )
+
+    async def send_due_reminders(self, reminder_ids: list[int]) -> None:
+        """Send the group reminders which became due through the delivery outbox.
+
+        Args:
+            reminder_ids (list[int]): IDs of the group reminders which became due.
+        """
+
+        rescheduled = await self.outbox.process(reminder_ids, self.deliver_reminders)
+
+        for reminder_id, due_date in rescheduled:
+            self.bot.reminder_scheduler.schedule(GROUP_REMINDER_KIND, reminder_id, due_date)
+
+    async def deliver_reminders(self, reminders: list[GroupReminders]) -> set[int]:
+        """Deliver a batch of claimed group reminders.
+
+        Args:
+            reminders (list[GroupReminders]): The claimed group reminders.
+
+        Returns:
+            set[int]: IDs of the group reminders which should be retried.
+        """
+
+        logger.info(f"Got {len(reminders)} reminders")
+        users_to_remind = await self.get_tracked_users_to_remind(
+            [reminder.ReminderID for reminder in reminders if reminder.SignupsTracked]
+        )
+
+        for reminder in reminders:
+            if not reminder.SignupsTracked:
+                users_to_remind[reminder.ReminderID] = await self.fetch_users_to_remind(reminder)
+
+        results = await self.bot.reminder_delivery.deliver(
+            self.build_group_reminder_message(
+                reminder, users_to_remind.get(reminder.ReminderID, set())
+            )
+            for reminder in reminders
+        )
+        retry_ids = {result.message.reminder_id for result in results if result.retryable}
+
+        for reminder in reminders:
+            # recurring reminders keep their signups for the next occurrences
+            if reminder.ReminderID not in retry_ids and reminder.Recurrence is None:
+                self.signups.pop(reminder.ReminderID, None)
+                self.signup_messages.pop(reminder.SignupMessageID, None)
 
-        await interaction.followup.send(f"Reminder set for {reminder_dt}")
+        return retry_ids
 
-    async def check_group_reminders(self) -> None:
-        """Check the database for reminders that need to be sent."""
+    async def get_tracked_users_to_remind(self, reminder_ids: list[int]) -> dict[int, set[int]]:
+        """Get the users which signed up for group reminders, from the tracked signups.
 
-        now = datetime.datetime.utcnow().replace(second=0, microsecond=0)
+        Args:
+            reminder_ids (list[int]): IDs of group reminders with tracked signups.
+
+        Returns:
+            dict[int, set[int]]: IDs of the users to mention for every group reminder.
+        """
+
+        if not reminder_ids:
+            return {}
 
         async with self.bot.session() as session:
             query_results = (
                 await session.execute(
-                    select(GroupReminders).where(GroupReminders.RemindDate <= str(now))
+                    select(GroupReminderSignups.ReminderID, GroupReminderSignups.UserID)
+                    .distinct()
+                    .where(GroupReminderSignups.ReminderID.in_(reminder_ids))
                 )
             ).fetchall()
 
-        logger.info(f"Got {len(query_results)} reminders")
-        for result in query_results:
-            reminder_obj = result[0]  # Access the first (and only) element in result
-            author_id = reminder_obj.AuthorID
-            channel_id = reminder_obj.ChannelID
-            message = reminder_obj.Message
-            creation_date = reminder_obj.CreationDate
-            signup_message_id = reminder_obj.SignupMessageID
-
-            await self.respond_to_group_reminder(
-                author_id=author_id,
-                channel_id=channel_id,
-                reminder_text=message,
-                creation_date=creation_date,
-                signup_message_id=signup_message_id,
-            )
+        users_to_remind: dict[int, set[int]] = {}
+        for reminder_id, user_id in query_results:
+            users_to_remind.setdefault(reminder_id, set()).add(user_id)
+
+        return users_to_remind
+
+    async def fetch_users_to_remind(self, reminder: GroupReminders) -> set[int]:
+        """Fetch the users which reacted to the signup message of a group reminder.
+
+        Only used for group reminders created before signups were tracked.
+
+        Args:
+            reminder (GroupReminders): The group reminder.
+
+        Returns:
+            set[int]: IDs of the users to mention, without bots and the author.
+        """
+
+        signups = await self.fetch_reactions(reminder)
+        return {user_id for user_id, _ in signups or ()}
+
+    async def fetch_reactions(self, reminder: GroupReminders) -> set[tuple[int, str]] | None:
+        """Fetch the reactions to the signup message of a group reminder.
+
+        Args:
+            reminder (GroupReminders): The group reminder.
+
+        Returns:
+            set[tuple[int, str]] | None: (user ID, emoji) pairs of the reactions, without bots
+                and the author, None if the signup message couldn't be fetched.
+        """
+
+        target_channel = self.bot.get_partial_messageable(reminder.ChannelID)
+        target_message = target_channel.get_partial_message(reminder.SignupMessageID)
+
+        try:
+            message = await target_message.fetch()
+        except discord.HTTPException as error:
+            logger.warning(f"Could not fetch signup message of group reminder: {error}")
+            return None
+
+        reactions: set[tuple[int, str]] = set()
+        for reaction in message.reactions:
+            async for user in reaction.users():
+                if user.bot or user.id == reminder.AuthorID:
+                    continue
+                reactions.add((user.id, str(reaction.emoji)))
+
+        return reactions
+
+    async def store_early_signups(self, reminder: GroupReminders) -> None:
+        """Store the reactions made to a new signup message before it was registered.
+
+        Reactions are only tracked once the group reminder is committed, which happens
+        after the signup message is sent. If the message can't be read, the reminder falls
+        back to reading the reactions when it's due.
+
+        Args:
+            reminder (GroupReminders): The new group reminder.
+        """
+
+        reactions = await self.fetch_reactions(reminder)
+        if reactions is not None and not reactions:
+            return
 
         async with self.bot.session() as session:
-            await session.execute(
-                delete(GroupReminders).where(
-                    GroupReminders.ReminderID.in_([x[0].ReminderID for x in query_results])
+            if reactions is None:
+                await session.execute(
+                    update(GroupReminders)
+                    .where(GroupReminders.ReminderID == reminder.ReminderID)
+                    .values(SignupsTracked=False)
+                )
+            elif reactions:
+                self.signups.setdefault(reminder.ReminderID, set()).update(reactions)
+                await session.execute(
+                    insert(GroupReminderSignups).on_conflict_do_nothing(),
+                    [
+                        {"ReminderID": reminder.ReminderID, "UserID": user_id, "Emoji": emoji}
+                        for user_id, emoji in reactions
+                    ],
                 )
-            )
             await session.commit()
 
-    async def respond_to_group_reminder(
-        self,
-        author_id: int,
-        channel_id: int,
-        reminder_text: str,
-        creation_date: str,
-        signup_message_id: int,
-    ) -> None:
-        """Sends a reminder to channel mentioning all users which reacted to a message.
+    def build_group_reminder_message(
+        self, reminder: GroupReminders, users_to_remind: set[int]
+    ) -> OutgoingMessage:
+        """Build the message mentioning all users which reacted to the signup message.
 
         Args:
-            author_id (int): The user ID of the author of the reminder.
-            channel_id (int): The channel ID to send the reminder to.
-            reminder_text (str): The message provided by the user to send with the reminder.
-            creation_date (str): The date of the reminder creation.
-            signup_message_id (int): The message ID of the message to which the reminder is attached.
+            reminder (GroupReminders): The group reminder to deliver.
+            users_to_remind (set[int]): IDs of the users to mention.
+
+        Returns:
+            OutgoingMessage: The message to send to the reminder's channel.
         """
 
-        target_channel = self.bot.get_channel(channel_id)
+        mentions = ", ".join([f"<@{user_id}>" for user_id in users_to_remind])
 
-        logger.info(
-            f"Respond with remainder arguments: userid={author_id}, channelid={channel_id}, msg={reminder_text}"
+        return OutgoingMessage(
+            reminder_id=reminder.ReminderID,
+            destination=Destination("channel", reminder.ChannelID),
+            content=join_texts(
+                f"Reminder created by <@{reminder.AuthorID}> on {reminder.CreationDate} UTC with message:",
+                f"```{reminder.Message}```",
+                f"||Users which reacted to the remind message: {mentions}||",
+                separator="\n",
+            ),
+            due_at=reminder.RemindAt,
+            summary=f"<@{reminder.AuthorID}>: {shorten(reminder.Message, DIGEST_SUMMARY_LENGTH)} ||{mentions}||",
         )
 
-        if target_channel:
-            target_message: discord.PartialMessage = target_channel.get_partial_message(  # type: ignore
-                signup_message_id
-            )
+    async def load_signups(self) -> None:
+        """Load the signup messages and signups of the pending group reminders."""
 
-            message = await target_message.fetch()
-            users_to_remind: set[int] = set()
-            for reaction in message.reactions:
-                async for user in reaction.users():
-                    if user.bot or user.id == author_id:
-                        continue
-                    users_to_remind.add(user.id)
-
-            await target_channel.send(  # type: ignore
-                join_texts(
-                    f"Reminder created by <@{author_id}> on {creation_date} UTC with message:",
-                    f"```{reminder_text}```",
-                    f"||Users which reacted to the remind message: {', '.join([f'<@{user_id}>' for user_id in users_to_remind])}||",
-                    separator="\n",
+        async with self.bot.session() as session:
+            reminders = (
+                await session.execute(
+                    select(
+                        GroupReminders.SignupMessageID,
+                        GroupReminders.ReminderID,
+                        GroupReminders.AuthorID,
+                    ).where(
+                        GroupReminders.SignupsTracked.is_(True),
+                        GroupReminders.Status != OUTBOX_FAILED,
+                    )
+                )
+            ).fetchall()
+            signups = (
+                await session.execute(
+                    select(
+                        GroupReminderSignups.ReminderID,
+                        GroupReminderSignups.UserID,
+                        GroupReminderSignups.Emoji,
+                    )
                 )
+            ).fetchall()
+
+        self.signup_messages = {
+            signup_message_id: (reminder_id, author_id)
+            for signup_message_id, reminder_id, author_id in reminders
+        }
+        self.signups = {}
+        for reminder_id, user_id, emoji in signups:
+            self.signups.setdefault(reminder_id, set()).add((user_id, emoji))
+
+        logger.info(f"Tracking signups of {len(self.signup_messages)} group reminders")
+
+    @commands.Cog.listener("on_raw_reaction_add")
+    async def add_signup(self, payload: discord.RawReactionActionEvent) -> None:
+        """Store a reaction to a signup message as a signup."""
+
+        if payload.message_id not in self.signup_messages:
+            return
+
+        reminder_id, author_id = self.signup_messages[payload.message_id]
+        if payload.user_id == author_id or (payload.member is not None and payload.member.bot):
+            return
+        if self.bot.user is not None and payload.user_id == self.bot.user.id:
+            return
+
+        signup = (payload.user_id, str(payload.emoji))
+        reminder_signups = self.signups.setdefault(reminder_id, set())
+        if signup in reminder_signups:
+            return
+        reminder_signups.add(signup)
+
+        async with self.bot.session() as session:
+            await session.execute(
+                insert(GroupReminderSignups)
+                .values(ReminderID=reminder_id, UserID=signup[0], Emoji=signup[1])
+                .on_conflict_do_nothing()
             )
+            await session.commit()
 
-    @commands.Cog.listener("on_ready")
-    async def set_scheduler(self) -> None:
-        """Add the check_reminders function to the scheduler."""
+    @commands.Cog.listener("on_raw_reaction_remove")
+    async def remove_signup(self, payload: discord.RawReactionActionEvent) -> None:
+        """Remove a signup when its reaction is removed from a signup message."""
 
-        logger.info("Check group reminders added")
-        self.bot.scheduler.add_job(self.check_group_reminders, CronTrigger(second=0))
+        if payload.message_id not in self.signup_messages:
+            return
 
-    async def cog_app_command_error(
-        self, interaction: discord.Interaction, error: Exception
-    ) -> None:
-        """Handle errors for application commands.
+        reminder_id, _ = self.signup_messages[payload.message_id]
+        signup = (payload.user_id, str(payload.emoji))
+        reminder_signups = self.signups.get(reminder_id, set())
+        if signup not in reminder_signups:
+            return
+        reminder_signups.discard(signup)
+
+        await self.delete_signups(
+            GroupReminderSignups.ReminderID == reminder_id,
+            GroupReminderSignups.UserID == signup[0],
+            GroupReminderSignups.Emoji == signup[1],
+        )
+
+    @commands.Cog.listener("on_raw_reaction_clear")
+    async def clear_signups(self, payload: discord.RawReactionClearEvent) -> None:
+        """Remove all the signups when the reactions of a signup message are cleared."""
+
+        if payload.message_id not in self.signup_messages:
+            return
+
+        reminder_id, _ = self.signup_messages[payload.message_id]
+        self.signups.pop(reminder_id, None)
+        await self.delete_signups(GroupReminderSignups.ReminderID == reminder_id)
+
+    @commands.Cog.listener("on_raw_reaction_clear_emoji")
+    async def clear_emoji_signups(self, payload: discord.RawReactionClearEmojiEvent) -> None:
+        """Remove the signups with an emoji when it is cleared from a signup message."""
+
+        if payload.message_id not in self.signup_messages:
+            return
+
+        reminder_id, _ = self.signup_messages[payload.message_id]
+        emoji = str(payload.emoji)
+        self.signups[reminder_id] = {
+            signup for signup in self.signups.get(reminder_id, set()) if signup[1] != emoji
+        }
+        await self.delete_signups(
+            GroupReminderSignups.ReminderID == reminder_id,
+            GroupReminderSignups.Emoji == emoji,
+        )
+
+    @commands.Cog.listener("on_raw_message_delete")
+    async def forget_signup_message(self, payload: discord.RawMessageDeleteEvent) -> None:
+        """Stop tracking a deleted signup message, the collected signups are kept."""
+
+        self.signup_messages.pop(payload.message_id, None)
+
+    @commands.Cog.listener("on_raw_bulk_message_delete")
+    async def forget_signup_messages(self, payload: discord.RawBulkMessageDeleteEvent) -> None:
+        """Stop tracking deleted signup messages, the collected signups are kept."""
+
+        for message_id in payload.message_ids:
+            self.signup_messages.pop(message_id, None)
+
+    @commands.Cog.listener("on_reminder_cancel")
+    async def forget_cancelled_reminder(self, kind: str, reminder: GroupReminders) -> None:
+        """Stop tracking the signups of a group reminder cancelled by its author."""
+
+        if kind != GROUP_REMINDER_KIND:
+            return
+
+        self.signups.pop(reminder.ReminderID, None)
+        self.signup_messages.pop(reminder.SignupMessageID, None)
+
+    async def delete_signups(self, *conditions: ColumnElement[bool]) -> None:
+        """Delete the stored signups matching the conditions.
 
         Args:
-            interaction (discord.Interaction): The interaction that triggered the error.
-            error (Exception): The error that was triggered.
+            conditions (ColumnElement[bool]): Conditions on the GroupReminderSignups columns.
         """
 
-        logger.error(type(error), error)
-        match error:
-            case discord.app_commands.errors.CommandOnCooldown():
-                await interaction.response.send_message(str(error))
-            case discord.app_commands.errors.CommandInvokeError():
-                await interaction.followup.send(str(error.original), ephemeral=True)
-            case _:
-                await interaction.followup.send(str(error), ephemeral=True)
+        async with self.bot.session() as session:
+            await session.execute(delete(GroupReminderSignups).where(*conditions))
+            await session.commit()
 
 
 async def setup(bot: app.bot.Bot) -> None:
@@ -6,6 +6,7 @@ from discord.ext import commands
 
 import app.bot
 from app.config import get_guilds
+from app.cooldowns import cooldown
 
 logger = logging.getLogger(__name__)
 
@@ -18,7 +19,7 @@ class InformationCommands(commands.Cog):
         name="informator",
         description="The commands returns a link to the KSI Informator.",
     )
-    @app_commands.checks.cooldown(1, 30)
+    @cooldown(1, 30)
     @app_commands.guilds(*get_guilds())
     async def _informator(self, interaction: discord.Interaction, public: bool = False) -> None:
         """Handles the /informator command.
@@ -37,7 +38,7 @@ class InformationCommands(commands.Cog):
         name="baca",
         description="The commands returns a link to the website with information about Baca.",
     )
-    @app_commands.checks.cooldown(1, 30)
+    @cooldown(1, 30)
     @app_commands.guilds(*get_guilds())
     async def _baca(self, interaction: discord.Interaction, public: bool = False) -> None:
         """Handles the /baca command.
@@ -57,7 +58,7 @@ class InformationCommands(commands.Cog):
         name="mordor",
         description="The commands returns a link to file repository Mordor.",
     )
-    @app_commands.checks.cooldown(1, 30)
+    @cooldown(1, 30)
     @app_commands.guilds(*get_guilds())
     async def _mordor(self, interaction: discord.Interaction, public: bool = False) -> None:
         """Handles the /mordor command.
@@ -72,25 +73,6 @@ class InformationCommands(commands.Cog):
             "Repozytorium plików Mordor: https://mordor.ksi.ii.uj.edu.pl/", ephemeral=not public
         )
 
-    async def cog_app_command_error(
-        self, interaction: discord.Interaction, error: Exception
-    ) -> None:
-        """Handles errors from the /ping command.
-
-        Args:
-            interaction (discord.Interaction): The interaction that triggered the error.
-            error (Exception): The error that was triggered.
-        """
-
-        logger.error(type(error), error)
-        match error:
-            case discord.app_commands.errors.CommandOnCooldown():
-                await interaction.response.send_message(str(error))
-            case discord.app_commands.errors.CommandInvokeError():
-                await interaction.followup.send(str(error.original), ephemeral=True)
-            case _:
-                await interaction.followup.send(str(error), ephemeral=True)
-
 
 async def setup(bot: app.bot.Bot) -> None:
     """Add the Reminder cog to the bot.
@@ -1,25 +1,141 @@
 import logging
 
-import aiohttp
+from apscheduler.triggers.interval import IntervalTrigger
 import discord
 from discord import app_commands
 from discord.ext import commands
 
 import app.bot
-from app.config import get_guilds
+from app.cogs.utils.message_utils import join_texts
+from app.cogs.utils.uptime_monitor import UptimeMonitor, WatchedUrl
+from app.config import get_guilds, get_settings
+from app.cooldowns import cooldown
+from app.http_client import ProbeResult
 
 logger = logging.getLogger(__name__)
 
+UPTIME_CHECK_JOB_ID = "uptime_check"
+
+
+def format_milliseconds(seconds: float | None) -> str:
+    return "-" if seconds is None else f"{seconds * 1000:.0f} ms"
+
+
+def format_probe_result(result: ProbeResult) -> str:
+    """Format the result of a probe as a message.
+
+    Args:
+        result (ProbeResult): The probe result.
+
+    Returns:
+        str: The message describing the status and the timings of the probe.
+    """
+
+    if result.error is not None:
+        summary = f"Provided URL could not be reached: {result.error}"
+    else:
+        summary = f"Provided URL returned status {result.status} to {result.method}"
+
+    timings = result.timings
+    lines = [
+        summary,
+        f"DNS {format_milliseconds(timings.dns)} | connect+TLS {format_milliseconds(timings.connect)}"
+        f" | TTFB {format_milliseconds(timings.ttfb)} | total {format_milliseconds(timings.total)}",
+    ]
+
+    if result.cached:
+        lines.append(f"(result of a check made {result.age:.0f} seconds ago)")
+
+    return join_texts(*lines)
+
+
+def normalize_url(url: str) -> str:
+    """Add the http scheme to an URL provided without one."""
+
+    if "http" not in url:
+        url = f"http://{url}"
+
+    return url
+
+
+def format_watched_url(watched_url: WatchedUrl) -> str:
+    """Format the state of a watched URL as a line of the watch list."""
+
+    if watched_url.up is None:
+        return f"⚪ {watched_url.url}: not checked yet"
+
+    state = "🟢 up" if watched_url.up else "🔴 down"
+    uptime = watched_url.uptime
+    uptime_text = (
+        f", {uptime:.1%} of the last {len(watched_url.samples)} checks"
+        if uptime is not None
+        else ""
+    )
+    return f"{state} {watched_url.url}{uptime_text}"
+
 
 class Pinger(commands.Cog):
+    watch = app_commands.Group(
+        name="watch",
+        description="Manage the websites watched by the uptime monitor.",
+        guild_ids=[guild.id for guild in get_guilds()],
+        default_permissions=discord.Permissions(manage_guild=True),
+    )
+
     def __init__(self, bot: app.bot.Bot) -> None:
         self.bot = bot
+        self.uptime_monitor = UptimeMonitor(bot.http_client, bot.session)
+
+    async def cog_load(self) -> None:
+        """Load the watch list and schedule the uptime checks."""
+
+        await self.uptime_monitor.load()
+        self.bot.scheduler.add_job(
+            self.check_watched_urls,
+            IntervalTrigger(seconds=get_settings().uptime_check_interval),
+            id=UPTIME_CHECK_JOB_ID,
+            replace_existing=True,
+            max_instances=1,
+            coalesce=True,
+        )
+
+    async def cog_unload(self) -> None:
+        """Stop the uptime checks."""
+
+        self.bot.scheduler.remove_job(UPTIME_CHECK_JOB_ID)
+
+    async def check_watched_urls(self) -> None:
+        """Check the watched URLs and post alerts about the ones which changed state.
+
+        Every process picks up the changes of the watch list made through the other
+        processes, but only the leader process checks.
+        """
+
+        await self.uptime_monitor.load()
+        if not self.bot.leader_election.is_leader:
+            return
+
+        changes = await self.uptime_monitor.check_all()
+
+        alert_channel_id = get_settings().uptime_alert_channel
+        alert_channel = (
+            self.bot.get_partial_messageable(alert_channel_id) if alert_channel_id else None
+        )
+
+        for change in changes:
+            logger.warning(f"{change.url} is {'up' if change.up else 'down'}")
+
+            if alert_channel is not None:
+                state = "🟢 is back up" if change.up else "🔴 is down"
+                await alert_channel.send(
+                    join_texts(f"{change.url} {state}", format_probe_result(change.result))
+                )
 
     @app_commands.command(
         name="ping",
         description="ping a website and check if it does work for the bot",
     )
-    @app_commands.checks.cooldown(1, 30)
+    @cooldown(1, 30)
     @app_commands.guilds(*get_guilds())
     async def _ping(self, interaction: discord.Interaction, url: str) -> None:
         """Handles the /ping command.
@@ -32,33 +148,75 @@ class Pinger(commands.Cog):
 
         await interaction.response.defer(ephemeral=False, thinking=True)
 
-        if "http" not in url:
-            url = f"http://{url}"
+        url = normalize_url(url)
+
+        watched_url = self.uptime_monitor.get(url)
+        if watched_url is not None and watched_url.latest is not None:
+            await interaction.followup.send(
+                join_texts(
+                    format_probe_result(watched_url.latest),
+                    f"(watched URL, checked {watched_url.latest.age:.0f} seconds ago)",
+                )
+            )
+            return
+
+        result = await self.bot.http_client.probe(url)
+        await interaction.followup.send(format_probe_result(result))
+
+    @watch.command(name="add", description="Watch a website and alert when it goes down.")
+    @cooldown(1, 10)
+    async def _watch_add(self, interaction: discord.Interaction, url: str) -> None:
+        """Handles the /watch add command.
 
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as response:
-                status = response.status
+        Args:
+            interaction (discord.Interaction): The interaction object.
+            url (str): The url to watch.
+        """
+
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        url = normalize_url(url)
+        await self.uptime_monitor.load()
 
-        await interaction.followup.send(f"Provided URL returned status {status}")
+        if await self.uptime_monitor.add(url, added_by=interaction.user.id):
+            await interaction.followup.send(f"Watching {url}", ephemeral=True)
+        else:
+            await interaction.followup.send(f"{url} is already watched", ephemeral=True)
 
-    async def cog_app_command_error(
-        self, interaction: discord.Interaction, error: Exception
-    ) -> None:
-        """Handles errors from the /ping command.
+    @watch.command(name="remove", description="Stop watching a website.")
+    @cooldown(1, 10)
+    async def _watch_remove(self, interaction: discord.Interaction, url: str) -> None:
+        """Handles the /watch remove command.
 
         Args:
-            interaction (discord.Interaction): The interaction that triggered the error.
-            error (Exception): The error that was triggered.
+            interaction (discord.Interaction): The interaction object.
+            url (str): The watched url.
         """
 
-        logger.error(type(error), error)
-        match error:
-            case discord.app_commands.errors.CommandOnCooldown():
-                await interaction.response.send_message(str(error))
-            case discord.app_commands.errors.CommandInvokeError():
-                await interaction.followup.send(str(error.original), ephemeral=True)
-            case _:
-                await interaction.followup.send(str(error), ephemeral=True)
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        url = normalize_url(url)
+        await self.uptime_monitor.load()
+
+        if await self.uptime_monitor.remove(url):
+            await interaction.followup.send(f"Stopped watching {url}", ephemeral=True)
+        else:
+            await interaction.followup.send(f"{url} is not watched", ephemeral=True)
+
+    @watch.command(name="list", description="Show the watched websites and their state.")
+    @cooldown(1, 10)
+    async def _watch_list(self, interaction: discord.Interaction) -> None:
+        """Handles the /watch list command.
+
+        Args:
+            interaction (discord.Interaction): The interaction object.
+        """
+
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        await self.uptime_monitor.load()
+
+        lines = [format_watched_url(watched_url) for watched_url in self.uptime_monitor]
+        await interaction.followup.send(
+            join_texts(*lines) if lines else "No websites are watched", ephemeral=True
+        )
 
 
 async def setup(bot: app.bot.Bot) -> None:
@@ -1,167 +1,299 @@
 import datetime
 import logging
+from textwrap import shorten
 
 import discord
-from apscheduler.triggers.cron import CronTrigger
 from discord import app_commands
 from discord.ext import commands
-from sqlalchemy import delete
-from sqlalchemy.future import select
 
 import app.bot
 from app.cogs.utils.message_utils import join_texts
-from app.cogs.utils.reminder_utils import get_date, validate_text
+from app.cogs.utils.pagination import PagedView
+from app.cogs.utils.reminder_utils import (
+    describe_recurrence,
+    get_date,
+    get_recurrence_columns,
+    target_date_autocomplete,
+    validate_text,
+)
 from app.config import get_guilds
+from app.cooldowns import cooldown
+from app.database.models.group_reminder_signups import GroupReminderSignups
+from app.database.models.group_reminders import GroupReminders
 from app.database.models.reminders import Reminders
+from app.reminders.delivery import DIGEST_SUMMARY_LENGTH, Destination, OutgoingMessage
+from app.reminders.listing import AuthoredReminders, ListedReminder, ListingCursor
+from app.reminders.outbox import ReminderOutbox
 
 logger = logging.getLogger(__name__)
 
+REMINDER_KIND = "reminder"
+GROUP_REMINDER_KIND = "group_reminder"
+# Prefixes of the reminder IDs shown to users, which tell the kinds of reminders apart.
+KIND_PREFIXES: dict[str, str] = {REMINDER_KIND: "R", GROUP_REMINDER_KIND: "G"}
+REMINDERS_PAGE_SIZE: int = 10
+
+
+def format_reminder_id(reminder: ListedReminder) -> str:
+    return f"{KIND_PREFIXES[reminder.kind]}{reminder.reminder_id}"
+
+
+def parse_reminder_id(reminder_id: str) -> tuple[str, int]:
+    """Parse a reminder ID shown to users.
+
+    Args:
+        reminder_id (str): The ID, e.g. "R12" for a personal or "G3" for a group reminder.
+
+    Raises:
+        ValueError: Invalid reminder ID.
+
+    Returns:
+        tuple[str, int]: The kind and the database ID of the reminder.
+    """
+
+    reminder_id = reminder_id.strip().upper()
+    for kind, prefix in KIND_PREFIXES.items():
+        if reminder_id.startswith(prefix) and reminder_id[len(prefix) :].isdigit():
+            return kind, int(reminder_id[len(prefix) :])
+
+    raise ValueError('Invalid reminder ID. Use an ID shown by "/reminders list", e.g. R12 or G3.')
+
 
 class Reminder(commands.Cog):
+    reminders = app_commands.Group(
+        name="reminders",
+        description="See or cancel your pending reminders.",
+        guild_ids=[guild.id for guild in get_guilds()],
+    )
+
     def __init__(self, bot: app.bot.Bot) -> None:
         self.bot = bot
+        self.outbox: ReminderOutbox[Reminders] = ReminderOutbox(bot.session, Reminders)
+        self.authored_reminders = AuthoredReminders(
+            [
+                (REMINDER_KIND, self.outbox),
+                (
+                    GROUP_REMINDER_KIND,
+                    ReminderOutbox(
+                        bot.session, GroupReminders, dependent_models=(GroupReminderSignups,)
+                    ),
+                ),
+            ]
+        )
+
+    async def cog_load(self) -> None:
+        """Register personal reminders in the bot's reminder scheduler."""
+
+        await self.bot.reminder_scheduler.register(
+            REMINDER_KIND, self.outbox.load_pending, self.send_due_reminders
+        )
 
     @app_commands.command(
         name="remindme",
         description="Set a reminder",
     )
-    @app_commands.checks.cooldown(1, 30)
+    @cooldown(1, 30)
     @app_commands.guilds(*get_guilds())
+    @app_commands.autocomplete(target_date=target_date_autocomplete)
     async def _remindme(
         self,
         interaction: discord.Interaction,
         target_date: str,
         reminder_text: str,
         send_direct_message: bool = False,
+        repeat: str | None = None,
+        repeat_until: str | None = None,
+        repeat_count: app_commands.Range[int, 1, 1000] | None = None,
     ) -> None:
         """Function which handles the /remindme command.
 
         Args:
             interaction (discord.Interaction): The interaction that triggered the command.
-            target_date (str): The date in YYYY-mm-DD HH:MM format, assuming UTC.
+            target_date (str): The date in YYYY-mm-DD HH:MM format in UTC, or e.g. "in 2h" or "fri 8:15" in local time.
             reminder_text (str): The message to send with the reminder.
             send_direct_message (bool, optional): Whether or not to send a direct message to the user. Defaults to False.
+            repeat (str, optional): How often to repeat the reminder, e.g. "1w" or "0 10 * * mon". Defaults to None.
+            repeat_until (str, optional): The date of the last repetition in YYYY-mm-DD HH:MM format. Defaults to None.
+            repeat_count (int, optional): The number of times to send the reminder. Defaults to None.
         """
         await interaction.response.defer(ephemeral=True, thinking=True)
         await validate_text(reminder_text)
         reminder_dt: datetime.datetime = get_date(target_date)
+        recurrence_columns = get_recurrence_columns(
+            reminder_dt, repeat, repeat_until, repeat_count
+        )
 
         reminder = Reminders(
             AuthorID=interaction.user.id,
-            RemindDate=reminder_dt.strftime("%Y-%m-%d %H:%M"),
+            RemindAt=reminder_dt,
             CreationDate=datetime.datetime.utcnow().strftime("%Y-%m-%d %H:%M"),
             ChannelID=interaction.channel_id,
             Message=reminder_text,
             SendDirectMessage=send_direct_message,
+            **recurrence_columns,
         )
 
         async with self.bot.session() as session:
             session.add(reminder)
             await session.commit()
 
-        await interaction.followup.send(f"Reminder set for {reminder_dt}")
+        self.bot.reminder_scheduler.schedule(REMINDER_KIND, reminder.ReminderID, reminder_dt)
+        await interaction.followup.send(
+            f"Reminder set for {reminder_dt}{describe_recurrence(reminder.Recurrence)}"
+        )
 
-    async def check_reminders(self) -> None:
-        """Check the database for reminders that need to be sent."""
+    @reminders.command(name="list", description="List your pending reminders.")
+    @cooldown(1, 10)
+    async def _list(self, interaction: discord.Interaction) -> None:
+        """Handles the /reminders list command.
 
-        now = datetime.datetime.utcnow().replace(second=0, microsecond=0)
+        Args:
+            interaction (discord.Interaction): The interaction that triggered the command.
+        """
 
-        async with self.bot.session() as session:
-            query_results = (
-                await session.execute(select(Reminders).where(Reminders.RemindDate <= str(now)))
-            ).fetchall()
-
-        logger.info(f"Got {len(query_results)} reminders")
-        for result in query_results:
-            reminder_obj = result[0]  # Access the first (and only) element in result
-            author_id = reminder_obj.AuthorID
-            channel_id = reminder_obj.ChannelID
-            message = reminder_obj.Message
-            creation_date = reminder_obj.CreationDate
-            send_direct_message = reminder_obj.SendDirectMessage
-
-            await self.respond_with_reminder(
-                author_id=author_id,
-                channel_id=channel_id,
-                reminder_text=message,
-                creation_date=creation_date,
-                send_direct_message=send_direct_message,
-            )
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        author_id = interaction.user.id
 
-        async with self.bot.session() as session:
-            await session.execute(
-                delete(Reminders).where(
-                    Reminders.ReminderID.in_([x[0].ReminderID for x in query_results])
-                )
-            )
-            await session.commit()
+        async def load_page(cursor: ListingCursor | None) -> tuple[str, ListingCursor | None]:
+            # one more reminder than shown tells whether there is a next page
+            page = await self.authored_reminders.page(author_id, cursor, REMINDERS_PAGE_SIZE + 1)
+            shown = page[:REMINDERS_PAGE_SIZE]
+            if not shown:
+                return "You have no pending reminders.", None
 
-    async def respond_with_reminder(
-        self,
-        author_id: int,
-        channel_id: int,
-        reminder_text: str,
-        creation_date: str,
-        send_direct_message: bool,
-    ) -> None:
-        """Sends a reminder to an user or channel.
+            lines = [
+                f"`{format_reminder_id(reminder)}` {reminder.remind_at:%Y-%m-%d %H:%M} UTC"
+                f"{describe_recurrence(reminder.recurrence)}: {reminder.message}"
+                for reminder in shown
+            ]
+            next_cursor = shown[-1].cursor if len(page) > REMINDERS_PAGE_SIZE else None
+            return "\n".join(lines), next_cursor
+
+        view: PagedView[ListingCursor] = PagedView(author_id, load_page)
+        content = await view.first_page()
+        await interaction.followup.send(content, view=view, ephemeral=True)
+
+    @reminders.command(name="cancel", description="Cancel one of your pending reminders.")
+    @cooldown(1, 5)
+    async def _cancel(self, interaction: discord.Interaction, reminder_id: str) -> None:
+        """Handles the /reminders cancel command.
 
         Args:
-            author_id (int): The user ID to send the reminder to, if direct message is true.
-            channelID (int): The channel ID to send the reminder to.
-            reminder_text (str): The message provided by the user to send with the reminder.
-            creation_date (str): The date of the reminder creation.
-            send_direct_message (bool): Whether or not to send a direct message to the user.
+            interaction (discord.Interaction): The interaction that triggered the command.
+            reminder_id (str): The ID shown by /reminders list, e.g. R12 or G3.
         """
 
-        target_user = self.bot.get_user(author_id)
-        target_channel = self.bot.get_channel(channel_id)
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        kind, database_id = parse_reminder_id(reminder_id)
+
+        cancelled = await self.authored_reminders.cancel(kind, database_id, interaction.user.id)
+        if cancelled is None:
+            await interaction.followup.send(
+                f"You have no pending reminder {reminder_id}.", ephemeral=True
+            )
+            return
 
-        logger.info(
-            f"Respond with remainder arguments: userid={author_id}, channelid={channel_id}, msg={reminder_text}"
+        self.bot.reminder_scheduler.discard(kind, database_id)
+        self.bot.dispatch("reminder_cancel", kind, cancelled)
+        await interaction.followup.send(
+            f"Cancelled the reminder set for {cancelled.RemindAt:%Y-%m-%d %H:%M} UTC.",
+            ephemeral=True,
         )
 
-        if target_user and send_direct_message:
-            await target_user.send(
-                join_texts(
-                    f"Direct reminder created by <@{author_id}> on {creation_date} UTC with message:",
-                    f"```{reminder_text}```",
-                )
-            )
+    @_cancel.autocomplete("reminder_id")
+    async def _cancel_autocomplete(
+        self, interaction: discord.Interaction, current: str
+    ) -> list[app_commands.Choice[str]]:
+        """Suggest the upcoming reminders of the user matching the typed text."""
 
-        if target_channel:
-            await target_channel.send(  # type: ignore
-                join_texts(
-                    f"Direct reminder created by <@{author_id}> on {creation_date} UTC with message:",
-                    f"```{reminder_text}```",
-                )
-            )
+        current = current.strip().lower()
+        page = await self.authored_reminders.page(interaction.user.id, None, 25)
 
-    @commands.Cog.listener("on_ready")
-    async def set_scheduler(self) -> None:
-        """Add the check_reminders function to the scheduler."""
+        choices = []
+        for reminder in page:
+            shown_id = format_reminder_id(reminder)
+            name = f"{shown_id} {reminder.remind_at:%Y-%m-%d %H:%M}: {reminder.message}"
+            if current in name.lower():
+                choices.append(app_commands.Choice(name=name[:100], value=shown_id))
 
-        logger.info("check_reminders added")
-        self.bot.scheduler.add_job(self.check_reminders, CronTrigger(second=0))
+        return choices
 
-    async def cog_app_command_error(
-        self, interaction: discord.Interaction, error: Exception
-    ) -> None:
-        """Handle errors for application commands.
+    async def send_due_reminders(self, reminder_ids: list[int]) -> None:
+        """Send the reminders which became due through the delivery outbox.
 
         Args:
-            interaction (discord.Interaction): The interaction that triggered the error.
-            error (Exception): The error that was triggered.
+            reminder_ids (list[int]): IDs of the reminders which became due.
         """
 
-        logger.error(type(error), error)
-        match error:
-            case discord.app_commands.errors.CommandOnCooldown():
-                await interaction.response.send_message(str(error))
-            case discord.app_commands.errors.CommandInvokeError():
-                await interaction.followup.send(str(error.original), ephemeral=True)
-            case _:
-                await interaction.followup.send(str(error), ephemeral=True)
+        rescheduled = await self.outbox.process(reminder_ids, self.deliver_reminders)
+
+        for reminder_id, due_date in rescheduled:
+            self.bot.reminder_scheduler.schedule(REMINDER_KIND, reminder_id, due_date)
+
+    async def deliver_reminders(self, reminders: list[Reminders]) -> set[int]:
+        """Deliver a batch of claimed reminders.
+
+        A reminder which reached one of its targets isn't retried, so that a failed direct
+        message doesn't send the channel message again.
+
+        Args:
+            reminders (list[Reminders]): The claimed reminders.
+
+        Returns:
+            set[int]: IDs of the reminders which should be retried.
+        """
+
+        logger.info(f"Got {len(reminders)} reminders")
+        results = await self.bot.reminder_delivery.deliver(
+            message for reminder in reminders for message in self.build_reminder_messages(reminder)
+        )
+
+        delivered_ids = {result.message.reminder_id for result in results if result.delivered}
+        for result in results:
+            if result.retryable and result.message.reminder_id in delivered_ids:
+                logger.warning(
+                    f"Not retrying reminder {result.message.reminder_id} to "
+                    f"{result.message.destination.kind} {result.message.destination.id}, "
+                    "it reached its other target"
+                )
+
+        return {
+            result.message.reminder_id
+            for result in results
+            if result.retryable and result.message.reminder_id not in delivered_ids
+        }
+
+    def build_reminder_messages(self, reminder: Reminders) -> list[OutgoingMessage]:
+        """Build the messages which deliver a reminder to its channel and, optionally, its author.
+
+        Args:
+            reminder (Reminders): The reminder to deliver.
+
+        Returns:
+            list[OutgoingMessage]: The messages to send.
+        """
+
+        content = join_texts(
+            f"Direct reminder created by <@{reminder.AuthorID}> on {reminder.CreationDate} UTC with message:",
+            f"```{reminder.Message}```",
+        )
+
+        summary = f"<@{reminder.AuthorID}>: {shorten(reminder.Message, DIGEST_SUMMARY_LENGTH)}"
+
+        destinations = [Destination("channel", reminder.ChannelID)]
+        if reminder.SendDirectMessage:
+            destinations.insert(0, Destination("user", reminder.AuthorID))
+
+        return [
+            OutgoingMessage(
+                reminder_id=reminder.ReminderID,
+                destination=destination,
+                content=content,
+                due_at=reminder.RemindAt,
+                summary=summary,
+            )
+            for destination in destinations
+        ]
 
 
 async def setup(bot: app.bot.Bot) -> None:
@@ -0,0 +1,129 @@
+import logging
+import os
+import tempfile
+from typing import AsyncIterator
+
+import aiohttp
+import discord
+from discord import app_commands
+from discord.ext import commands
+
+import app.bot
+from app.config import get_guilds
+from app.cooldowns import cooldown
+from app.reminders.transfer import (
+    ReminderKind,
+    TransferFormat,
+    export_reminders,
+    import_reminders,
+)
+
+logger = logging.getLogger(__name__)
+
+# The import reads the attachment while inserting it, so only a stalled read is a timeout.
+IMPORT_DOWNLOAD_TIMEOUT = aiohttp.ClientTimeout(total=None, connect=5, sock_read=60)
+
+
+class ReminderTransfer(commands.Cog):
+    reminder_transfer = app_commands.Group(
+        name="reminder_transfer",
+        description="Export or import reminders in bulk.",
+        guild_ids=[guild.id for guild in get_guilds()],
+        default_permissions=discord.Permissions(administrator=True),
+    )
+
+    def __init__(self, bot: app.bot.Bot) -> None:
+        self.bot = bot
+
+    @reminder_transfer.command(
+        name="export",
+        description="Export the pending reminders to a file.",
+    )
+    @cooldown(1, 60)
+    async def _export(
+        self,
+        interaction: discord.Interaction,
+        kind: ReminderKind,
+        file_format: TransferFormat = "jsonl",
+    ) -> None:
+        """Handles the /reminder_transfer export command.
+
+        Args:
+            interaction (discord.Interaction): The interaction object.
+            kind (ReminderKind): The kind of the exported reminders.
+            file_format (TransferFormat, optional): The format of the file. Defaults to JSON lines.
+        """
+
+        await interaction.response.defer(ephemeral=True, thinking=True)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, f"{kind}.{file_format}")
+            with open(path, "w", encoding="utf-8", newline="") as output:
+                count = await export_reminders(self.bot.session, kind, output, file_format)
+
+            size_limit = (
+                interaction.guild.filesize_limit
+                if interaction.guild is not None
+                else discord.utils.DEFAULT_FILE_SIZE_LIMIT_BYTES
+            )
+            if os.path.getsize(path) > size_limit:
+                await interaction.followup.send(
+                    f"The export of {count} {kind} is too big to upload, "
+                    "use the reminders_cli.py script instead.",
+                    ephemeral=True,
+                )
+                return
+
+            await interaction.followup.send(
+                f"Exported {count} {kind}.", file=discord.File(path), ephemeral=True
+            )
+
+    @reminder_transfer.command(
+        name="import",
+        description="Import reminders from a JSON lines or CSV file.",
+    )
+    @cooldown(1, 60)
+    async def _import(
+        self,
+        interaction: discord.Interaction,
+        kind: ReminderKind,
+        file: discord.Attachment,
+        file_format: TransferFormat = "jsonl",
+    ) -> None:
+        """Handles the /reminder_transfer import command.
+
+        Args:
+            interaction (discord.Interaction): The interaction object.
+            kind (ReminderKind): The kind of the imported reminders.
+            file (discord.Attachment): The file with the reminders.
+            file_format (TransferFormat, optional): The format of the file. Defaults to JSON lines.
+        """
+
+        await interaction.response.defer(ephemeral=True, thinking=True)
+
+        # the session's total timeout would cut large files off mid-import
+        async with self.bot.http_client.session.get(
+            file.url, timeout=IMPORT_DOWNLOAD_TIMEOUT
+        ) as response:
+            response.raise_for_status()
+
+            async def lines() -> AsyncIterator[str]:
+                async for line in response.content:
+                    yield line.decode("utf-8")
+
+            result = await import_reminders(self.bot.session, kind, lines(), file_format)
+
+        report = f"Imported {result.imported} {kind}, skipped {result.invalid} invalid records."
+        if result.errors:
+            report += "\n```" + "\n".join(result.errors) + "```"
+        await interaction.followup.send(report[:2000], ephemeral=True)
+
+
+async def setup(bot: app.bot.Bot) -> None:
+    """Setup function for the ReminderTransfer cog.
+
+    Args:
+        bot (app.bot.Bot): the bot instance to which the cog should be added.
+    """
+
+    await bot.add_cog(ReminderTransfer(bot))
@@ -0,0 +1,61 @@
+import logging
+from typing import Awaitable, Callable, Generic, TypeVar
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+Cursor = TypeVar("Cursor")
+
+# Renders the page following a cursor, returns its content and the cursor of the next page.
+PageLoader = Callable[[Cursor | None], Awaitable[tuple[str, Cursor | None]]]
+
+
+class PagedView(discord.ui.View, Generic[Cursor]):
+    """Message view with buttons moving between the pages of a keyset-paginated listing.
+
+    Only the cursors of the pages seen so far are kept, so moving back re-seeks the
+    previous page from its cursor instead of skipping over the earlier pages.
+    """
+
+    def __init__(self, user_id: int, load_page: PageLoader[Cursor], timeout: float = 300) -> None:
+        super().__init__(timeout=timeout)
+        self._user_id = user_id
+        self._load_page = load_page
+        # cursors after which the seen pages start, the last one is the current page
+        self._page_cursors: list[Cursor | None] = [None]
+        self._next_cursor: Cursor | None = None
+
+    async def first_page(self) -> str:
+        """Load the first page.
+
+        Returns:
+            str: The content of the first page.
+        """
+
+        return await self._show(None)
+
+    async def _show(self, cursor: Cursor | None) -> str:
+        content, self._next_cursor = await self._load_page(cursor)
+        self._previous.disabled = len(self._page_cursors) <= 1
+        self._next.disabled = self._next_cursor is None
+        return content
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        return interaction.user.id == self._user_id
+
+    @discord.ui.button(label="Previous", style=discord.ButtonStyle.secondary)
+    async def _previous(self, interaction: discord.Interaction, _: discord.ui.Button) -> None:
+        if len(self._page_cursors) > 1:
+            self._page_cursors.pop()
+
+        content = await self._show(self._page_cursors[-1])
+        await interaction.response.edit_message(content=content, view=self)
+
+    @discord.ui.button(label="Next", style=discord.ButtonStyle.secondary)
+    async def _next(self, interaction: discord.Interaction, _: discord.ui.Button) -> None:
+        if self._next_cursor is not None:
+            self._page_cursors.append(self._next_cursor)
+
+        content = await self._show(self._page_cursors[-1])
+        await interaction.response.edit_message(content=content, view=self)
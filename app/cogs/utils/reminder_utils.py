@@ -1,11 +1,34 @@
 import datetime
 import logging
+from typing import Any
 
-logger = logging.getLogger(__name__)
+import discord
+from discord import app_commands
+
+from app.config import get_settings
+from app.reminders.dates import InvalidReminderDate, format_date, parse_date, to_local
+from app.reminders.recurrence import parse_recurrence
 
+logger = logging.getLogger(__name__)
 
-class InvalidReminderDate(Exception):
-    pass
+# Dates suggested before the user types anything, and completions of partially typed dates.
+SUGGESTED_DATES: tuple[str, ...] = ("in 1h", "tomorrow 9:00", "monday 9:00", "in 1w")
+DATE_COMPLETIONS: tuple[str, ...] = (
+    "in 1h",
+    "in 1d",
+    "in 1w",
+    "today 18:00",
+    "tomorrow 9:00",
+    "monday 9:00",
+    "tuesday 9:00",
+    "wednesday 9:00",
+    "thursday 9:00",
+    "friday 9:00",
+    "saturday 9:00",
+    "sunday 9:00",
+)
+# Autocomplete suggestions are limited to 25, fewer keep the list readable.
+MAX_DATE_SUGGESTIONS: int = 5
 
 
 async def validate_text(text: str) -> None:
@@ -27,9 +50,113 @@ async def validate_text(text: str) -> None:
 
 
 def get_date(target_date: str) -> datetime.datetime:
-    try:
-        reminder_dt: datetime.datetime = datetime.datetime.strptime(target_date, "%Y-%m-%d %H:%M")
-    except ValueError:
-        raise ValueError("Invalid date format. Please use YYYY-mm-DD HH:MM")
+    """Parse a date typed by the user, see `app.reminders.dates.parse_date` for the formats.
+
+    Args:
+        target_date (str): The date, e.g. "YYYY-mm-DD HH:MM" in UTC or "tomorrow 10:00".
+
+    Raises:
+        InvalidReminderDate: The date couldn't be parsed.
+
+    Returns:
+        datetime.datetime: The date in UTC.
+    """
+
+    return parse_date(target_date, get_settings().timezone)
+
+
+async def target_date_autocomplete(
+    interaction: discord.Interaction, current: str
+) -> list[app_commands.Choice[str]]:
+    """Suggest the date typed so far normalized to the exact UTC format.
+
+    Args:
+        interaction (discord.Interaction): The interaction being autocompleted.
+        current (str): The date typed so far.
+
+    Returns:
+        list[app_commands.Choice[str]]: The suggested dates.
+    """
+
+    timezone = get_settings().timezone
+    typed = " ".join(current.lower().split())
+    if typed:
+        texts = [current] + [
+            completion
+            for completion in DATE_COMPLETIONS
+            if completion.startswith(typed) and completion != typed
+        ]
+    else:
+        texts = list(SUGGESTED_DATES)
+
+    choices = []
+    for text in texts[:MAX_DATE_SUGGESTIONS]:
+        try:
+            date = parse_date(text, timezone)
+        except InvalidReminderDate:
+            continue
+
+        local = to_local(date, timezone)
+        name = f"{text.strip()} → {format_date(local)} {timezone} ({format_date(date)} UTC)"
+        choices.append(app_commands.Choice(name=name[:100], value=format_date(date)))
+
+    return choices
+
+
+def get_recurrence_columns(
+    remind_at: datetime.datetime,
+    repeat: str | None,
+    repeat_until: str | None,
+    repeat_count: int | None,
+) -> dict[str, Any]:
+    """Validate the recurrence options of a reminder command.
+
+    Args:
+        remind_at (datetime.datetime): The date of the first occurrence.
+        repeat (str | None): The recurrence rule, e.g. "1w" or "0 10 * * mon".
+        repeat_until (str | None): The date of the last occurrence in YYYY-mm-DD HH:MM format.
+        repeat_count (int | None): The number of occurrences.
+
+    Raises:
+        ValueError: Invalid recurrence options.
+
+    Returns:
+        dict[str, Any]: The values of the recurrence columns of the reminder.
+    """
+
+    if repeat is None:
+        if repeat_until is not None or repeat_count is not None:
+            raise ValueError("Set how often the reminder repeats to limit its repetitions.")
+
+        return {"Recurrence": None, "RecurrenceEnd": None, "RemainingOccurrences": None}
+
+    recurrence = parse_recurrence(repeat)
+
+    recurrence_end = get_date(repeat_until) if repeat_until is not None else None
+    if recurrence_end is not None and recurrence_end < remind_at:
+        raise ValueError("The reminder can't stop repeating before its first occurrence.")
+
+    return {
+        "Recurrence": recurrence.rule,
+        "RecurrenceEnd": recurrence_end,
+        "RemainingOccurrences": repeat_count,
+    }
+
+
+def describe_recurrence(recurrence: str | None) -> str:
+    """Describe how often a reminder repeats, for the command responses.
+
+    Args:
+        recurrence (str | None): The stored recurrence rule.
+
+    Returns:
+        str: The description, empty for one-shot reminders.
+    """
+
+    if recurrence is None:
+        return ""
+
+    if " " in recurrence:  # a crontab
+        return f", repeating on schedule `{recurrence}` (UTC)"
 
-    return reminder_dt
+    return f", repeating every {recurrence}"
@@ -0,0 +1,294 @@
+from __future__ import annotations
+
+import asyncio
+import collections
+from dataclasses import dataclass, field
+import datetime
+import logging
+from typing import Iterator, NamedTuple
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.database.models.uptime_rollups import UptimeRollups
+from app.database.models.watched_urls import WatchedUrls
+from app.http_client import HttpClient, ProbeResult
+
+logger = logging.getLogger(__name__)
+
+
+class UptimeSample(NamedTuple):
+    checked_at: datetime.datetime
+    up: bool
+    latency: float | None
+
+
+class StateChange(NamedTuple):
+    url: str
+    up: bool
+    result: ProbeResult
+
+
+@dataclass
+class WatchedUrl:
+    url_id: int
+    url: str
+    up: bool | None
+    samples: collections.deque[UptimeSample]
+    latest: ProbeResult | None = None
+    # number of consecutive samples which disagree with the current state
+    streak: int = field(default=0)
+
+    @property
+    def uptime(self) -> float | None:
+        """Fraction of the samples in memory in which the URL was up."""
+
+        if not self.samples:
+            return None
+
+        return sum(sample.up for sample in self.samples) / len(self.samples)
+
+
+def is_up(result: ProbeResult) -> bool:
+    """Check whether a probe result means that the website works.
+
+    Args:
+        result (ProbeResult): The probe result.
+
+    Returns:
+        bool: True if the website responded without a server error.
+    """
+
+    return result.error is None and result.status is not None and result.status < 500
+
+
+class UptimeMonitor:
+    """Periodically probes the watched URLs and tracks whether they are up.
+
+    Recent samples are kept in a fixed-size ring buffer per URL, while hourly rollups are
+    stored in the database. A state change is reported once `alert_threshold` consecutive
+    samples disagree with the current state, so a single failed request doesn't alert.
+    """
+
+    def __init__(
+        self,
+        http_client: HttpClient,
+        session: async_sessionmaker[AsyncSession],
+        max_concurrency: int = 5,
+        samples_per_url: int = 120,
+        alert_threshold: int = 2,
+    ) -> None:
+        self._http_client = http_client
+        self._session = session
+        self._max_concurrency = max_concurrency
+        self._samples_per_url = samples_per_url
+        self._alert_threshold = alert_threshold
+        self._watched: dict[str, WatchedUrl] = {}
+
+    def __iter__(self) -> Iterator[WatchedUrl]:
+        return iter(self._watched.values())
+
+    def get(self, url: str) -> WatchedUrl | None:
+        return self._watched.get(url)
+
+    def _track(self, url_id: int, url: str, up: bool | None) -> None:
+        self._watched[url] = WatchedUrl(
+            url_id=url_id,
+            url=url,
+            up=up,
+            samples=collections.deque(maxlen=self._samples_per_url),
+        )
+
+    async def load(self) -> None:
+        """Synchronize the watched URLs with the database.
+
+        URLs added to or removed from the database, e.g. by another process, are added or
+        removed, while the samples of the URLs which are still watched are kept. The states
+        stored by the checking process are picked up for the URLs this process doesn't check.
+        """
+
+        async with self._session() as session:
+            query_results = (
+                await session.execute(select(WatchedUrls.URLID, WatchedUrls.URL, WatchedUrls.IsUp))
+            ).fetchall()
+
+        stored_urls = set()
+        for url_id, url, up in query_results:
+            stored_urls.add(url)
+            watched_url = self._watched.get(url)
+            if watched_url is None or watched_url.url_id != url_id:
+                self._track(url_id, url, up)
+            elif watched_url.latest is None:
+                # not checked by this process, the stored state is the one to show
+                watched_url.up = up
+
+        for url in self._watched.keys() - stored_urls:
+            del self._watched[url]
+
+        logger.debug(f"Watching {len(self._watched)} URLs")
+
+    async def add(self, url: str, added_by: int) -> bool:
+        """Add an URL to the watch list.
+
+        Args:
+            url (str): The URL to watch.
+            added_by (int): The user ID of the user which added the URL.
+
+        Returns:
+            bool: False if the URL was already watched, e.g. added through another process.
+        """
+
+        if url in self._watched:
+            return False
+
+        watched_url = WatchedUrls(
+            URL=url,
+            AddedBy=added_by,
+            CreationDate=datetime.datetime.utcnow().strftime("%Y-%m-%d %H:%M"),
+        )
+
+        async with self._session() as session:
+            session.add(watched_url)
+            try:
+                await session.commit()
+            except IntegrityError:
+                await session.rollback()
+                await self.load()
+                return False
+
+        self._track(watched_url.URLID, url, None)
+        return True
+
+    async def remove(self, url: str) -> bool:
+        """Remove an URL from the watch list, together with its rollups.
+
+        Args:
+            url (str): The watched URL.
+
+        Returns:
+            bool: False if the URL wasn't watched.
+        """
+
+        watched_url = self._watched.pop(url, None)
+        if watched_url is None:
+            return False
+
+        async with self._session() as session:
+            await session.execute(
+                delete(UptimeRollups).where(UptimeRollups.URLID == watched_url.url_id)
+            )
+            await session.execute(
+                delete(WatchedUrls).where(WatchedUrls.URLID == watched_url.url_id)
+            )
+            await session.commit()
+
+        return True
+
+    async def check_all(self) -> list[StateChange]:
+        """Probe all the watched URLs concurrently and record the results.
+
+        Returns:
+            list[StateChange]: The URLs which went down or came back up.
+        """
+
+        watched_urls = list(self._watched.values())
+        if not watched_urls:
+            return []
+
+        semaphore = asyncio.Semaphore(self._max_concurrency)
+
+        async def probe(watched_url: WatchedUrl) -> ProbeResult:
+            async with semaphore:
+                return await self._http_client.probe(watched_url.url, fresh=True)
+
+        results = await asyncio.gather(*(probe(watched_url) for watched_url in watched_urls))
+
+        now = datetime.datetime.utcnow()
+        state_updates: list[WatchedUrl] = []
+        changes: list[StateChange] = []
+        for watched_url, result in zip(watched_urls, results):
+            previous_state = watched_url.up
+            self._record(watched_url, result, now)
+
+            if watched_url.up != previous_state:
+                state_updates.append(watched_url)
+                if previous_state is not None:
+                    changes.append(StateChange(watched_url.url, bool(watched_url.up), result))
+
+        await self._store(list(zip(watched_urls, results)), state_updates, now)
+        return changes
+
+    def _record(
+        self, watched_url: WatchedUrl, result: ProbeResult, now: datetime.datetime
+    ) -> None:
+        """Add a sample to the ring buffer of an URL and update its state."""
+
+        up = is_up(result)
+        latency = result.timings.total if up else None
+        watched_url.samples.append(UptimeSample(now, up, latency))
+        watched_url.latest = result
+
+        if watched_url.up is None:
+            watched_url.up = up
+        elif up == watched_url.up:
+            watched_url.streak = 0
+        else:
+            watched_url.streak += 1
+            if watched_url.streak >= self._alert_threshold:
+                watched_url.up = up
+                watched_url.streak = 0
+
+    async def _store(
+        self,
+        results: list[tuple[WatchedUrl, ProbeResult]],
+        state_updates: list[WatchedUrl],
+        now: datetime.datetime,
+    ) -> None:
+        """Add the results to the hourly rollups and persist the changed states."""
+
+        bucket_start = now.replace(minute=0, second=0, microsecond=0)
+        rollups = []
+        for watched_url, result in results:
+            if self._watched.get(watched_url.url) is not watched_url:
+                continue  # removed during the check
+
+            up = is_up(result)
+            latency = result.timings.total if up and result.timings.total is not None else 0.0
+            rollups.append(
+                {
+                    "URLID": watched_url.url_id,
+                    "BucketStart": bucket_start,
+                    "Samples": 1,
+                    "Failures": 0 if up else 1,
+                    "LatencySum": latency,
+                    "LatencyMax": latency,
+                }
+            )
+
+        if not rollups:
+            return
+
+        statement = insert(UptimeRollups).values(rollups)
+        statement = statement.on_conflict_do_update(
+            index_elements=[UptimeRollups.URLID, UptimeRollups.BucketStart],
+            set_={
+                "Samples": UptimeRollups.Samples + statement.excluded.Samples,
+                "Failures": UptimeRollups.Failures + statement.excluded.Failures,
+                "LatencySum": UptimeRollups.LatencySum + statement.excluded.LatencySum,
+                "LatencyMax": func.max(UptimeRollups.LatencyMax, statement.excluded.LatencyMax),
+            },
+        )
+
+        async with self._session() as session:
+            await session.execute(statement)
+
+            for watched_url in state_updates:
+                await session.execute(
+                    update(WatchedUrls)
+                    .where(WatchedUrls.URLID == watched_url.url_id)
+                    .values(IsUp=watched_url.up)
+                )
+
+            await session.commit()
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import pathlib
+from typing import TYPE_CHECKING, Any, Iterable, Mapping
+
+import discord
+from discord import app_commands
+
+from app.tracing import record_error
+
+if TYPE_CHECKING:
+    from app.bot import Bot
+
+logger = logging.getLogger(__name__)
+
+GuildCommand = app_commands.Command | app_commands.ContextMenu | app_commands.Group
+
+
+class CommandTree(app_commands.CommandTree["Bot"]):
+    """Command tree which traces every interaction and handles the errors of all commands.
+
+    Guild syncs are skipped when the commands of a guild didn't change since the last sync,
+    which is detected with a fingerprint of the payload the sync would send.
+    """
+
+    def fingerprint(self, guild: discord.abc.Snowflake) -> str:
+        """Compute a stable hash of the commands which would be synced to a guild.
+
+        Args:
+            guild (discord.abc.Snowflake): The guild.
+
+        Returns:
+            str: The hex digest of the serialized commands.
+        """
+
+        payload = sorted(
+            (command.to_dict() for command in self.get_commands(guild=guild)),
+            key=lambda command: (command["type"], command["name"]),
+        )
+        serialized = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(serialized.encode()).hexdigest()
+
+    def move_guild_commands(
+        self,
+        old_guilds: Iterable[discord.abc.Snowflake],
+        new_guilds: Iterable[discord.abc.Snowflake],
+    ) -> None:
+        """Move the commands registered in a set of guilds to another set of guilds.
+
+        Args:
+            old_guilds (Iterable[discord.abc.Snowflake]): The guilds with the commands.
+            new_guilds (Iterable[discord.abc.Snowflake]): The guilds which get the commands.
+        """
+
+        guild_commands: dict[tuple[object, str], GuildCommand] = {}
+        for guild in old_guilds:
+            for command in self.get_commands(guild=guild):
+                command_type = getattr(command, "type", discord.AppCommandType.chat_input)
+                guild_commands.setdefault((command_type, command.name), command)
+            self.clear_commands(guild=guild)
+
+        for guild in new_guilds:
+            for command in guild_commands.values():
+                self.add_command(command, guild=guild, override=True)
+
+    async def sync_changed(
+        self, guilds: Iterable[discord.abc.Snowflake], fingerprints_path: str
+    ) -> None:
+        """Concurrently sync the guilds whose commands changed since their last sync.
+
+        The fingerprints of the synced guilds are stored in a JSON file, deleting the file
+        forces all the guilds to be synced again.
+
+        Args:
+            guilds (Iterable[discord.abc.Snowflake]): The guilds to sync.
+            fingerprints_path (str): The path to the file with the stored fingerprints.
+        """
+
+        path = pathlib.Path(fingerprints_path)
+        try:
+            stored: dict[str, str] = json.loads(path.read_text())
+        except (OSError, ValueError):
+            stored = {}
+
+        fingerprints = {str(guild.id): self.fingerprint(guild) for guild in guilds}
+        changed = [
+            discord.Object(id=int(guild_id))
+            for guild_id, fingerprint in fingerprints.items()
+            if stored.get(guild_id) != fingerprint
+        ]
+
+        logger.info(f"Syncing commands of {len(changed)} out of {len(fingerprints)} guilds")
+        if not changed:
+            return
+
+        results = await asyncio.gather(
+            *(self.sync(guild=guild) for guild in changed), return_exceptions=True
+        )
+
+        for guild, result in zip(changed, results):
+            if isinstance(result, BaseException):
+                logger.error(f"Failed to sync commands of guild {guild.id}: {result}")
+            else:
+                stored[str(guild.id)] = fingerprints[str(guild.id)]
+
+        path.write_text(json.dumps(stored, indent=2))
+
+    async def _call(self, interaction: discord.Interaction[Bot]) -> None:
+        data: Mapping[str, Any] = interaction.data or {}
+        # seconds the interaction waited before being handled, counts towards the deadline
+        queued = (discord.utils.utcnow() - interaction.created_at).total_seconds()
+
+        with self.client.tracer.trace(
+            "interaction",
+            command=data.get("name"),
+            type=interaction.type.name,
+            guild_id=interaction.guild_id,
+            queued=queued,
+        ):
+            await super()._call(interaction)
+
+    async def on_error(
+        self, interaction: discord.Interaction[Bot], error: app_commands.AppCommandError
+    ) -> None:
+        """Handle errors for application commands.
+
+        Args:
+            interaction (discord.Interaction): The interaction that triggered the error.
+            error (app_commands.AppCommandError): The error that was triggered.
+        """
+
+        record_error(error)
+        command_name = interaction.command.qualified_name if interaction.command else None
+        logger.error(f"Command {command_name} failed: {type(error).__name__}: {error}")
+        match error:
+            case app_commands.errors.CommandOnCooldown():
+                await interaction.response.send_message(str(error))
+            case app_commands.errors.CommandInvokeError():
+                await interaction.followup.send(str(error.original), ephemeral=True)
+            case _:
+                await interaction.followup.send(str(error), ephemeral=True)
@@ -1,174 +1,358 @@
+import dataclasses
+import functools
+import math
 import os
-from typing import Iterable
+from typing import Any, Callable, Iterable
 
 import discord
 import dotenv
+import tomllib
+import zoneinfo
 
-dotenv.load_dotenv()
-
-GUILD_IDS: frozenset[int] = frozenset((848921520776413213, 528544644678680576, 612600222622810113))
+DEFAULT_GUILD_IDS = "848921520776413213,528544644678680576,612600222622810113"
+DEFAULT_CONFIG_FILE = "config.toml"
 LOGGING_LEVELS: frozenset[str] = frozenset(("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"))
+GATEWAY_PROFILES: frozenset[str] = frozenset(("full", "minimal"))
 
 
-class MissingEnvironmentVariable(Exception):
-    pass
+class InvalidSettings(Exception):
+    def __init__(self, errors: list[str]) -> None:
+        super().__init__("Invalid configuration:\n" + "\n".join(errors))
+        self.errors = errors
 
 
-class InvalidEnvironmentVariable(Exception):
-    pass
+# Parses the text value of a setting, raising ValueError with what the value must be.
+SettingParser = Callable[[str], Any]
 
 
-def get_guilds() -> Iterable[discord.Object]:
-    """Get discord guilds objects based on GUILD_IDS enviromental variable
+@dataclasses.dataclass(frozen=True)
+class SettingDefinition:
+    """How a setting is read from its environment variable.
 
-    Returns:
-        Iterable[discord.Object]: iterable of discord guild objects
+    Attributes:
+        variable (str): name of the environment variable, or uppercase key of the file
+        parse (SettingParser): parser of the value
+        default (str | None): value used when no source sets it, None makes it required
+        reloadable (bool): whether the setting is replaced on SIGHUP
     """
 
-    guilds = []
+    variable: str
+    parse: SettingParser = str
+    default: str | None = None
+    reloadable: bool = False
 
-    for guild_ID in GUILD_IDS:
-        guilds.append(discord.Object(id=guild_ID))
 
-    return guilds
+def read_config_file(path: str) -> dict[str, str]:
+    """Read a TOML configuration file with the environment variables as lowercase keys
 
+    Lists are joined with commas, so `guild_ids = [1, 2]` is the same as GUILD_IDS=1,2.
 
-def get_logging_level() -> str:
-    """Get logging level from LOGGING_LEVEL enviromental variable
+    Args:
+        path (str): path to the file, a missing file is treated as empty
 
     Raises:
-        InvalidEnvironmentVariable: Invalid logging level enviromental variable
-        MissingEnvironmentVariable: Missing logging level enviromental variable
+        InvalidSettings: The file is not valid TOML
 
     Returns:
-        str: a logging level string
+        dict[str, str]: values by environment variable name
     """
 
-    logging_level = os.getenv("LOGGING_LEVEL")
+    try:
+        with open(path, "rb") as config_file:
+            document = tomllib.load(config_file)
+    except FileNotFoundError:
+        return {}
+    except tomllib.TOMLDecodeError as error:
+        raise InvalidSettings([f"Invalid configuration file {path}: {error}"]) from error
 
-    if logging_level not in LOGGING_LEVELS:
-        raise InvalidEnvironmentVariable(f"Invalid logging level, valid values {LOGGING_LEVELS}")
+    def to_string(value: Any) -> str:
+        if isinstance(value, list):
+            return ",".join(to_string(item) for item in value)
+        if isinstance(value, bool):
+            return str(value).lower()
+        return str(value)
 
-    if logging_level is None:
-        raise MissingEnvironmentVariable(
-            "Enviromental variable LOGGING_LEVEL doesn't have a value"
-        )
+    return {key.upper(): to_string(value) for key, value in document.items()}
 
-    return logging_level
 
+def parse_ids(value: str) -> frozenset[int]:
+    """Parse a comma separated list of discord IDs
 
-def get_command_prefix() -> str:
-    """Get command prefix from COMMAND_PREFIX enviromental variable
+    Args:
+        value (str): the comma separated IDs
 
     Raises:
-        MissingEnvironmentVariable: missing command prefix enviromental variable
+        ValueError: one of the values is not an ID
 
     Returns:
-        str: a command prefix string
+        frozenset[int]: the parsed IDs
     """
-    command_prefix = os.getenv("COMMAND_PREFIX")
 
-    if command_prefix is None:
-        raise MissingEnvironmentVariable(
-            "Enviromental variable COMMAND_PREFIX doesn't have a value"
-        )
+    ids = [part.strip() for part in value.split(",") if part.strip()]
 
-    return command_prefix
+    if not all(id_.isdigit() for id_ in ids):
+        raise ValueError("must be a comma separated list of IDs")
 
+    return frozenset(int(id_) for id_ in ids)
 
-def get_app_id() -> str:
-    """Get current app id from APP_ID enviromental variable
 
-    Raises:
-        MissingEnvironmentVariable: missing app id enviromental variable
+def _choice(choices: frozenset[str]) -> SettingParser:
+    def parse(value: str) -> str:
+        if value not in choices:
+            raise ValueError(f"must be one of {sorted(choices)}")
+        return value
 
-    Returns:
-        str: a string with the app ID
-    """
+    return parse
 
-    app_id = os.getenv("APP_ID")
 
-    if app_id is None:
-        raise MissingEnvironmentVariable("Enviromental variable APP_ID doesn't have a value")
+def _integer(is_valid: Callable[[int], bool], description: str) -> SettingParser:
+    def parse(value: str) -> int:
+        if not value.isdigit() or not is_valid(int(value)):
+            raise ValueError(f"must be {description}")
+        return int(value)
 
-    return app_id
+    return parse
 
 
-def get_token() -> str:
-    """Get discord token from DISCORD_TOKEN enviromental variable
+def _number(is_valid: Callable[[float], bool], description: str) -> SettingParser:
+    def parse(value: str) -> float:
+        try:
+            number = float(value)
+        except ValueError:
+            number = math.nan
 
-    Raises:
-        MissingEnvironmentVariable: missing discord token enviromental variable
+        if not is_valid(number):
+            raise ValueError(f"must be {description}")
+        return number
 
-    Returns:
-        str: a string with the discord token
-    """
+    return parse
 
-    token = os.getenv("DISCORD_TOKEN")
 
-    if token is None:
-        raise MissingEnvironmentVariable(
-            "Enviromental variable DISCORD_TOKEN doesn't have a value"
-        )
+def _optional(parser: SettingParser) -> SettingParser:
+    """Make an empty value mean None, e.g. a disabled feature."""
 
-    return token
+    def parse(value: str) -> Any:
+        return parser(value) if value else None
 
+    return parse
 
-def get_logging_path() -> str:
-    """Get logging path from LOGS_PATH enviromental variable
 
-    Raises:
-        MissingEnvironmentVariable: missing logging path enviromental variable
+def _guild_ids(value: str) -> frozenset[int]:
+    guild_ids = parse_ids(value)
 
-    Returns:
-        str: a string with the path where the logs will be stored
-    """
+    if not guild_ids:
+        raise ValueError("must list a guild")
 
-    logging_path = os.getenv("LOGS_PATH")
+    return guild_ids
+
+
+def _shard_ids(value: str) -> list[int] | None:
+    shard_ids = parse_ids(value)
+    return sorted(shard_ids) if shard_ids else None
+
+
+def _timezone(value: str) -> str:
+    try:
+        zoneinfo.ZoneInfo(value)
+    except (ValueError, zoneinfo.ZoneInfoNotFoundError):
+        raise ValueError("must be an IANA timezone name, e.g. Europe/Warsaw") from None
+
+    return value
 
-    if logging_path is None:
-        raise MissingEnvironmentVariable(
-            "Enviromental variable for logging path doesn't have a value"
-        )
 
-    return logging_path
+_positive_integer = _integer(lambda number: number >= 1, "a positive integer")
+_non_negative_integer = _integer(lambda number: number >= 0, "a non-negative integer")
+_non_negative_number = _number(lambda number: number >= 0, "a non-negative number")
 
 
-def get_database_path() -> str:
-    """Get database path from DATABASE_PATH enviromental variable
+@dataclasses.dataclass(frozen=True)
+class Settings:
+    """Configuration parsed and validated once, shared by all the modules.
+
+    Read it with `get_settings()`. The fields in RELOADABLE_SETTINGS are replaced on
+    SIGHUP, the others only change after a restart.
+    """
+
+    token: str
+    app_id: str
+    command_prefix: str
+    logging_level: str
+    logging_path: str
+    database_path: str
+    data_path: str
+    guild_ids: frozenset[int]
+    reminder_delivery_workers: int
+    reminder_coalesce_window: float
+    reminder_backlog_rate: float
+    reminder_digest_after: int
+    responders_disabled_guilds: frozenset[int]
+    responders_disabled_channels: frozenset[int]
+    uptime_check_interval: int
+    uptime_alert_channel: int | None
+    sql_logging_level: str
+    log_max_bytes: int
+    log_backup_count: int
+    metrics_port: int | None
+    trace_sample_rate: float
+    trace_slow_threshold: float
+    gateway_profile: str
+    shard_ids: list[int] | None
+    shard_count: int | None
+    timezone: str
+
+    @functools.cached_property
+    def guilds(self) -> tuple[discord.Object, ...]:
+        """Guild objects of the guild IDs, for the command decorators."""
+
+        return tuple(discord.Object(id=guild_id) for guild_id in sorted(self.guild_ids))
+
+    def changed_fields(self, other: "Settings") -> set[str]:
+        return {
+            field.name
+            for field in dataclasses.fields(self)
+            if getattr(self, field.name) != getattr(other, field.name)
+        }
+
+
+SETTING_DEFINITIONS: dict[str, SettingDefinition] = {
+    "token": SettingDefinition("DISCORD_TOKEN"),
+    "app_id": SettingDefinition("APP_ID"),
+    "command_prefix": SettingDefinition("COMMAND_PREFIX"),
+    "logging_level": SettingDefinition("LOGGING_LEVEL", _choice(LOGGING_LEVELS), reloadable=True),
+    "logging_path": SettingDefinition("LOGS_PATH"),
+    "database_path": SettingDefinition("DATABASE_PATH"),
+    "data_path": SettingDefinition("DATA_PATH"),
+    "guild_ids": SettingDefinition("GUILD_IDS", _guild_ids, DEFAULT_GUILD_IDS, reloadable=True),
+    "reminder_delivery_workers": SettingDefinition(
+        "REMINDER_DELIVERY_WORKERS", _positive_integer, "10"
+    ),
+    "reminder_coalesce_window": SettingDefinition(
+        "REMINDER_COALESCE_WINDOW", _non_negative_number, "1"
+    ),
+    "reminder_backlog_rate": SettingDefinition(
+        "REMINDER_BACKLOG_RATE", _number(lambda rate: rate > 0, "a positive number"), "5"
+    ),
+    "reminder_digest_after": SettingDefinition(
+        "REMINDER_DIGEST_AFTER", _non_negative_integer, "3600"
+    ),
+    "responders_disabled_guilds": SettingDefinition(
+        "RESPONDERS_DISABLED_GUILDS", parse_ids, "", reloadable=True
+    ),
+    "responders_disabled_channels": SettingDefinition(
+        "RESPONDERS_DISABLED_CHANNELS", parse_ids, "", reloadable=True
+    ),
+    "uptime_check_interval": SettingDefinition("UPTIME_CHECK_INTERVAL", _positive_integer, "60"),
+    "uptime_alert_channel": SettingDefinition(
+        "UPTIME_ALERT_CHANNEL_ID", _optional(_integer(lambda _: True, "an ID")), ""
+    ),
+    "sql_logging_level": SettingDefinition(
+        "SQL_LOGGING_LEVEL", _choice(LOGGING_LEVELS), "WARNING"
+    ),
+    "log_max_bytes": SettingDefinition("LOG_MAX_BYTES", _positive_integer, str(10 * 1024 * 1024)),
+    "log_backup_count": SettingDefinition("LOG_BACKUP_COUNT", _positive_integer, "14"),
+    "metrics_port": SettingDefinition(
+        "METRICS_PORT", _optional(_integer(lambda port: 0 < port < 65536, "a port")), ""
+    ),
+    "trace_sample_rate": SettingDefinition(
+        "TRACE_SAMPLE_RATE",
+        _number(lambda rate: 0 <= rate <= 1, "a number between 0 and 1"),
+        "0.01",
+    ),
+    "trace_slow_threshold": SettingDefinition("TRACE_SLOW_THRESHOLD", _non_negative_number, "2"),
+    "gateway_profile": SettingDefinition("GATEWAY_PROFILE", _choice(GATEWAY_PROFILES), "minimal"),
+    "shard_ids": SettingDefinition("SHARD_IDS", _shard_ids, ""),
+    "shard_count": SettingDefinition("SHARD_COUNT", _optional(_positive_integer), ""),
+    "timezone": SettingDefinition("TIMEZONE", _timezone, "Europe/Warsaw"),
+}
+
+RELOADABLE_SETTINGS: frozenset[str] = frozenset(
+    name for name, definition in SETTING_DEFINITIONS.items() if definition.reloadable
+)
+
+_settings: Settings | None = None
+
+
+def load_settings() -> Settings:
+    """Parse and validate all the settings from the environment and the configuration files
+
+    The .env file and the configuration file, named by CONFIG_FILE and defaulting to
+    config.toml, are read again on every call. Environment variables, then the .env
+    file, take precedence over the configuration file, except for the reloadable settings
+    which are taken from the configuration file first, so that they can be changed while
+    the bot runs even when the environment sets them.
 
     Raises:
-        MissingEnvironmentVariable: missing database path enviromental variable
+        InvalidSettings: One or more settings are missing or invalid, all of them are reported
 
     Returns:
-        str: a string with the path where the database is present
+        Settings: the parsed settings
     """
 
-    db_path = os.getenv("DATABASE_PATH")
+    environment = {
+        name: value for name, value in dotenv.dotenv_values().items() if value is not None
+    }
+    environment.update(os.environ)
+    config_file_values = read_config_file(environment.get("CONFIG_FILE", DEFAULT_CONFIG_FILE))
 
-    if db_path is None:
-        raise MissingEnvironmentVariable(
-            "Enviromental variable for database path doesn't have a value"
+    values: dict[str, Any] = {}
+    errors: list[str] = []
+
+    for name, definition in SETTING_DEFINITIONS.items():
+        sources = (environment, config_file_values)
+        if definition.reloadable:
+            sources = (config_file_values, environment)
+
+        value = next(
+            (source[definition.variable] for source in sources if definition.variable in source),
+            definition.default,
         )
+        if value is None:
+            errors.append(f"Environment variable {definition.variable} doesn't have a value")
+            continue
 
-    return db_path
+        try:
+            values[name] = definition.parse(value)
+        except ValueError as error:
+            errors.append(f"Environment variable {definition.variable} {error}")
 
+    if errors:
+        raise InvalidSettings(errors)
 
-def get_data_path() -> str:
-    """Get data path from DATA_PATH enviromental variable
+    return Settings(**values)
 
-    Raises:
-        MissingEnvironmentVariable: missing data path enviromental variable
+
+def get_settings() -> Settings:
+    """Get the current settings, loading them on first use
 
     Returns:
-        str: a string with the path where the data folder is located in
+        Settings: the current settings
     """
 
-    data_path = os.getenv("DATA_PATH")
+    global _settings
 
-    if data_path is None:
-        raise MissingEnvironmentVariable(
-            "Enviromental variable for data folder path doesn't have a value"
-        )
+    if _settings is None:
+        _settings = load_settings()
+
+    return _settings
+
+
+def set_settings(settings: Settings) -> None:
+    """Replace the current settings, e.g. after reloading them
+
+    Args:
+        settings (Settings): the new settings
+    """
+
+    global _settings
+
+    _settings = settings
+
+
+def get_guilds() -> Iterable[discord.Object]:
+    """Get discord guilds objects of the guilds from the settings
+
+    Returns:
+        Iterable[discord.Object]: iterable of discord guild objects
+    """
 
-    return data_path
+    return get_settings().guilds
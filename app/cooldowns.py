@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+import asyncio
+import datetime
+import logging
+import time
+from typing import Any, Callable, TypeVar
+
+import discord
+from discord import app_commands
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.database.models.cooldowns import Cooldowns
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Returns the ID of the bucket of an interaction, e.g. the ID of its user.
+CooldownKey = Callable[[discord.Interaction], int]
+
+
+def by_user(interaction: discord.Interaction) -> int:
+    return interaction.user.id
+
+
+def by_guild(interaction: discord.Interaction) -> int:
+    """Bucket by guild, falling back to the user in direct messages."""
+
+    return interaction.guild_id if interaction.guild_id is not None else interaction.user.id
+
+
+class CooldownTable:
+    """Token buckets of the app commands, shared by the processes through the database.
+
+    A bucket allowing `rate` uses per `per` seconds is stored as the single time at which
+    it is full again, which moves `per / rate` seconds forward with every use (the generic
+    cell rate algorithm). Checks only touch the in-memory table, and every `sync_interval`
+    seconds the buckets used since the last sync are written to the database in one batch,
+    the buckets used by the other processes are read back, and full buckets are dropped.
+    Processes sharing the database see each other's uses after at most one sync interval,
+    and the buckets survive restarts.
+    """
+
+    def __init__(self, sync_interval: float = 5.0) -> None:
+        self._sync_interval = sync_interval
+        # (command, bucket key) -> time.time() at which the bucket is full again
+        self._full_at: dict[tuple[str, int], float] = {}
+        self._dirty: set[tuple[str, int]] = set()
+        self._session: async_sessionmaker[AsyncSession] | None = None
+        self._task: asyncio.Task[None] | None = None
+
+    def __len__(self) -> int:
+        return len(self._full_at)
+
+    def consume(self, command: str, key: int, rate: int, per: float) -> float:
+        """Use a token of a bucket if it has one.
+
+        Args:
+            command (str): The qualified name of the command.
+            key (int): The ID of the bucket, e.g. a user ID.
+            rate (int): The number of uses allowed per `per` seconds.
+            per (float): The number of seconds in which the bucket refills.
+
+        Returns:
+            float: 0 if a token was used, otherwise the number of seconds until the next one.
+        """
+
+        now = time.time()
+        bucket = (command, key)
+        full_at = max(self._full_at.get(bucket, now), now)
+        emission_interval = per / rate
+
+        retry_after = full_at + emission_interval - per - now
+        if retry_after > 0:
+            return retry_after
+
+        self._full_at[bucket] = full_at + emission_interval
+        self._dirty.add(bucket)
+        return 0.0
+
+    async def start(self, session: async_sessionmaker[AsyncSession]) -> None:
+        """Load the persisted buckets and start syncing them with the database.
+
+        Args:
+            session (async_sessionmaker[AsyncSession]): The database session factory.
+        """
+
+        self._session = session
+        await self.sync()
+
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="cooldown-sync")
+
+    async def stop(self) -> None:
+        """Stop syncing, writing the buckets used since the last sync."""
+
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        if self._session is not None:
+            await self.sync()
+
+    async def sync(self) -> None:
+        """Write the used buckets, read the buckets of the other processes and prune full ones."""
+
+        assert self._session is not None
+
+        now = time.time()
+        # swapped rather than cleared, buckets used while the sync awaits stay dirty
+        synced, self._dirty = self._dirty, set()
+        dirty = [
+            {"Command": command, "BucketKey": key, "FullAt": _to_datetime(full_at)}
+            for command, key in synced
+            if (full_at := self._full_at.get((command, key))) is not None
+        ]
+
+        try:
+            async with self._session() as session:
+                if dirty:
+                    statement = insert(Cooldowns)
+                    await session.execute(
+                        statement.on_conflict_do_update(
+                            index_elements=[Cooldowns.Command, Cooldowns.BucketKey],
+                            set_={"FullAt": func.max(Cooldowns.FullAt, statement.excluded.FullAt)},
+                        ),
+                        dirty,
+                    )
+
+                await session.execute(
+                    delete(Cooldowns).where(Cooldowns.FullAt <= _to_datetime(now))
+                )
+                persisted = (
+                    await session.execute(
+                        select(Cooldowns.Command, Cooldowns.BucketKey, Cooldowns.FullAt)
+                    )
+                ).fetchall()
+                await session.commit()
+        except BaseException:
+            # written by the next sync instead
+            self._dirty |= synced
+            raise
+
+        # named apart from full_at, which the comprehension above binds in this scope
+        for command, key, persisted_full_at in persisted:
+            bucket = (command, key)
+            self._full_at[bucket] = max(
+                self._full_at.get(bucket, 0.0), _to_timestamp(persisted_full_at)
+            )
+
+        expired = [bucket for bucket, full_at in self._full_at.items() if full_at <= now]
+        for bucket in expired:
+            del self._full_at[bucket]
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self._sync_interval)
+            try:
+                await self.sync()
+            except Exception:
+                logger.exception("Failed to sync the command cooldowns")
+
+
+def _to_datetime(timestamp: float) -> datetime.datetime:
+    return datetime.datetime.fromtimestamp(timestamp, datetime.timezone.utc).replace(tzinfo=None)
+
+
+def _to_timestamp(date: datetime.datetime) -> float:
+    return date.replace(tzinfo=datetime.timezone.utc).timestamp()
+
+
+def cooldown(rate: int, per: float, *, key: CooldownKey = by_user) -> Callable[[T], T]:
+    """Check limiting how often a command is used, a drop-in for app_commands.checks.cooldown.
+
+    The buckets live in the bot's CooldownTable, so they are shared by the processes and
+    persist across restarts.
+
+    Args:
+        rate (int): The number of uses allowed per `per` seconds.
+        per (float): The number of seconds in which the bucket refills.
+        key (CooldownKey, optional): The bucket of an interaction. Defaults to its user.
+
+    Returns:
+        Callable[[T], T]: The check decorator.
+    """
+
+    bucket = app_commands.Cooldown(rate, per)
+
+    async def predicate(interaction: discord.Interaction[Any]) -> bool:
+        assert interaction.command is not None
+
+        table: CooldownTable = interaction.client.cooldowns
+        retry_after = table.consume(
+            interaction.command.qualified_name, key(interaction), rate, per
+        )
+        if retry_after > 0:
+            raise app_commands.CommandOnCooldown(bucket, retry_after)
+
+        return True
+
+    return app_commands.check(predicate)
@@ -1,6 +1,10 @@
+import asyncio
+import fcntl
 import logging
 import pathlib
+from typing import Any
 
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import (
     AsyncEngine,
     AsyncSession,
@@ -8,34 +12,84 @@ from sqlalchemy.ext.asyncio import (
     create_async_engine,
 )
 
+from app.database.migrations import run_migrations
+
 # imports needed for sqlalchemy to create the tables
 from app.database.models.base import Base
+from app.database.models.cooldowns import (
+    Cooldowns,  # noqa: F401
+)
+from app.database.models.group_reminder_signups import (
+    GroupReminderSignups,  # noqa: F401
+)
 from app.database.models.group_reminders import (
     GroupReminders,  # noqa: F401
 )
+from app.database.models.leases import (
+    Leases,  # noqa: F401
+)
 from app.database.models.reminders import (
     Reminders,  # noqa: F401
 )
+from app.database.models.uptime_rollups import (
+    UptimeRollups,  # noqa: F401
+)
+from app.database.models.watched_urls import (
+    WatchedUrls,  # noqa: F401
+)
+from app.metrics import instrument_engine
+from app.tracing import trace_engine
 
 logger = logging.getLogger(__name__)
 
 
+def configure_connection(dbapi_connection: Any, connection_record: Any) -> None:
+    """Let several processes share the database file.
+
+    WAL mode lets readers run concurrently with a writer, and writers wait for the lock
+    instead of failing immediately.
+    """
+
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA busy_timeout=30000")
+    cursor.close()
+
+
 class DatabaseHandler:
     def __init__(self, database_path: str) -> None:
+        self._database_path = database_path
         self._engine: AsyncEngine = create_async_engine(
-            f"sqlite+aiosqlite:///{database_path}", future=True, echo=True
+            f"sqlite+aiosqlite:///{database_path}", future=True
         )
+        event.listen(self._engine.sync_engine, "connect", configure_connection)
+        instrument_engine(self._engine)
+        trace_engine(self._engine)
 
         self._session: async_sessionmaker[AsyncSession] = async_sessionmaker(
             self._engine, expire_on_commit=False
         )
 
     async def create_database(self) -> None:
-        """Create the database and all the tables."""
+        """Create the database and all the tables, then migrate existing tables.
+
+        Processes sharing the database do it one at a time, holding a lock file. The
+        migrations, including the backfills of existing rows, finish before this returns.
+        """
+
+        with open(f"{self._database_path}.lock", "w") as lock_file:
+            await asyncio.to_thread(fcntl.flock, lock_file, fcntl.LOCK_EX)
+
+            async with self._engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+                await conn.commit()
+
+            await run_migrations(self._engine)
+
+    async def close(self) -> None:
+        """Close the connections to the database."""
 
-        async with self._engine.begin() as conn:
-            await conn.run_sync(Base.metadata.create_all)
-            await conn.commit()
+        await self._engine.dispose()
 
     @property
     def session(self) -> async_sessionmaker[AsyncSession]:
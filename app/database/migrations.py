@@ -0,0 +1,239 @@
+import asyncio
+import datetime
+import logging
+from typing import Awaitable, Callable, NamedTuple, cast
+
+from sqlalchemy import Connection, MetaData, Table, bindparam, inspect, select, text, update
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.schema import CreateColumn, CreateTable
+
+from app.database.models.group_reminders import GroupReminders
+from app.database.models.reminders import Reminders
+
+logger = logging.getLogger(__name__)
+
+BACKFILL_BATCH_SIZE: int = 500
+REMINDER_TABLES: tuple[Table, ...] = (
+    cast(Table, Reminders.__table__),
+    cast(Table, GroupReminders.__table__),
+)
+
+
+class Migration(NamedTuple):
+    version: int
+    description: str
+    upgrade: Callable[[AsyncEngine], Awaitable[None]]
+
+
+def add_missing_columns(connection: Connection, table: Table) -> None:
+    """Add the columns of a table model which are missing in the existing database table.
+
+    Args:
+        connection (Connection): A synchronous database connection.
+        table (Table): The table model.
+    """
+
+    existing_columns = {column["name"] for column in inspect(connection).get_columns(table.name)}
+
+    for column in table.columns:
+        if column.name not in existing_columns:
+            column_definition = CreateColumn(column).compile(  # type: ignore[no-untyped-call]
+                dialect=connection.dialect
+            )
+            connection.execute(text(f'ALTER TABLE "{table.name}" ADD COLUMN {column_definition}'))
+
+
+def create_missing_indexes(connection: Connection, table: Table) -> None:
+    """Create the indexes of a table model which are missing in the database.
+
+    Args:
+        connection (Connection): A synchronous database connection.
+        table (Table): The table model.
+    """
+
+    for index in table.indexes:
+        index.create(connection, checkfirst=True)
+
+
+def rebuild_with_autoincrement(connection: Connection, table: Table) -> None:
+    """Recreate a table with an AUTOINCREMENT primary key, so that its IDs are never reused.
+
+    SQLite can't add AUTOINCREMENT to an existing table, so the rows are copied to a new
+    table which then replaces the old one. The sequence continues after the highest ID.
+
+    Args:
+        connection (Connection): A synchronous database connection.
+        table (Table): The table model, declared with sqlite_autoincrement.
+    """
+
+    definition: str = connection.execute(
+        text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"),
+        {"name": table.name},
+    ).scalar_one()
+    if "AUTOINCREMENT" in definition.upper():
+        return
+
+    new_name = f"{table.name}_rebuilt"
+    # without the indexes, which are created under their names once the old table is dropped
+    connection.execute(CreateTable(table.to_metadata(MetaData(), name=new_name)))
+
+    columns = ", ".join(f'"{column.name}"' for column in table.columns)
+    connection.execute(
+        text(f'INSERT INTO "{new_name}" ({columns}) SELECT {columns} FROM "{table.name}"')
+    )
+    connection.execute(text(f'DROP TABLE "{table.name}"'))
+    connection.execute(text(f'ALTER TABLE "{new_name}" RENAME TO "{table.name}"'))
+    create_missing_indexes(connection, table)
+
+
+def parse_legacy_date(remind_date: str) -> datetime.datetime:
+    """Parse a date stored in one of the legacy string columns.
+
+    Args:
+        remind_date (str): The stored date, usually in "%Y-%m-%d %H:%M" format.
+
+    Returns:
+        datetime.datetime: The parsed date, or the current time if the date is invalid.
+    """
+
+    try:
+        return datetime.datetime.fromisoformat(remind_date)
+    except ValueError:
+        logger.warning(f"Invalid legacy reminder date {remind_date!r}, it will be sent now")
+        return datetime.datetime.utcnow()
+
+
+async def backfill_remind_at(engine: AsyncEngine, table: Table) -> None:
+    """Convert the legacy RemindDate column into RemindAt, one short transaction per batch.
+
+    The batches keep the write transactions short, so that processes still running on the
+    database aren't locked out while it converts, but the starting bot waits for all of them.
+
+    Args:
+        engine (AsyncEngine): The database engine.
+        table (Table): The reminders table to convert.
+    """
+
+    last_id = 0
+    converted = 0
+
+    while True:
+        async with engine.begin() as conn:
+            rows = (
+                await conn.execute(
+                    select(table.c.ReminderID, table.c.RemindDate)
+                    .where(
+                        table.c.ReminderID > last_id,
+                        table.c.RemindAt.is_(None),
+                        table.c.RemindDate.is_not(None),
+                    )
+                    .order_by(table.c.ReminderID)
+                    .limit(BACKFILL_BATCH_SIZE)
+                )
+            ).fetchall()
+
+            if not rows:
+                break
+
+            await conn.execute(
+                update(table)
+                .where(table.c.ReminderID == bindparam("reminder_id"))
+                .values(RemindAt=bindparam("remind_at")),
+                [
+                    {"reminder_id": reminder_id, "remind_at": parse_legacy_date(remind_date)}
+                    for reminder_id, remind_date in rows
+                ],
+            )
+
+        last_id = rows[-1].ReminderID
+        converted += len(rows)
+        await asyncio.sleep(0)  # let the event loop run between batches
+
+    logger.info(f"Converted {converted} rows of {table.name} to the RemindAt column")
+
+
+async def add_typed_remind_dates(engine: AsyncEngine) -> None:
+    """Add the RemindAt column and the reminder indexes, then backfill RemindAt."""
+
+    for table in REMINDER_TABLES:
+        async with engine.begin() as conn:
+            await conn.run_sync(add_missing_columns, table)
+            await conn.run_sync(create_missing_indexes, table)
+
+        await backfill_remind_at(engine, table)
+
+
+async def add_outbox_columns(engine: AsyncEngine) -> None:
+    """Add the delivery outbox columns, existing rows become pending through their defaults."""
+
+    for table in REMINDER_TABLES:
+        async with engine.begin() as conn:
+            await conn.run_sync(add_missing_columns, table)
+
+
+async def add_signup_tracking(engine: AsyncEngine) -> None:
+    """Add the signup tracking columns and the signup message index to group reminders."""
+
+    async with engine.begin() as conn:
+        await conn.run_sync(add_missing_columns, GroupReminders.__table__)
+        await conn.run_sync(create_missing_indexes, GroupReminders.__table__)
+
+
+async def add_recurrence_columns(engine: AsyncEngine) -> None:
+    """Add the recurrence columns, existing reminders stay one-shot."""
+
+    for table in REMINDER_TABLES:
+        async with engine.begin() as conn:
+            await conn.run_sync(add_missing_columns, table)
+
+
+async def add_author_listing_indexes(engine: AsyncEngine) -> None:
+    """Add the indexes listing the reminders of an author in due date order."""
+
+    for table in REMINDER_TABLES:
+        async with engine.begin() as conn:
+            await conn.run_sync(create_missing_indexes, table)
+
+
+async def add_reminder_autoincrement(engine: AsyncEngine) -> None:
+    """Stop reusing the IDs of deleted reminders, which the scheduler's polls would miss."""
+
+    for table in REMINDER_TABLES:
+        async with engine.begin() as conn:
+            await conn.run_sync(rebuild_with_autoincrement, table)
+
+
+MIGRATIONS: tuple[Migration, ...] = (
+    Migration(1, "Typed and indexed RemindAt column", add_typed_remind_dates),
+    Migration(2, "Reminder delivery outbox columns", add_outbox_columns),
+    Migration(3, "Group reminder signup tracking", add_signup_tracking),
+    Migration(4, "Recurring reminders", add_recurrence_columns),
+    Migration(5, "Author reminder listing indexes", add_author_listing_indexes),
+    Migration(6, "Never reused reminder IDs", add_reminder_autoincrement),
+)
+
+
+async def run_migrations(engine: AsyncEngine) -> None:
+    """Apply the migrations newer than the schema version stored in the database.
+
+    The version is kept in SQLite's user_version pragma and bumped after each migration,
+    so an interrupted migration is resumed on the next start. The bot connects to the
+    gateway only after the migrations finished, so the startup of a bot with a large
+    database to convert takes as long as the conversion.
+
+    Args:
+        engine (AsyncEngine): The database engine.
+    """
+
+    async with engine.connect() as conn:
+        current_version: int = (await conn.execute(text("PRAGMA user_version"))).scalar_one()
+
+    for migration in MIGRATIONS:
+        if migration.version <= current_version:
+            continue
+
+        logger.info(f"Applying database migration {migration.version}: {migration.description}")
+        await migration.upgrade(engine)
+
+        async with engine.begin() as conn:
+            await conn.execute(text(f"PRAGMA user_version = {migration.version}"))
@@ -4,3 +4,9 @@ from sqlalchemy.orm import DeclarativeBase
 
 class Base(AsyncAttrs, DeclarativeBase):
     pass
+
+
+# Delivery states of the reminder outbox rows.
+OUTBOX_PENDING = "pending"
+OUTBOX_CLAIMED = "claimed"
+OUTBOX_FAILED = "failed"
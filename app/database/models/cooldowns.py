@@ -0,0 +1,16 @@
+import datetime
+
+from sqlalchemy import DateTime, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database.models.base import Base
+
+
+class Cooldowns(Base):
+    __tablename__ = "Cooldowns"
+
+    Command: Mapped[str] = mapped_column(String, primary_key=True)
+    # user or guild ID
+    BucketKey: Mapped[int] = mapped_column(Integer, primary_key=True)
+    # UTC, when the bucket is full again
+    FullAt: Mapped[datetime.datetime] = mapped_column(DateTime, nullable=False, index=True)
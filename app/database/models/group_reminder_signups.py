@@ -0,0 +1,14 @@
+from sqlalchemy import ForeignKey, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database.models.base import Base
+
+
+class GroupReminderSignups(Base):
+    __tablename__ = "GroupReminderSignups"
+
+    ReminderID: Mapped[int] = mapped_column(
+        Integer, ForeignKey("GroupReminders.ReminderID"), primary_key=True
+    )
+    UserID: Mapped[int] = mapped_column(Integer, primary_key=True)
+    Emoji: Mapped[str] = mapped_column(String, primary_key=True)
@@ -1,15 +1,40 @@
-from sqlalchemy import Column, Integer, String
+import datetime
 
-from app.database.models.base import Base
+from sqlalchemy import Boolean, DateTime, Index, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database.models.base import OUTBOX_PENDING, Base
 
 
 class GroupReminders(Base):
     __tablename__ = "GroupReminders"
+    __table_args__ = (
+        # seeks the pages of an author's reminders listed in due date order
+        Index("ix_GroupReminders_AuthorID_RemindAt", "AuthorID", "RemindAt", "ReminderID"),
+        # IDs are never reused, so the scheduler can poll for new reminders by ID
+        {"sqlite_autoincrement": True},
+    )
 
-    ReminderID = Column(Integer, primary_key=True, autoincrement=True)
-    AuthorID = Column(Integer)
-    RemindDate = Column(String)
-    CreationDate = Column(String)
-    ChannelID = Column(Integer)
-    Message = Column(String)
-    SignupMessageID = Column(Integer)
+    ReminderID: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    AuthorID: Mapped[int] = mapped_column(Integer, nullable=True, index=True)
+    # legacy "%Y-%m-%d %H:%M" column, superseded by RemindAt
+    RemindDate: Mapped[str | None] = mapped_column(String)
+    RemindAt: Mapped[datetime.datetime] = mapped_column(DateTime, nullable=True, index=True)  # UTC
+    Status: Mapped[str] = mapped_column(String, server_default=OUTBOX_PENDING, nullable=False)
+    # UTC, set while the reminder is claimed for delivery
+    LeaseUntil: Mapped[datetime.datetime | None] = mapped_column(DateTime)
+    # UTC, set after a failed delivery attempt
+    NextAttemptAt: Mapped[datetime.datetime | None] = mapped_column(DateTime)
+    Attempts: Mapped[int] = mapped_column(Integer, server_default="0", nullable=False)
+    # interval or crontab rule, None for one-shot reminders
+    Recurrence: Mapped[str | None] = mapped_column(String)
+    # UTC, no occurrences after this date
+    RecurrenceEnd: Mapped[datetime.datetime | None] = mapped_column(DateTime)
+    # including the one at RemindAt, None if unlimited
+    RemainingOccurrences: Mapped[int | None] = mapped_column(Integer)
+    CreationDate: Mapped[str] = mapped_column(String, nullable=True)
+    ChannelID: Mapped[int] = mapped_column(Integer, nullable=True, index=True)
+    Message: Mapped[str] = mapped_column(String, nullable=True)
+    SignupMessageID: Mapped[int] = mapped_column(Integer, nullable=True, index=True)
+    # Whether signups are tracked in GroupReminderSignups, false for reminders created before.
+    SignupsTracked: Mapped[bool] = mapped_column(Boolean, server_default="0", nullable=False)
@@ -0,0 +1,14 @@
+import datetime
+
+from sqlalchemy import DateTime, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database.models.base import Base
+
+
+class Leases(Base):
+    __tablename__ = "Leases"
+
+    Name: Mapped[str] = mapped_column(String, primary_key=True)
+    Holder: Mapped[str] = mapped_column(String, nullable=False)
+    ExpiresAt: Mapped[datetime.datetime] = mapped_column(DateTime, nullable=False)
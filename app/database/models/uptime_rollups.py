@@ -0,0 +1,19 @@
+import datetime
+
+from sqlalchemy import DateTime, Float, ForeignKey, Integer
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database.models.base import Base
+
+
+class UptimeRollups(Base):
+    __tablename__ = "UptimeRollups"
+
+    URLID: Mapped[int] = mapped_column(Integer, ForeignKey("WatchedUrls.URLID"), primary_key=True)
+    # UTC, start of the hour
+    BucketStart: Mapped[datetime.datetime] = mapped_column(DateTime, primary_key=True)
+    Samples: Mapped[int] = mapped_column(Integer, nullable=False)
+    Failures: Mapped[int] = mapped_column(Integer, nullable=False)
+    # seconds, over successful samples
+    LatencySum: Mapped[float] = mapped_column(Float, nullable=False)
+    LatencyMax: Mapped[float] = mapped_column(Float, nullable=False)
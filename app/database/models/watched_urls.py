@@ -0,0 +1,15 @@
+from sqlalchemy import Boolean, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database.models.base import Base
+
+
+class WatchedUrls(Base):
+    __tablename__ = "WatchedUrls"
+
+    URLID: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    URL: Mapped[str] = mapped_column(String, unique=True, nullable=False)
+    AddedBy: Mapped[int] = mapped_column(Integer, nullable=True)
+    CreationDate: Mapped[str] = mapped_column(String, nullable=True)
+    # last alerted state, None until the first check
+    IsUp: Mapped[bool | None] = mapped_column(Boolean)
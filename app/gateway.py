@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any
+
+import discord
+
+
+@dataclass(frozen=True)
+class GatewayProfile:
+    """Intents and caching options passed to the client."""
+
+    intents: discord.Intents
+    member_cache_flags: discord.MemberCacheFlags
+    chunk_guilds_at_startup: bool
+    max_messages: int | None
+
+    def client_options(self) -> dict[str, Any]:
+        return {
+            "intents": self.intents,
+            "member_cache_flags": self.member_cache_flags,
+            "chunk_guilds_at_startup": self.chunk_guilds_at_startup,
+            "max_messages": self.max_messages,
+        }
+
+
+def _minimal_intents() -> discord.Intents:
+    intents = discord.Intents.none()
+    intents.guilds = True
+    intents.guild_messages = True
+    intents.dm_messages = True
+    intents.message_content = True
+    intents.guild_reactions = True
+    return intents
+
+
+def get_gateway_profile(name: str) -> GatewayProfile:
+    """Get the intents and caching options of a gateway profile.
+
+    The minimal profile only receives the events the bot handles: messages, reactions and
+    guilds with their channels. Members are neither requested nor cached, the authors of
+    messages and interactions are still available from the events themselves.
+
+    Args:
+        name (str): The profile name, "full" or "minimal".
+
+    Returns:
+        GatewayProfile: The profile.
+    """
+
+    if name == "full":
+        return GatewayProfile(
+            intents=discord.Intents.all(),
+            member_cache_flags=discord.MemberCacheFlags.all(),
+            chunk_guilds_at_startup=True,
+            max_messages=1000,
+        )
+
+    return GatewayProfile(
+        intents=_minimal_intents(),
+        member_cache_flags=discord.MemberCacheFlags.none(),
+        chunk_guilds_at_startup=False,
+        max_messages=200,
+    )
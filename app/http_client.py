@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass, field, replace
+import logging
+import time
+from types import SimpleNamespace
+from typing import Any
+
+import aiohttp
+
+from app.tracing import start_span
+
+logger = logging.getLogger(__name__)
+
+# Methods which servers use to reject a HEAD request, the probe falls back to GET then.
+HEAD_NOT_ALLOWED_STATUSES: frozenset[int] = frozenset((405, 501))
+DEFAULT_TIMEOUT = aiohttp.ClientTimeout(total=10, connect=5)
+
+
+@dataclass
+class ProbeTimings:
+    """Timing breakdown of a probe in seconds, None when a phase didn't happen.
+
+    DNS and connect are skipped when a pooled connection is reused, connect includes the
+    TLS handshake since aiohttp doesn't report it separately.
+    """
+
+    dns: float | None = None
+    connect: float | None = None
+    ttfb: float | None = None
+    total: float | None = None
+
+
+@dataclass(frozen=True)
+class ProbeResult:
+    url: str
+    method: str
+    status: int | None
+    timings: ProbeTimings
+    checked_at: float  # time.monotonic() of the probe
+    error: str | None = None
+    cached: bool = False
+
+    @property
+    def age(self) -> float:
+        """Number of seconds since the probe was made."""
+
+        return time.monotonic() - self.checked_at
+
+
+@dataclass
+class _TraceContext:
+    started: dict[str, float] = field(default_factory=dict)
+    timings: ProbeTimings = field(default_factory=ProbeTimings)
+
+
+def _phase_start(phase: str) -> Any:
+    async def on_start(
+        session: aiohttp.ClientSession, context: SimpleNamespace, params: Any
+    ) -> None:
+        context.trace_request_ctx.started[phase] = time.perf_counter()
+
+    return on_start
+
+
+def _phase_end(phase: str) -> Any:
+    async def on_end(
+        session: aiohttp.ClientSession, context: SimpleNamespace, params: Any
+    ) -> None:
+        trace: _TraceContext = context.trace_request_ctx
+        started = trace.started.get(phase)
+        if started is not None:
+            setattr(trace.timings, phase, time.perf_counter() - started)
+
+    return on_end
+
+
+def create_trace_config() -> aiohttp.TraceConfig:
+    """Create a trace config which measures the phases of a request into a _TraceContext.
+
+    Returns:
+        aiohttp.TraceConfig: the trace config to pass to the client session.
+    """
+
+    trace_config = aiohttp.TraceConfig(trace_config_ctx_factory=SimpleNamespace)
+    trace_config.on_request_start.append(_phase_start("ttfb"))
+    trace_config.on_request_end.append(_phase_end("ttfb"))
+    trace_config.on_dns_resolvehost_start.append(_phase_start("dns"))
+    trace_config.on_dns_resolvehost_end.append(_phase_end("dns"))
+    trace_config.on_connection_create_start.append(_phase_start("connect"))
+    trace_config.on_connection_create_end.append(_phase_end("connect"))
+    return trace_config
+
+
+class HttpClient:
+    """Bot-wide pooled HTTP client used to probe websites.
+
+    The client keeps one session with a connection pool and a DNS cache, probes with HEAD
+    before falling back to GET, and caches probe results for a short time, so repeated
+    probes of the same URL, e.g. during an outage, share one request.
+    """
+
+    def __init__(
+        self,
+        cache_ttl: float = 30.0,
+        timeout: aiohttp.ClientTimeout = DEFAULT_TIMEOUT,
+        dns_cache_ttl: int = 300,
+        connection_limit: int = 50,
+    ) -> None:
+        self._cache_ttl = cache_ttl
+        self._timeout = timeout
+        self._dns_cache_ttl = dns_cache_ttl
+        self._connection_limit = connection_limit
+        self._session: aiohttp.ClientSession | None = None
+        self._cache: dict[str, ProbeResult] = {}
+        self._in_flight: dict[str, asyncio.Task[ProbeResult]] = {}
+
+    async def start(self) -> None:
+        """Create the underlying client session."""
+
+        connector = aiohttp.TCPConnector(
+            limit=self._connection_limit, ttl_dns_cache=self._dns_cache_ttl
+        )
+        self._session = aiohttp.ClientSession(
+            connector=connector, timeout=self._timeout, trace_configs=[create_trace_config()]
+        )
+
+    async def close(self) -> None:
+        """Close the underlying client session."""
+
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None:
+            raise RuntimeError("The HTTP client is not started")
+
+        return self._session
+
+    async def probe(self, url: str, fresh: bool = False) -> ProbeResult:
+        """Check whether an URL responds, reusing a recent result if there is one.
+
+        Args:
+            url (str): The URL to probe.
+            fresh (bool, optional): Whether to ignore cached results. Defaults to False.
+
+        Returns:
+            ProbeResult: The status and the timing breakdown of the probe.
+        """
+
+        cached = self._cache.get(url)
+        if not fresh and cached is not None and cached.age < self._cache_ttl:
+            return replace(cached, cached=True)
+
+        task = self._in_flight.get(url)
+        if task is None:
+            task = asyncio.create_task(self._probe(url))
+            self._in_flight[url] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(url, None))
+
+        return await asyncio.shield(task)
+
+    async def _probe(self, url: str) -> ProbeResult:
+        started = time.perf_counter()
+        method = "HEAD"
+        status: int | None = None
+        error: str | None = None
+        trace = _TraceContext()
+        probe_span = start_span("http.probe", url=url)
+
+        try:
+            status = await self._request(method, url, trace)
+            if status in HEAD_NOT_ALLOWED_STATUSES:
+                method = "GET"
+                status = await self._request(method, url, trace)
+        except asyncio.TimeoutError:
+            error = f"timed out after {self._timeout.total} seconds"
+        except aiohttp.ClientError as client_error:
+            error = str(client_error) or type(client_error).__name__
+
+        trace.timings.total = time.perf_counter() - started
+        result = ProbeResult(
+            url=url,
+            method=method,
+            status=status if error is None else None,
+            timings=trace.timings,
+            checked_at=time.monotonic(),
+            error=error,
+        )
+
+        if probe_span is not None:
+            probe_span.attributes.update(method=method, status=result.status, error=error)
+            probe_span.end()
+
+        self._cache[url] = result
+        self._evict_expired()
+        return result
+
+    async def _request(self, method: str, url: str, trace: _TraceContext) -> int:
+        async with self.session.request(method, url, trace_request_ctx=trace) as response:
+            return response.status
+
+    def _evict_expired(self) -> None:
+        expired = [url for url, result in self._cache.items() if result.age >= self._cache_ttl]
+        for url in expired:
+            del self._cache[url]
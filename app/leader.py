@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import asyncio
+import datetime
+import logging
+import os
+import socket
+import time
+from typing import Awaitable, Callable
+
+from sqlalchemy import delete, or_
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.database.models.leases import Leases
+
+logger = logging.getLogger(__name__)
+
+LeadershipCallback = Callable[[], Awaitable[None]]
+
+
+class LeaderElection:
+    """Elects one process among those sharing the database, using a lease row.
+
+    The leader renews its lease every `renew_interval` and the other processes try to take
+    it over, which succeeds once the lease is not renewed for `ttl`, e.g. because the leader
+    died. A leader which shuts down releases the lease, so another process takes over on its
+    next attempt.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        on_elected: LeadershipCallback,
+        on_demoted: LeadershipCallback,
+        ttl: datetime.timedelta = datetime.timedelta(seconds=15),
+        renew_interval: float = 5.0,
+    ) -> None:
+        self._session: async_sessionmaker[AsyncSession] | None = None
+        self._name = name
+        self._on_elected = on_elected
+        self._on_demoted = on_demoted
+        self._ttl = ttl
+        self._renew_interval = renew_interval
+        self.holder: str = f"{socket.gethostname()}:{os.getpid()}:{os.urandom(4).hex()}"
+        self.is_leader: bool = False
+        # time.monotonic() at which the lease held by this process expires
+        self._expires: float = 0.0
+        self._task: asyncio.Task[None] | None = None
+
+    def start(self, session: async_sessionmaker[AsyncSession]) -> None:
+        """Start taking part in the election.
+
+        Args:
+            session (async_sessionmaker[AsyncSession]): The database session factory.
+        """
+
+        self._session = session
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name=f"leader-election-{self._name}")
+
+    async def stop(self) -> None:
+        """Stop taking part in the election, releasing the lease if it's held."""
+
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        if self.is_leader:
+            assert self._session is not None
+            await self._set_leader(False)
+            async with self._session() as session:
+                await session.execute(
+                    delete(Leases).where(Leases.Name == self._name, Leases.Holder == self.holder)
+                )
+                await session.commit()
+
+    async def try_acquire(self) -> bool:
+        """Acquire or renew the lease if it's held by this process, expired or released.
+
+        Returns:
+            bool: Whether this process holds the lease.
+        """
+
+        now = datetime.datetime.utcnow()
+        statement = insert(Leases).values(
+            Name=self._name, Holder=self.holder, ExpiresAt=now + self._ttl
+        )
+        acquire = statement.on_conflict_do_update(
+            index_elements=[Leases.Name],
+            set_={"Holder": statement.excluded.Holder, "ExpiresAt": statement.excluded.ExpiresAt},
+            where=or_(Leases.Holder == self.holder, Leases.ExpiresAt < now),
+        ).returning(Leases.Holder)
+
+        assert self._session is not None
+        started = time.monotonic()
+        async with self._session() as session:
+            holder = (await session.execute(acquire)).scalar_one_or_none()
+            await session.commit()
+
+        if holder == self.holder:
+            self._expires = started + self._ttl.total_seconds()
+            return True
+
+        return False
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                acquired = await self.try_acquire()
+            except Exception:
+                logger.exception(f"Failed to renew the {self._name} lease")
+                # keep leading until the lease could have been taken over by another process
+                acquired = self.is_leader and time.monotonic() < self._expires
+
+            if acquired != self.is_leader:
+                await self._set_leader(acquired)
+
+            await asyncio.sleep(self._renew_interval)
+
+    async def _set_leader(self, is_leader: bool) -> None:
+        self.is_leader = is_leader
+        logger.info(
+            f"{self.holder} {'became' if is_leader else 'is no longer'} the {self._name} leader"
+        )
+
+        callback = self._on_elected if is_leader else self._on_demoted
+        try:
+            await callback()
+        except Exception:
+            logger.exception(f"Failed to handle the change of the {self._name} leadership")
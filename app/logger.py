@@ -1,10 +1,76 @@
 import datetime
+import gzip
 import logging
+import logging.handlers
+import os
 import pathlib
+import queue
+import shutil
 
-import discord
+from app.config import get_settings
 
-from app.config import get_data_path, get_logging_path
+LEVEL_MAPPING: dict[str, int] = {
+    "DEBUG": logging.DEBUG,
+    "INFO": logging.INFO,
+    "WARNING": logging.WARNING,
+    "ERROR": logging.ERROR,
+    "CRITICAL": logging.CRITICAL,
+}
+
+LOG_FILE_NAME = "bot.log"
+
+_listener: logging.handlers.QueueListener | None = None
+
+
+class CompressingRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """File handler which rotates daily or when the file grows too big.
+
+    Rotated files are renamed with a timestamp and gzip-compressed, and only the newest
+    `backup_count` of them are kept.
+    """
+
+    def __init__(self, filename: str, max_bytes: int, backup_count: int) -> None:
+        super().__init__(
+            filename,
+            mode="a",
+            maxBytes=max_bytes,
+            backupCount=backup_count,
+            encoding="utf-8",
+            delay=True,
+        )
+        self._opened_on = self._last_write_date()
+
+    def _last_write_date(self) -> datetime.date:
+        try:
+            return datetime.date.fromtimestamp(os.path.getmtime(self.baseFilename))
+        except OSError:
+            return datetime.date.today()
+
+    def shouldRollover(self, record: logging.LogRecord) -> int:
+        if datetime.date.today() != self._opened_on and os.path.exists(self.baseFilename):
+            return 1
+
+        return super().shouldRollover(record)
+
+    def doRollover(self) -> None:
+        if self.stream:
+            self.stream.close()
+            self.stream = None  # type: ignore
+
+        timestamp = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S-%f")
+        rotated = f"{self.baseFilename}.{timestamp}.gz"
+
+        if os.path.exists(self.baseFilename):
+            with open(self.baseFilename, "rb") as source, gzip.open(rotated, "wb") as target:
+                shutil.copyfileobj(source, target)
+            os.remove(self.baseFilename)
+
+        base = pathlib.Path(self.baseFilename)
+        backups = sorted(base.parent.glob(f"{base.name}.*.gz"))
+        for backup in backups[: -self.backupCount or None]:
+            backup.unlink()
+
+        self._opened_on = datetime.date.today()
 
 
 async def create_logs_directory(path: str) -> None:
@@ -14,34 +80,69 @@ async def create_logs_directory(path: str) -> None:
         path (str): path to the logs directory
     """
 
-    if not pathlib.Path(get_data_path()).exists():
-        pathlib.Path(get_data_path()).mkdir()
+    data_path = get_settings().data_path
+    if not pathlib.Path(data_path).exists():
+        pathlib.Path(data_path).mkdir()
 
     if not pathlib.Path(path).exists():
         pathlib.Path(path).mkdir()
 
 
-async def setup_logging(level: str) -> None:
-    """Creates logs directory and setups logging inside discord library
+async def setup_logging(level: str, file_name: str = LOG_FILE_NAME) -> None:
+    """Creates logs directory and setups a queue-based logging pipeline
+
+    Records are put on a queue by the logging calls and written to the log files and the
+    console by a listener thread, so that I/O never blocks the event loop.
 
     Args:
         level (str): logging level
+        file_name (str, optional): name of the log file, unique for every process
     """
 
-    level_mapping = {
-        "DEBUG": logging.DEBUG,
-        "INFO": logging.INFO,
-        "WARNING": logging.WARNING,
-        "ERROR": logging.ERROR,
-        "CRITICAL": logging.CRITICAL,
-    }
+    global _listener
 
-    logging_level = level_mapping[level]
+    logging_level = LEVEL_MAPPING[level]
 
-    await create_logs_directory(get_logging_path())
-    handler = get_handler()
+    await create_logs_directory(get_settings().logging_path)
     formatter = get_formatter()
-    discord.utils.setup_logging(handler=handler, formatter=formatter, level=logging_level)
+    file_handler = get_handler(file_name)
+    file_handler.setFormatter(formatter)
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(formatter)
+
+    log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(
+        log_queue, file_handler, console_handler, respect_handler_level=True
+    )
+    _listener.start()
+
+    root_logger = logging.getLogger()
+    root_logger.setLevel(logging_level)
+    root_logger.addHandler(logging.handlers.QueueHandler(log_queue))
+
+    logging.getLogger("sqlalchemy.engine").setLevel(
+        LEVEL_MAPPING[get_settings().sql_logging_level]
+    )
+
+
+def set_logging_level(level: str) -> None:
+    """Changes the logging level of the running logging pipeline
+
+    Args:
+        level (str): logging level
+    """
+
+    logging.getLogger().setLevel(LEVEL_MAPPING[level])
+
+
+def stop_logging() -> None:
+    """Flushes the queued log records and stops the listener thread."""
+
+    global _listener
+
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
 
 
 def get_formatter() -> logging.Formatter:
@@ -58,17 +159,20 @@ def get_formatter() -> logging.Formatter:
     return formatter
 
 
-def get_handler() -> logging.Handler:
-    """Returns logging handler which manages the output of logging information
+def get_handler(file_name: str = LOG_FILE_NAME) -> logging.Handler:
+    """Returns logging handler which writes the logging information to rotated files
+
+    Args:
+        file_name (str, optional): name of the log file
 
     Returns:
         logging.Handler: a logging handler object.
     """
 
-    logs_path = get_logging_path()
-    handler = logging.FileHandler(
-        filename=f"{logs_path}/{datetime.datetime.utcnow()}.log",
-        encoding="utf-8",
-        mode="w",
+    settings = get_settings()
+    handler = CompressingRotatingFileHandler(
+        filename=f"{settings.logging_path}/{file_name}",
+        max_bytes=settings.log_max_bytes,
+        backup_count=settings.log_backup_count,
     )
     return handler
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, fields
+import logging
+from typing import Collection, NamedTuple
+
+import discord
+
+from app.message_responses.responders import ResponderEngine
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class MessageFilterStats:
+    received: int = 0
+    bots: int = 0
+    webhooks: int = 0
+    no_candidate: int = 0
+    responders_dispatched: int = 0
+    commands_dispatched: int = 0
+
+    @property
+    def short_circuited(self) -> int:
+        """Number of messages which weren't passed to the responders nor the command parser."""
+
+        return self.bots + self.webhooks + self.no_candidate
+
+    def as_dict(self) -> dict[str, int]:
+        return {field.name: getattr(self, field.name) for field in fields(self)} | {
+            "short_circuited": self.short_circuited
+        }
+
+
+class FilterDecision(NamedTuple):
+    run_responders: bool
+    run_commands: bool
+
+
+class MessageFilter:
+    """Cheap pre-filter deciding which message handlers could apply to a message.
+
+    Bot and webhook messages are dropped, responders only run in enabled guilds and
+    channels for messages long enough to contain a trigger, and the command parser only
+    runs for messages starting with the command prefix or a mention.
+    """
+
+    def __init__(
+        self,
+        command_prefix: str,
+        responder_engine: ResponderEngine,
+        disabled_guilds: Collection[int] = (),
+        disabled_channels: Collection[int] = (),
+    ) -> None:
+        self._command_prefixes: tuple[str, ...] = (command_prefix, "<@")
+        self._responder_engine = responder_engine
+        self._disabled_guilds: frozenset[int] = frozenset(disabled_guilds)
+        self._disabled_channels: frozenset[int] = frozenset(disabled_channels)
+        self.stats = MessageFilterStats()
+
+    def set_disabled(
+        self, disabled_guilds: Collection[int], disabled_channels: Collection[int]
+    ) -> None:
+        """Replace the guilds and channels in which the responders are disabled.
+
+        Args:
+            disabled_guilds (Collection[int]): IDs of the guilds without responders.
+            disabled_channels (Collection[int]): IDs of the channels without responders.
+        """
+
+        self._disabled_guilds = frozenset(disabled_guilds)
+        self._disabled_channels = frozenset(disabled_channels)
+
+    def responders_enabled(self, message: discord.Message) -> bool:
+        """Check whether responders are enabled in the guild and channel of a message.
+
+        Args:
+            message (discord.Message): The message to check.
+
+        Returns:
+            bool: Whether the responders may handle the message.
+        """
+
+        if message.guild is not None and message.guild.id in self._disabled_guilds:
+            return False
+
+        if message.channel.id in self._disabled_channels:
+            return False
+
+        parent_id: int | None = getattr(message.channel, "parent_id", None)
+        return parent_id not in self._disabled_channels
+
+    def check(self, message: discord.Message) -> FilterDecision:
+        """Decide which handlers should process a message, updating the counters.
+
+        Args:
+            message (discord.Message): The received message.
+
+        Returns:
+            FilterDecision: Whether to run the responders and the command parser.
+        """
+
+        self.stats.received += 1
+
+        if message.webhook_id is not None:
+            self.stats.webhooks += 1
+            return FilterDecision(False, False)
+
+        if message.author.bot:
+            self.stats.bots += 1
+            return FilterDecision(False, False)
+
+        content = message.content
+        run_commands = content.startswith(self._command_prefixes)
+        long_enough = len(content) >= self._responder_engine.min_length
+        run_responders = long_enough and self.responders_enabled(message)
+
+        if not run_commands and not run_responders:
+            self.stats.no_candidate += 1
+
+        self.stats.responders_dispatched += run_responders
+        self.stats.commands_dispatched += run_commands
+
+        return FilterDecision(run_responders, run_commands)
@@ -1,60 +1,179 @@
 from __future__ import annotations
 
+import abc
+from dataclasses import dataclass
+import enum
 import logging
-from typing import Sequence
+import re
+from typing import Any, Sequence
 
 import discord
 
-logger = logging.getLogger(__name__)
+from app.metrics import RESPONDER_HITS
 
+logger = logging.getLogger(__name__)
 
-class BaseMessageResponder:
-    def __init__(self) -> None:
-        self._next_responder: BaseMessageResponder | None = None
 
-    async def set_next_responder(self, responder: BaseMessageResponder) -> BaseMessageResponder:
-        """Set the next responder in the chain.
-        The next responder will be called if the current responder doesn't handle the message.
+class TriggerType(enum.Enum):
+    EXACT = "exact"
+    SUFFIX = "suffix"
+    CONTAINS = "contains"
 
-        Args:
-            responder (BaseMessageResponder): The next responder in the chain.
 
-        Returns:
-            BaseMessageResponder: The next responder in the chain passed as an argument.
-        """
+@dataclass(frozen=True)
+class Trigger:
+    type: TriggerType
+    text: str
 
-        self._next_responder = responder
-        return responder
 
-    async def get_response(self, message: discord.Message) -> None:
-        """Default implementation of the get_response method.
+class BaseMessageResponder(abc.ABC):
+    triggers: Sequence[Trigger] = ()
 
-        Calls the next responder in the chain if it exists.
+    @abc.abstractmethod
+    async def respond(self, message: discord.Message) -> None:
+        """Respond to a message which matched one of the responder's triggers.
 
         Args:
             message (discord.Message): a discord message object
         """
 
-        if self._next_responder:
-            await self._next_responder.get_response(message)
-
 
 class PolishBotQuestionResponder(BaseMessageResponder):
-    async def get_response(self, message: discord.Message) -> None:
-        if message.content == "bocie?" or message.content.endswith(" bocie?"):
-            await message.channel.send(
-                f"{message.content.removesuffix('bocie?').strip()} {message.author.name}"
-            )
-        else:
-            await super().get_response(message)
+    triggers = (
+        Trigger(TriggerType.EXACT, "bocie?"),
+        Trigger(TriggerType.SUFFIX, " bocie?"),
+    )
+
+    async def respond(self, message: discord.Message) -> None:
+        await message.channel.send(
+            f"{message.content.removesuffix('bocie?').strip()} {message.author.name}"
+        )
 
 
 class WhoAskedPolishResponder(BaseMessageResponder):
-    async def get_response(self, message: discord.Message) -> None:
-        if "kto pytal" in message.content or "kto pytał" in message.content:
-            await message.channel.send(f"<@{message.author.id}> ja pytalem!")
-        else:
-            await super().get_response(message)
+    triggers = (
+        Trigger(TriggerType.CONTAINS, "kto pytal"),
+        Trigger(TriggerType.CONTAINS, "kto pytał"),
+    )
+
+    async def respond(self, message: discord.Message) -> None:
+        await message.channel.send(f"<@{message.author.id}> ja pytalem!")
+
+
+class ResponderEngine:
+    """Dispatches messages to responders using lookup tables and a single precompiled regex.
+
+    EXACT triggers are looked up by the whole message content and SUFFIX triggers by the
+    message's suffix of every distinct trigger length, so their cost doesn't grow with
+    their number. CONTAINS triggers are compiled once into one alternation of named groups,
+    tried as a lookahead at every position of the message, so a message is scanned once
+    from left to right instead of once per trigger, though every position still tries each
+    CONTAINS trigger in turn. The first responder in the given order whose trigger matches
+    handles the message, like in a chain of responsibility.
+    """
+
+    def __init__(self, responders: Sequence[BaseMessageResponder]) -> None:
+        self._responders: dict[str, BaseMessageResponder] = {}
+        # position of every trigger group in the responder order, lower wins
+        self._priorities: dict[str, int] = {}
+        self._hits: dict[str, Any] = {}
+        # message content -> group of the first EXACT trigger with that text
+        self._exact: dict[str, str] = {}
+        # suffix length -> suffix -> group of the first SUFFIX trigger with that text
+        self._suffixes: dict[int, dict[str, str]] = {}
+        alternatives: list[str] = []
+        # shortest message content which can match any trigger, used as a cheap pre-filter
+        self.min_length: int = min(
+            (len(trigger.text) for responder in responders for trigger in responder.triggers),
+            default=0,
+        )
+
+        for responder in responders:
+            for trigger in responder.triggers:
+                group = f"t{len(self._priorities)}"
+                self._responders[group] = responder
+                self._priorities[group] = len(self._priorities)
+                self._hits[group] = RESPONDER_HITS.labels(type(responder).__name__)
+
+                match trigger.type:
+                    case TriggerType.EXACT:
+                        self._exact.setdefault(trigger.text, group)
+                    case TriggerType.SUFFIX:
+                        suffixes = self._suffixes.setdefault(len(trigger.text), {})
+                        suffixes.setdefault(trigger.text, group)
+                    case TriggerType.CONTAINS:
+                        alternatives.append(rf"(?P<{group}>{re.escape(trigger.text)})")
+
+        # the lookahead doesn't consume the matched trigger, so overlapping triggers are found
+        self._pattern: re.Pattern[str] | None = (
+            re.compile(rf"(?=(?:{'|'.join(alternatives)}))") if alternatives else None
+        )
+        # a match of a trigger with a lower priority makes searching the CONTAINS ones useless
+        self._first_contains_priority: int = min(
+            (self._priorities[group] for group in self._pattern.groupindex)
+            if self._pattern is not None
+            else (),
+            default=len(self._priorities),
+        )
+
+    def _match_group(self, content: str) -> str | None:
+        candidates: list[str] = []
+
+        if (group := self._exact.get(content)) is not None:
+            candidates.append(group)
+
+        for length, suffixes in self._suffixes.items():
+            if length <= len(content):
+                if (group := suffixes.get(content[len(content) - length :])) is not None:
+                    candidates.append(group)
+
+        best = min(candidates, key=self._priorities.__getitem__, default=None)
+        if self._pattern is None or self._beats_contains(best):
+            return best
+
+        for match in self._pattern.finditer(content):
+            group = match.lastgroup
+            assert group is not None
+            if best is None or self._priorities[group] < self._priorities[best]:
+                best = group
+            if self._beats_contains(best):
+                break
+
+        return best
+
+    def _beats_contains(self, group: str | None) -> bool:
+        return group is not None and self._priorities[group] <= self._first_contains_priority
+
+    def match(self, content: str) -> BaseMessageResponder | None:
+        """Find the responder which should handle a message.
+
+        Args:
+            content (str): The content of the message.
+
+        Returns:
+            BaseMessageResponder | None: The matching responder, if any.
+        """
+
+        group = self._match_group(content)
+        return self._responders[group] if group is not None else None
+
+    async def handle(self, message: discord.Message) -> bool:
+        """Respond to a message with the matching responder.
+
+        Args:
+            message (discord.Message): The message to handle.
+
+        Returns:
+            bool: Whether any responder handled the message.
+        """
+
+        group = self._match_group(message.content)
+        if group is None:
+            return False
+
+        self._hits[group].inc()
+        await self._responders[group].respond(message)
+        return True
 
 
 RESPONDERS: Sequence[BaseMessageResponder] = (
@@ -62,18 +181,14 @@ RESPONDERS: Sequence[BaseMessageResponder] = (
     WhoAskedPolishResponder(),
 )
 
+RESPONDER_ENGINE = ResponderEngine(RESPONDERS)
+
 
 async def handle_responses(message: discord.Message) -> None:
-    """Handle responses to messages by calling the responders chain.
+    """Handle responses to messages with the precompiled responder engine.
 
     Args:
         message (discord.Message): The message to handle.
     """
 
-    first_responder = RESPONDERS[0]
-
-    current_responder = first_responder
-    for responder in RESPONDERS[1:]:
-        current_responder = await current_responder.set_next_responder(responder)
-
-    await first_responder.get_response(message)
+    await RESPONDER_ENGINE.handle(message)
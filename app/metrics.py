@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import time
+from typing import TYPE_CHECKING, Any
+
+import discord
+from prometheus_client import Counter, Gauge, Histogram, start_http_server
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+if TYPE_CHECKING:
+    from app.bot import Bot
+
+logger = logging.getLogger(__name__)
+
+APP_COMMAND_SECONDS = Histogram(
+    "ksibot_app_command_seconds",
+    "Time from the creation of an interaction to the completion of its app command.",
+    ["command"],
+)
+ON_MESSAGE_SECONDS = Histogram(
+    "ksibot_on_message_seconds",
+    "Time spent handling a message in Bot.on_message.",
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0),
+)
+RESPONDER_HITS = Counter(
+    "ksibot_responder_hits_total", "Messages handled by a responder.", ["responder"]
+)
+REMINDER_LATENESS_SECONDS = Histogram(
+    "ksibot_reminder_lateness_seconds",
+    "Time between the due time of a reminder and the moment its message was sent.",
+    ["destination"],
+    buckets=(0.1, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0),
+)
+REMINDER_DELIVERY_FAILURES = Counter(
+    "ksibot_reminder_delivery_failures_total",
+    "Reminder messages which failed to be sent.",
+    ["destination"],
+)
+REMINDER_SENDS_SAVED = Counter(
+    "ksibot_reminder_sends_saved_total",
+    "Reminder messages joined into another message sent to the same destination.",
+)
+REMINDERS_DIGESTED = Counter(
+    "ksibot_reminders_digested_total",
+    "Overdue reminder messages condensed into a digest message instead of being sent in full.",
+)
+DESTINATION_LOOKUPS = Counter(
+    "ksibot_destination_lookups_total",
+    "Resolutions of reminder destinations by outcome: cache hit, miss, or joined to a"
+    " resolution in flight.",
+    ["outcome"],
+)
+DB_QUERY_SECONDS = Histogram(
+    "ksibot_db_query_seconds",
+    "Duration of the SQL statements executed by the database engine.",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+GATEWAY_LATENCY_SECONDS = Gauge(
+    "ksibot_gateway_latency_seconds", "Latency between a gateway heartbeat and its ack."
+)
+CACHE_SIZE = Gauge("ksibot_cache_size", "Number of objects in the bot's caches.", ["cache"])
+MESSAGES = Gauge("ksibot_messages", "Messages seen by the message filter.", ["outcome"])
+
+# Children for label values known upfront, bound once so hot paths don't look them up.
+REMINDER_LATENESS_BY_DESTINATION = {
+    destination: REMINDER_LATENESS_SECONDS.labels(destination)
+    for destination in ("channel", "user")
+}
+REMINDER_FAILURES_BY_DESTINATION = {
+    destination: REMINDER_DELIVERY_FAILURES.labels(destination)
+    for destination in ("channel", "user")
+}
+
+DESTINATION_LOOKUPS_BY_OUTCOME = {
+    outcome: DESTINATION_LOOKUPS.labels(outcome) for outcome in ("hit", "miss", "coalesced")
+}
+
+_app_command_children: dict[str, Any] = {}
+
+
+def observe_app_command(interaction: discord.Interaction, command_name: str) -> None:
+    """Record the latency of a completed app command.
+
+    Args:
+        interaction (discord.Interaction): The interaction of the command.
+        command_name (str): The qualified name of the command.
+    """
+
+    child = _app_command_children.get(command_name)
+    if child is None:
+        child = _app_command_children[command_name] = APP_COMMAND_SECONDS.labels(command_name)
+
+    latency = discord.utils.utcnow() - interaction.created_at
+    child.observe(latency.total_seconds())
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """Record the duration of every SQL statement executed by an engine, including failed ones.
+
+    Args:
+        engine (AsyncEngine): The database engine.
+    """
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn: Any, *args: Any) -> None:
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn: Any, *args: Any) -> None:
+        DB_QUERY_SECONDS.observe(time.perf_counter() - conn.info["query_started"].pop())
+
+    @event.listens_for(engine.sync_engine, "handle_error")
+    def handle_error(context: Any) -> None:
+        # after_cursor_execute doesn't run for failed statements
+        started = context.connection.info.get("query_started") if context.connection else None
+        if started:
+            DB_QUERY_SECONDS.observe(time.perf_counter() - started.pop())
+
+
+class BotMetrics:
+    """Updates the gauges of the gateway latency, cache sizes and message filter counters.
+
+    The bot's caches are only safe to iterate on the event loop, which changes them, so the
+    gauges are set every `interval` seconds by a task instead of being read by the metrics
+    server thread when scraped.
+    """
+
+    def __init__(self, bot: Bot, interval: float = 15.0) -> None:
+        self._bot = bot
+        self._interval = interval
+        self._task: asyncio.Task[None] | None = None
+
+    def update(self) -> None:
+        """Set the gauges to the current values."""
+
+        bot = self._bot
+        GATEWAY_LATENCY_SECONDS.set(0 if math.isnan(bot.latency) else bot.latency)
+
+        CACHE_SIZE.labels("guilds").set(len(bot.guilds))
+        CACHE_SIZE.labels("users").set(len(bot.users))
+        CACHE_SIZE.labels("members").set(sum(len(guild.members) for guild in bot.guilds))
+        CACHE_SIZE.labels("messages").set(len(bot.cached_messages))
+        CACHE_SIZE.labels("scheduled_reminders").set(len(bot.reminder_scheduler))
+        CACHE_SIZE.labels("reminder_destinations").set(len(bot.reminder_delivery.resolver))
+        CACHE_SIZE.labels("cooldowns").set(len(bot.cooldowns))
+
+        for outcome, count in bot.message_filter.stats.as_dict().items():
+            MESSAGES.labels(outcome).set(count)
+
+    def start(self) -> None:
+        """Start updating the gauges."""
+
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="bot-metrics")
+
+    async def stop(self) -> None:
+        """Stop updating the gauges."""
+
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                self.update()
+            except Exception:
+                logger.exception("Failed to update the bot metrics")
+
+            await asyncio.sleep(self._interval)
+
+
+def start_metrics_server(port: int, address: str = "127.0.0.1") -> None:
+    """Start the HTTP server exposing the metrics in the Prometheus format.
+
+    Args:
+        port (int): The port to listen on.
+        address (str, optional): The address to bind to. Defaults to localhost only.
+    """
+
+    start_http_server(port, addr=address)
+    logger.info(f"Metrics are exposed on http://{address}:{port}/metrics")
@@ -0,0 +1,272 @@
+from __future__ import annotations
+
+import datetime
+import functools
+import re
+from typing import Callable
+
+import zoneinfo
+
+DATE_FORMAT = "%Y-%m-%d %H:%M"
+# Time of day of reminders given only a day, e.g. "tomorrow".
+DEFAULT_TIME = datetime.time(9, 0)
+
+RELATIVE_UNITS: dict[str, datetime.timedelta] = {
+    "m": datetime.timedelta(minutes=1),
+    "min": datetime.timedelta(minutes=1),
+    "mins": datetime.timedelta(minutes=1),
+    "minute": datetime.timedelta(minutes=1),
+    "minutes": datetime.timedelta(minutes=1),
+    "h": datetime.timedelta(hours=1),
+    "hour": datetime.timedelta(hours=1),
+    "hours": datetime.timedelta(hours=1),
+    "d": datetime.timedelta(days=1),
+    "day": datetime.timedelta(days=1),
+    "days": datetime.timedelta(days=1),
+    "w": datetime.timedelta(weeks=1),
+    "week": datetime.timedelta(weeks=1),
+    "weeks": datetime.timedelta(weeks=1),
+}
+
+WEEKDAYS: dict[str, int] = {
+    name: weekday
+    for weekday, names in enumerate(
+        (
+            ("mon", "monday"),
+            ("tue", "tues", "tuesday"),
+            ("wed", "wednesday"),
+            ("thu", "thur", "thurs", "thursday"),
+            ("fri", "friday"),
+            ("sat", "saturday"),
+            ("sun", "sunday"),
+        )
+    )
+    for name in names
+}
+
+_UTC_PATTERN = re.compile(r"(\d{4})-(\d{1,2})-(\d{1,2})[ t](\d{1,2}):(\d{2})(?: ?utc)?")
+_RELATIVE_PATTERN = re.compile(
+    r"in ((?:\d+ ?(?:" + "|".join(sorted(RELATIVE_UNITS, key=len, reverse=True)) + r") ?)+)"
+)
+_RELATIVE_PART_PATTERN = re.compile(r"(\d+) ?([a-z]+)")
+_TIME = r"(?:(?:at )?(\d{1,2})(?::(\d{2}))?)"
+_DAY_PATTERN = re.compile(
+    r"(today|tomorrow|(next )?(" + "|".join(WEEKDAYS) + r"))(?: " + _TIME + r")?"
+)
+_TIME_PATTERN = re.compile(r"(?:at )?(\d{1,2}):(\d{2})")
+_LOCAL_DATE_PATTERN = re.compile(r"(\d{1,2})\.(\d{1,2})(?:\.(\d{4}))?(?: " + _TIME + r")?")
+
+
+class InvalidReminderDate(ValueError):
+    pass
+
+
+@functools.lru_cache(maxsize=8)
+def get_zone(timezone: str) -> zoneinfo.ZoneInfo:
+    return zoneinfo.ZoneInfo(timezone)
+
+
+@functools.lru_cache(maxsize=1024)
+def to_utc(local: datetime.datetime, timezone: str) -> datetime.datetime:
+    """Convert a naive local time of a timezone to a naive UTC time.
+
+    Args:
+        local (datetime.datetime): The local time.
+        timezone (str): The IANA name of the timezone.
+
+    Returns:
+        datetime.datetime: The time in UTC.
+    """
+
+    aware = local.replace(tzinfo=get_zone(timezone))
+    return aware.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+
+
+def to_local(utc: datetime.datetime, timezone: str) -> datetime.datetime:
+    """Convert a naive UTC time to a naive local time of a timezone.
+
+    Args:
+        utc (datetime.datetime): The time in UTC.
+        timezone (str): The IANA name of the timezone.
+
+    Returns:
+        datetime.datetime: The local time.
+    """
+
+    aware = utc.replace(tzinfo=datetime.timezone.utc)
+    return aware.astimezone(get_zone(timezone)).replace(tzinfo=None)
+
+
+def _time_of_day(hour: str | None, minute: str | None) -> datetime.time:
+    if hour is None:
+        return DEFAULT_TIME
+
+    try:
+        return datetime.time(int(hour), int(minute or 0))
+    except ValueError as error:
+        raise InvalidReminderDate("Invalid time of day.") from error
+
+
+def _next_at(
+    local_now: datetime.datetime, day: datetime.date, time_of_day: datetime.time
+) -> datetime.datetime:
+    """Combine a day with a time, moving to the next day if that time has passed."""
+
+    candidate = datetime.datetime.combine(day, time_of_day)
+    if candidate <= local_now:
+        candidate += datetime.timedelta(days=1)
+
+    return candidate
+
+
+def _parse_utc(text: str, now: datetime.datetime, timezone: str) -> datetime.datetime | None:
+    if not (match := _UTC_PATTERN.fullmatch(text)):
+        return None
+
+    year, month, day, hour, minute = (int(group) for group in match.groups())
+    try:
+        return datetime.datetime(year, month, day, hour, minute)
+    except ValueError as error:
+        raise InvalidReminderDate("Invalid date.") from error
+
+
+def _parse_relative(text: str, now: datetime.datetime, timezone: str) -> datetime.datetime | None:
+    if not (match := _RELATIVE_PATTERN.fullmatch(text)):
+        return None
+
+    delta = sum(
+        (
+            int(count) * RELATIVE_UNITS[unit]
+            for count, unit in _RELATIVE_PART_PATTERN.findall(match.group(1))
+        ),
+        datetime.timedelta(),
+    )
+    if not delta:
+        raise InvalidReminderDate("The reminder must be at least a minute ahead.")
+    return now + delta
+
+
+def _parse_day(text: str, now: datetime.datetime, timezone: str) -> datetime.datetime | None:
+    if not (match := _DAY_PATTERN.fullmatch(text)):
+        return None
+
+    day_name, next_week, weekday_name, hour, minute = match.groups()
+    time_of_day = _time_of_day(hour, minute)
+    local_now = to_local(now, timezone)
+
+    if day_name == "today":
+        local = datetime.datetime.combine(local_now.date(), time_of_day)
+        if local <= local_now:
+            raise InvalidReminderDate("That time has already passed today.")
+    elif day_name == "tomorrow":
+        local = datetime.datetime.combine(
+            local_now.date() + datetime.timedelta(days=1), time_of_day
+        )
+    else:
+        days_ahead = (WEEKDAYS[weekday_name] - local_now.weekday()) % 7
+        local = datetime.datetime.combine(
+            local_now.date() + datetime.timedelta(days=days_ahead), time_of_day
+        )
+        if local <= local_now:
+            local += datetime.timedelta(weeks=1)
+        if next_week:
+            # "fri" is the closest Friday ahead, "next fri" the one a week after it
+            local += datetime.timedelta(weeks=1)
+
+    return to_utc(local, timezone)
+
+
+def _parse_time(text: str, now: datetime.datetime, timezone: str) -> datetime.datetime | None:
+    if not (match := _TIME_PATTERN.fullmatch(text)):
+        return None
+
+    time_of_day = _time_of_day(*match.groups())
+    local_now = to_local(now, timezone)
+    return to_utc(_next_at(local_now, local_now.date(), time_of_day), timezone)
+
+
+def _parse_local_date(
+    text: str, now: datetime.datetime, timezone: str
+) -> datetime.datetime | None:
+    if not (match := _LOCAL_DATE_PATTERN.fullmatch(text)):
+        return None
+
+    day, month, year, hour, minute = match.groups()
+    time_of_day = _time_of_day(hour, minute)
+    local_now = to_local(now, timezone)
+    try:
+        local = datetime.datetime.combine(
+            datetime.date(int(year or local_now.year), int(month), int(day)), time_of_day
+        )
+        if year is None and local <= local_now:
+            local = local.replace(year=local.year + 1)
+    except ValueError as error:
+        raise InvalidReminderDate("Invalid date.") from error
+
+    return to_utc(local, timezone)
+
+
+# The accepted date forms, each returning None for a text in another form.
+_PARSERS: tuple[Callable[[str, datetime.datetime, str], datetime.datetime | None], ...] = (
+    _parse_utc,
+    _parse_relative,
+    _parse_day,
+    _parse_time,
+    _parse_local_date,
+)
+
+
+@functools.lru_cache(maxsize=512)
+def _parse(text: str, now: datetime.datetime, timezone: str) -> datetime.datetime:
+    """Parse a normalized date text relative to a minute, see `parse_date`."""
+
+    for parser in _PARSERS:
+        if (date := parser(text, now, timezone)) is not None:
+            return date
+
+    raise InvalidReminderDate(
+        'Invalid date. Use e.g. "in 2h", "tomorrow 10:00", "fri 8:15", "24.12 18:00" '
+        "(local time) or YYYY-mm-DD HH:MM (UTC)."
+    )
+
+
+def parse_date(
+    text: str, timezone: str, now: datetime.datetime | None = None
+) -> datetime.datetime:
+    """Parse the date of a reminder.
+
+    Accepted forms are the exact "YYYY-mm-DD HH:MM" date in UTC, relative dates like
+    "in 2h" or "in 1d 12h", and local dates like "tomorrow 10:00", "fri 8:15", "18:30"
+    or "24.12 18:00". "next fri" is a week after "fri", and "today" times which have
+    passed are rejected. Recent inputs are cached, as autocomplete parses every keystroke.
+
+    Args:
+        text (str): The date typed by the user.
+        timezone (str): The IANA name of the timezone of the local dates.
+        now (datetime.datetime | None, optional): The current time in UTC. Defaults to now.
+
+    Raises:
+        InvalidReminderDate: The date couldn't be parsed.
+
+    Returns:
+        datetime.datetime: The date in UTC.
+    """
+
+    if now is None:
+        now = datetime.datetime.utcnow()
+
+    normalized = " ".join(text.lower().split())
+    return _parse(normalized, now.replace(second=0, microsecond=0), timezone)
+
+
+def format_date(date: datetime.datetime) -> str:
+    """Format a UTC date in the exact format accepted by `parse_date`.
+
+    Args:
+        date (datetime.datetime): The date in UTC.
+
+    Returns:
+        str: The formatted date.
+    """
+
+    return date.strftime(DATE_FORMAT)
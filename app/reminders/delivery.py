@@ -0,0 +1,334 @@
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+from dataclasses import dataclass
+import datetime
+import logging
+from typing import Iterable, Literal, NamedTuple
+
+import discord
+
+from app.metrics import (
+    REMINDER_FAILURES_BY_DESTINATION,
+    REMINDER_LATENESS_BY_DESTINATION,
+    REMINDER_SENDS_SAVED,
+    REMINDERS_DIGESTED,
+)
+from app.reminders.resolver import DestinationResolver
+
+logger = logging.getLogger(__name__)
+
+# Maximal length of the content of a Discord message.
+MESSAGE_LENGTH_LIMIT: int = 2000
+COALESCED_SEPARATOR = "\n"
+DIGEST_HEADER = "Reminders which were due while the bot was unavailable:"
+# Maximal length of the reminder text quoted in a summary line of a digest.
+DIGEST_SUMMARY_LENGTH: int = 100
+
+
+class Destination(NamedTuple):
+    kind: Literal["channel", "user"]
+    id: int
+
+
+@dataclass(frozen=True)
+class OutgoingMessage:
+    reminder_id: int
+    destination: Destination
+    content: str
+    due_at: datetime.datetime
+    # one line standing for the message in a digest, defaults to the content
+    summary: str = ""
+
+
+# A queued message with the future of its delivery result.
+QueuedMessage = tuple[OutgoingMessage, "asyncio.Future[DeliveryResult]"]
+
+
+@dataclass(frozen=True)
+class DeliveryResult:
+    message: OutgoingMessage
+    delivered: bool
+    lateness: datetime.timedelta
+    error: Exception | None = None
+
+    @property
+    def retryable(self) -> bool:
+        """Whether the delivery failed in a way which may succeed when retried."""
+
+        return self.error is not None and not isinstance(
+            self.error, (LookupError, discord.Forbidden, discord.NotFound)
+        )
+
+
+def build_digests(
+    messages: Iterable[OutgoingMessage], limit: int = MESSAGE_LENGTH_LIMIT
+) -> list[tuple[OutgoingMessage, list[OutgoingMessage]]]:
+    """Condense overdue messages into digest messages, one per destination where they fit.
+
+    Every message becomes a line with its due date and summary, oldest first, and the lines
+    of a destination are split into as many digests as the length limit requires.
+
+    Args:
+        messages (Iterable[OutgoingMessage]): The overdue messages.
+        limit (int, optional): The maximal length of a digest.
+
+    Returns:
+        list[tuple[OutgoingMessage, list[OutgoingMessage]]]: The digests with the messages
+            they stand for.
+    """
+
+    by_destination: dict[Destination, list[OutgoingMessage]] = {}
+    for message in messages:
+        by_destination.setdefault(message.destination, []).append(message)
+
+    digests: list[tuple[OutgoingMessage, list[OutgoingMessage]]] = []
+
+    for destination, destination_messages in by_destination.items():
+        destination_messages.sort(key=lambda message: message.due_at)
+        chunks: list[tuple[list[str], list[OutgoingMessage]]] = []
+        length = limit
+
+        for message in destination_messages:
+            summary = " ".join((message.summary or message.content).split())
+            line = f"- {message.due_at:%Y-%m-%d %H:%M} UTC: {summary}"
+            line = line[: limit - len(DIGEST_HEADER) - 1]
+
+            if length + 1 + len(line) > limit:
+                chunks.append(([DIGEST_HEADER], []))
+                length = len(DIGEST_HEADER)
+
+            chunks[-1][0].append(line)
+            chunks[-1][1].append(message)
+            length += 1 + len(line)
+
+        for lines, chunk_messages in chunks:
+            digest = OutgoingMessage(
+                reminder_id=chunk_messages[0].reminder_id,
+                destination=destination,
+                content="\n".join(lines),
+                due_at=chunk_messages[0].due_at,
+            )
+            digests.append((digest, chunk_messages))
+
+    return digests
+
+
+def pack_messages(
+    queue: Iterable[QueuedMessage], limit: int = MESSAGE_LENGTH_LIMIT
+) -> list[list[QueuedMessage]]:
+    """Group consecutive messages into as few Discord messages as the length limit allows.
+
+    A message which doesn't fit next to the others is sent on its own.
+
+    Args:
+        queue (Iterable[QueuedMessage]): The queued messages to one destination, in order.
+        limit (int, optional): The maximal length of a sent message.
+
+    Returns:
+        list[list[QueuedMessage]]: The groups of messages sent together.
+    """
+
+    groups: list[list[QueuedMessage]] = []
+    length = 0
+
+    for queued in queue:
+        content_length = len(queued[0].content)
+        joined_length = length + len(COALESCED_SEPARATOR) + content_length
+        if groups and joined_length <= limit:
+            groups[-1].append(queued)
+            length = joined_length
+        else:
+            groups.append([queued])
+            length = content_length
+
+    return groups
+
+
+class ReminderDelivery:
+    """Sends reminder messages concurrently while keeping one send in flight per destination.
+
+    Messages are queued per destination and every destination is drained by its own task,
+    so a single channel never has parallel requests competing for its rate limit bucket,
+    while the total number of in-flight requests is bounded by `max_workers`.
+
+    A drain waits `coalesce_window` seconds before sending, so that the messages for the
+    same destination queued meanwhile, e.g. by personal and group reminders due at the same
+    minute, are joined into as few messages as the 2000 character limit allows.
+
+    Messages overdue by more than `digest_after`, e.g. after downtime, are condensed into
+    digest messages listing one line per reminder instead of being sent in full.
+    """
+
+    def __init__(
+        self,
+        client: discord.Client,
+        max_workers: int,
+        coalesce_window: float = 0.0,
+        digest_after: datetime.timedelta | None = None,
+    ) -> None:
+        self.resolver = DestinationResolver(client)
+        self._workers = asyncio.Semaphore(max_workers)
+        self._coalesce_window = coalesce_window
+        self._digest_after = digest_after
+        self._queues: dict[Destination, list[QueuedMessage]] = {}
+        self._drains: dict[Destination, asyncio.Task[None]] = {}
+
+    async def deliver(self, messages: Iterable[OutgoingMessage]) -> list[DeliveryResult]:
+        """Deliver the messages and report the outcome of every one of them.
+
+        Args:
+            messages (Iterable[OutgoingMessage]): The messages to deliver.
+
+        Returns:
+            list[DeliveryResult]: The delivery results, one per message.
+        """
+
+        loop = asyncio.get_running_loop()
+        # queued messages with the messages they stand for, several ones for digests
+        queued: list[tuple[OutgoingMessage, list[OutgoingMessage]]] = []
+        overdue: list[OutgoingMessage] = []
+        now = datetime.datetime.utcnow()
+
+        for message in messages:
+            if self._digest_after is not None and now - message.due_at > self._digest_after:
+                overdue.append(message)
+            else:
+                queued.append((message, [message]))
+
+        if overdue:
+            digests = build_digests(overdue)
+            REMINDERS_DIGESTED.inc(len(overdue))
+            logger.info(
+                f"Condensed {len(overdue)} overdue reminder messages into {len(digests)} digests"
+            )
+            queued.extend(digests)
+
+        pending: list[asyncio.Future[DeliveryResult]] = []
+        destinations: set[Destination] = set()
+
+        for message, _ in queued:
+            result: asyncio.Future[DeliveryResult] = loop.create_future()
+            self._queues.setdefault(message.destination, []).append((message, result))
+            pending.append(result)
+            destinations.add(message.destination)
+
+        for destination in destinations:
+            if destination not in self._drains:
+                self._drains[destination] = asyncio.create_task(
+                    self._drain(destination), name=f"reminder-delivery-{destination.id}"
+                )
+
+        sent = await asyncio.gather(*pending)
+        sent_at = datetime.datetime.utcnow()
+        results = [
+            result
+            if represented_message is message
+            else dataclasses.replace(
+                result, message=represented_message, lateness=sent_at - represented_message.due_at
+            )
+            for (message, represented), result in zip(queued, sent)
+            for represented_message in represented
+        ]
+
+        if results:
+            delivered = sum(result.delivered for result in results)
+            max_lateness = max(result.lateness for result in results)
+            logger.info(
+                f"Delivered {delivered}/{len(results)} reminder messages to "
+                f"{len(destinations)} destinations, max lateness "
+                f"{max_lateness.total_seconds():.2f}s"
+            )
+
+        return results
+
+    async def _drain(self, destination: Destination) -> None:
+        """Send the queued messages of a destination until its queue is empty."""
+
+        try:
+            while self._queues.get(destination):
+                if self._coalesce_window > 0:
+                    await asyncio.sleep(self._coalesce_window)
+
+                queue = self._queues.pop(destination)
+                try:
+                    await self._send_queued(destination, queue)
+                except Exception as error:
+                    logger.exception(f"Failed to drain the reminder messages to {destination}")
+                    for message, result in queue:
+                        if not result.done():
+                            result.set_result(self._result(message, error))
+        finally:
+            del self._drains[destination]
+
+    async def _send_queued(self, destination: Destination, queue: list[QueuedMessage]) -> None:
+        try:
+            target = await self.resolver.resolve(destination)
+        except discord.HTTPException as error:
+            for message, result in queue:
+                result.set_result(self._result(message, error))
+            return
+
+        groups = pack_messages(queue)
+        REMINDER_SENDS_SAVED.inc(len(queue) - len(groups))
+
+        for group in groups:
+            send_error = await self._send(target, destination, group)
+
+            if (
+                isinstance(send_error, discord.HTTPException)
+                and send_error.status == 400
+                and len(group) > 1
+            ):
+                # one of the joined messages was rejected, send them one by one
+                for queued in group:
+                    single_error = await self._send(target, destination, [queued])
+                    queued[1].set_result(self._result(queued[0], single_error))
+                continue
+
+            for message, result in group:
+                result.set_result(self._result(message, send_error))
+
+    async def _send(
+        self,
+        target: discord.abc.Messageable,
+        destination: Destination,
+        group: list[QueuedMessage],
+    ) -> Exception | None:
+        """Send a group of messages joined into one message, returning the error if it failed."""
+
+        try:
+            async with self._workers:
+                await target.send(
+                    COALESCED_SEPARATOR.join(message.content for message, _ in group)
+                )
+        except Exception as error:
+            if isinstance(error, (discord.Forbidden, discord.NotFound)):
+                # e.g. a deleted thread or a closed DM, resolve it again next time
+                self.resolver.invalidate(destination)
+            return error
+
+        return None
+
+    def _result(self, message: OutgoingMessage, error: Exception | None = None) -> DeliveryResult:
+        lateness = datetime.datetime.utcnow() - message.due_at
+
+        if error is None:
+            REMINDER_LATENESS_BY_DESTINATION[message.destination.kind].observe(
+                lateness.total_seconds()
+            )
+            logger.info(
+                f"Delivered reminder {message.reminder_id} to {message.destination.kind} "
+                f"{message.destination.id}, {lateness.total_seconds():.2f}s after its due time"
+            )
+        else:
+            REMINDER_FAILURES_BY_DESTINATION[message.destination.kind].inc()
+            logger.warning(
+                f"Failed to deliver reminder {message.reminder_id} to "
+                f"{message.destination.kind} {message.destination.id}: {error}"
+            )
+
+        return DeliveryResult(
+            message=message, delivered=error is None, lateness=lateness, error=error
+        )
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+import datetime
+import sys
+from typing import Any, Sequence
+
+from app.reminders.outbox import ReminderOutbox
+
+# (due date, position of the kind in the listed kinds, reminder ID) of a listed reminder
+ListingCursor = tuple[datetime.datetime, int, int]
+
+
+@dataclass(frozen=True)
+class ListedReminder:
+    kind: str
+    reminder_id: int
+    remind_at: datetime.datetime
+    message: str
+    recurrence: str | None
+    cursor: ListingCursor
+
+
+class AuthoredReminders:
+    """Lists the pending reminders of an author across several kinds of reminders.
+
+    The reminders of all the kinds are merged in (due date, kind, reminder ID) order. A
+    page is seeked from the cursor of the last reminder of the previous page, loading at
+    most one page of every kind.
+    """
+
+    def __init__(self, outboxes: Sequence[tuple[str, ReminderOutbox[Any]]]) -> None:
+        self._outboxes = outboxes
+
+    async def page(
+        self, author_id: int, after: ListingCursor | None, limit: int
+    ) -> list[ListedReminder]:
+        """List a page of the pending reminders of an author.
+
+        Args:
+            author_id (int): The user ID of the author.
+            after (ListingCursor | None): The cursor of the last reminder of the previous
+                page, None for the first page.
+            limit (int): The maximal number of listed reminders.
+
+        Returns:
+            list[ListedReminder]: The reminders.
+        """
+
+        pages = await asyncio.gather(
+            *(
+                outbox.list_authored(author_id, self._seek_after(position, after), limit)
+                for position, (_, outbox) in enumerate(self._outboxes)
+            )
+        )
+
+        listed = [
+            ListedReminder(
+                kind=kind,
+                reminder_id=reminder.ReminderID,
+                remind_at=reminder.RemindAt,
+                message=reminder.Message,
+                recurrence=reminder.Recurrence,
+                cursor=(reminder.RemindAt, position, reminder.ReminderID),
+            )
+            for position, ((kind, _), reminders) in enumerate(zip(self._outboxes, pages))
+            for reminder in reminders
+        ]
+        listed.sort(key=lambda reminder: reminder.cursor)
+
+        return listed[:limit]
+
+    @staticmethod
+    def _seek_after(
+        position: int, after: ListingCursor | None
+    ) -> tuple[datetime.datetime, int] | None:
+        """Translate a listing cursor to the (due date, reminder ID) seek key of one kind."""
+
+        if after is None:
+            return None
+
+        remind_at, after_position, reminder_id = after
+        if position < after_position:
+            return remind_at, sys.maxsize  # only reminders due later
+        if position > after_position:
+            return remind_at, 0  # reminders due at the same time too
+
+        return remind_at, reminder_id
+
+    async def cancel(self, kind: str, reminder_id: int, author_id: int) -> Any | None:
+        """Delete a reminder of an author.
+
+        Args:
+            kind (str): The kind of the reminder.
+            reminder_id (int): The ID of the reminder.
+            author_id (int): The user ID of the author.
+
+        Returns:
+            Any | None: The deleted reminder, None if the author has no such reminder.
+        """
+
+        for outbox_kind, outbox in self._outboxes:
+            if outbox_kind == kind:
+                return await outbox.cancel(reminder_id, author_id)
+
+        return None
@@ -0,0 +1,402 @@
+from __future__ import annotations
+
+import datetime
+import logging
+from typing import Awaitable, Callable, Generic, Sequence, TypeVar
+
+from sqlalchemy import and_, delete, literal, or_, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.database.models.base import OUTBOX_CLAIMED, OUTBOX_FAILED, OUTBOX_PENDING, Base
+from app.database.models.group_reminders import GroupReminders
+from app.database.models.reminders import Reminders
+from app.reminders.recurrence import InvalidRecurrence, parse_recurrence
+
+logger = logging.getLogger(__name__)
+
+ReminderModel = TypeVar("ReminderModel", Reminders, GroupReminders)
+
+# Delivers a claimed batch and returns the IDs of the reminders which should be retried.
+BatchDeliverer = Callable[[list[ReminderModel]], Awaitable[set[int]]]
+
+
+class ReminderOutbox(Generic[ReminderModel]):
+    """Delivery outbox over a reminders table.
+
+    Due reminders are claimed in fixed-size batches by marking them with a lease, delivered
+    and then acknowledged (deleted) per batch. Reminders which failed to be delivered are
+    released with an exponential backoff, and reminders whose lease expired, e.g. because
+    the bot crashed mid-delivery, can be claimed again.
+
+    Recurring reminders are advanced in place to their next occurrence instead of being
+    acknowledged, until their recurrence ends.
+
+    Rows of `dependent_models` referencing acknowledged reminders through their ReminderID
+    are deleted in the same transaction.
+    """
+
+    def __init__(
+        self,
+        session: async_sessionmaker[AsyncSession],
+        model: type[ReminderModel],
+        batch_size: int = 100,
+        lease: datetime.timedelta = datetime.timedelta(minutes=5),
+        max_attempts: int = 5,
+        base_backoff: datetime.timedelta = datetime.timedelta(seconds=30),
+        dependent_models: Sequence[type[Base]] = (),
+    ) -> None:
+        self._session = session
+        self._model: type[ReminderModel] = model
+        self._dependent_models = dependent_models
+        self._batch_size = batch_size
+        self._lease = lease
+        self._max_attempts = max_attempts
+        self._base_backoff = base_backoff
+
+    async def load_pending(self, after_id: int = 0) -> list[tuple[int, datetime.datetime]]:
+        """Load the reminders which still have to be delivered.
+
+        Args:
+            after_id (int, optional): Only load reminders with greater IDs. Defaults to 0.
+
+        Returns:
+            list[tuple[int, datetime.datetime]]: (reminder ID, due date) pairs, where the due
+                date is postponed by a pending retry or an active lease.
+        """
+
+        model = self._model
+
+        async with self._session() as session:
+            query_results = (
+                await session.execute(
+                    select(
+                        model.ReminderID,
+                        model.RemindAt,
+                        model.Status,
+                        model.LeaseUntil,
+                        model.NextAttemptAt,
+                    ).where(model.Status != OUTBOX_FAILED, model.ReminderID > after_id)
+                )
+            ).fetchall()
+
+        pending = []
+        for reminder_id, remind_at, status, lease_until, next_attempt_at in query_results:
+            due_dates = [remind_at, next_attempt_at]
+            if status == OUTBOX_CLAIMED:
+                due_dates.append(lease_until)
+
+            pending.append((reminder_id, max(date for date in due_dates if date is not None)))
+
+        return pending
+
+    async def list_authored(
+        self, author_id: int, after: tuple[datetime.datetime, int] | None, limit: int
+    ) -> list[ReminderModel]:
+        """List the pending reminders of an author in due date order, one page at a time.
+
+        Pages are seeked on the (AuthorID, RemindAt, ReminderID) index instead of skipped
+        with an offset, so loading any page takes the same time.
+
+        Args:
+            author_id (int): The user ID of the author.
+            after (tuple[datetime.datetime, int] | None): (due date, reminder ID) of the last
+                reminder of the previous page, None for the first page.
+            limit (int): The maximal number of listed reminders.
+
+        Returns:
+            list[ReminderModel]: The reminders.
+        """
+
+        model = self._model
+        statement = select(model).where(model.AuthorID == author_id, model.Status != OUTBOX_FAILED)
+        if after is not None:
+            remind_at, reminder_id = after
+            statement = statement.where(
+                tuple_(model.RemindAt, model.ReminderID)
+                > tuple_(literal(remind_at), literal(reminder_id))
+            )
+
+        async with self._session() as session:
+            reminders = await session.scalars(
+                statement.order_by(model.RemindAt, model.ReminderID).limit(limit)
+            )
+            return list(reminders)
+
+    async def cancel(self, reminder_id: int, author_id: int) -> ReminderModel | None:
+        """Delete a reminder of an author, together with its dependent rows.
+
+        Args:
+            reminder_id (int): The ID of the reminder.
+            author_id (int): The user ID of the author, other users' reminders aren't deleted.
+
+        Returns:
+            ReminderModel | None: The deleted reminder, None if the author has no such reminder.
+        """
+
+        model = self._model
+
+        async with self._session() as session:
+            cancelled = (
+                await session.scalars(
+                    delete(model)
+                    .where(model.ReminderID == reminder_id, model.AuthorID == author_id)
+                    .returning(model)
+                )
+            ).one_or_none()
+
+            if cancelled is not None:
+                for dependent_model in self._dependent_models:
+                    await session.execute(
+                        delete(dependent_model).where(
+                            dependent_model.ReminderID == reminder_id  # type: ignore
+                        )
+                    )
+
+            await session.commit()
+
+        return cancelled
+
+    async def process(
+        self, reminder_ids: Sequence[int], deliver: BatchDeliverer[ReminderModel]
+    ) -> list[tuple[int, datetime.datetime]]:
+        """Claim, deliver and acknowledge the given reminders batch by batch.
+
+        Args:
+            reminder_ids (Sequence[int]): IDs of the reminders which became due.
+            deliver (BatchDeliverer): Coroutine delivering a claimed batch.
+
+        Returns:
+            list[tuple[int, datetime.datetime]]: Reminders which will be retried or recur,
+                with the date of their next attempt or occurrence.
+        """
+
+        rescheduled: list[tuple[int, datetime.datetime]] = []
+
+        for start in range(0, len(reminder_ids), self._batch_size):
+            batch = await self.claim(reminder_ids[start : start + self._batch_size])
+            if not batch:
+                continue
+
+            try:
+                failed_ids = await deliver(batch)
+            except Exception:
+                logger.exception(f"Failed to deliver a batch of {len(batch)} reminders")
+                failed_ids = {reminder.ReminderID for reminder in batch}
+
+            delivered = [reminder for reminder in batch if reminder.ReminderID not in failed_ids]
+            advanced = await self.advance(delivered)
+            advanced_ids = {reminder_id for reminder_id, _ in advanced}
+            await self.acknowledge(
+                [
+                    reminder.ReminderID
+                    for reminder in delivered
+                    if reminder.ReminderID not in advanced_ids
+                ]
+            )
+            rescheduled.extend(advanced)
+            rescheduled.extend(
+                await self.release(
+                    [reminder for reminder in batch if reminder.ReminderID in failed_ids]
+                )
+            )
+
+        return rescheduled
+
+    async def claim(self, reminder_ids: Sequence[int]) -> list[ReminderModel]:
+        """Claim the given reminders which are claimable right now.
+
+        Args:
+            reminder_ids (Sequence[int]): IDs of the reminders to claim.
+
+        Returns:
+            list[ReminderModel]: The claimed reminders.
+        """
+
+        model = self._model
+        now = datetime.datetime.utcnow()
+
+        async with self._session() as session:
+            claimed = (
+                await session.scalars(
+                    update(model)
+                    .where(
+                        model.ReminderID.in_(reminder_ids),
+                        or_(
+                            and_(
+                                model.Status == OUTBOX_PENDING,
+                                or_(model.NextAttemptAt.is_(None), model.NextAttemptAt <= now),
+                            ),
+                            and_(model.Status == OUTBOX_CLAIMED, model.LeaseUntil <= now),
+                        ),
+                    )
+                    .values(
+                        Status=OUTBOX_CLAIMED,
+                        LeaseUntil=now + self._lease,
+                        Attempts=model.Attempts + 1,
+                    )
+                    .returning(model)
+                )
+            ).all()
+            await session.commit()
+
+        return list(claimed)
+
+    def next_occurrence(
+        self, reminder: ReminderModel, now: datetime.datetime
+    ) -> datetime.datetime | None:
+        """Compute the next occurrence of a recurring reminder.
+
+        Args:
+            reminder (ReminderModel): The reminder.
+            now (datetime.datetime): The current time, in UTC.
+
+        Returns:
+            datetime.datetime | None: The next occurrence, None if the reminder doesn't recur
+                or its recurrence ended.
+        """
+
+        if reminder.Recurrence is None:
+            return None
+
+        if reminder.RemainingOccurrences is not None and reminder.RemainingOccurrences <= 1:
+            return None
+
+        try:
+            recurrence = parse_recurrence(reminder.Recurrence)
+        except InvalidRecurrence:
+            logger.error(f"Invalid recurrence of reminder {reminder.ReminderID}, ending it")
+            return None
+
+        next_remind_at = recurrence.next_after(reminder.RemindAt, now)
+        if next_remind_at is None:
+            return None  # a crontab which never fires again
+        if reminder.RecurrenceEnd is not None and next_remind_at > reminder.RecurrenceEnd:
+            return None
+
+        return next_remind_at
+
+    async def advance(
+        self, reminders: Sequence[ReminderModel]
+    ) -> list[tuple[int, datetime.datetime]]:
+        """Move delivered recurring reminders to their next occurrence.
+
+        Args:
+            reminders (Sequence[ReminderModel]): The delivered reminders.
+
+        Returns:
+            list[tuple[int, datetime.datetime]]: The reminders which recur, with the date of
+                their next occurrence. The other reminders should be acknowledged.
+        """
+
+        now = datetime.datetime.utcnow()
+        advanced = [
+            (reminder, next_remind_at)
+            for reminder in reminders
+            if (next_remind_at := self.next_occurrence(reminder, now)) is not None
+        ]
+        if not advanced:
+            return []
+
+        model = self._model
+        async with self._session() as session:
+            for reminder, next_remind_at in advanced:
+                await session.execute(
+                    update(model)
+                    .where(model.ReminderID == reminder.ReminderID)
+                    .values(
+                        RemindAt=next_remind_at,
+                        Status=OUTBOX_PENDING,
+                        LeaseUntil=None,
+                        NextAttemptAt=None,
+                        Attempts=0,
+                        RemainingOccurrences=model.RemainingOccurrences - 1,
+                    )
+                )
+            await session.commit()
+
+        return [(reminder.ReminderID, next_remind_at) for reminder, next_remind_at in advanced]
+
+    async def acknowledge(self, reminder_ids: Sequence[int]) -> None:
+        """Remove delivered reminders from the outbox.
+
+        Args:
+            reminder_ids (Sequence[int]): IDs of the delivered reminders.
+        """
+
+        if not reminder_ids:
+            return
+
+        async with self._session() as session:
+            for dependent_model in self._dependent_models:
+                await session.execute(
+                    delete(dependent_model).where(
+                        dependent_model.ReminderID.in_(reminder_ids)  # type: ignore
+                    )
+                )
+
+            await session.execute(
+                delete(self._model).where(self._model.ReminderID.in_(reminder_ids))
+            )
+            await session.commit()
+
+    async def release(
+        self, reminders: Sequence[ReminderModel]
+    ) -> list[tuple[int, datetime.datetime]]:
+        """Release reminders which failed to be delivered, so that they are retried later.
+
+        Reminders which ran out of attempts are marked as failed and kept for inspection,
+        unless they recur, then they skip to their next occurrence.
+
+        Args:
+            reminders (Sequence[ReminderModel]): The claimed reminders which failed.
+
+        Returns:
+            list[tuple[int, datetime.datetime]]: Released reminders with the date of their
+                next attempt.
+        """
+
+        now = datetime.datetime.utcnow()
+        retries: list[tuple[int, datetime.datetime]] = []
+
+        async with self._session() as session:
+            for reminder in reminders:
+                values: dict[str, object] = {"LeaseUntil": None}
+
+                next_remind_at = (
+                    self.next_occurrence(reminder, now)
+                    if reminder.Attempts >= self._max_attempts
+                    else None
+                )
+
+                if next_remind_at is not None:
+                    logger.error(
+                        f"Skipping an occurrence of reminder {reminder.ReminderID} after {reminder.Attempts} attempts"
+                    )
+                    values.update(
+                        RemindAt=next_remind_at,
+                        Status=OUTBOX_PENDING,
+                        NextAttemptAt=None,
+                        Attempts=0,
+                        RemainingOccurrences=self._model.RemainingOccurrences - 1,
+                    )
+                    retries.append((reminder.ReminderID, next_remind_at))
+                elif reminder.Attempts >= self._max_attempts:
+                    logger.error(
+                        f"Giving up on reminder {reminder.ReminderID} after {reminder.Attempts} attempts"
+                    )
+                    values["Status"] = OUTBOX_FAILED
+                else:
+                    next_attempt_at = now + self._base_backoff * 2 ** (reminder.Attempts - 1)
+                    values["Status"] = OUTBOX_PENDING
+                    values["NextAttemptAt"] = next_attempt_at
+                    retries.append((reminder.ReminderID, next_attempt_at))
+
+                await session.execute(
+                    update(self._model)
+                    .where(self._model.ReminderID == reminder.ReminderID)
+                    .values(**values)
+                )
+
+            await session.commit()
+
+        return retries
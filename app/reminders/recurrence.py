@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+import datetime
+import re
+
+from apscheduler.triggers.cron import CronTrigger
+
+# Shortest allowed time between two occurrences of a recurring reminder.
+MIN_RECURRENCE_INTERVAL = datetime.timedelta(hours=1)
+# Number of upcoming occurrences of a crontab checked against the minimal interval.
+RECURRENCE_CHECKED_OCCURRENCES = 24
+
+INTERVAL_UNITS: dict[str, datetime.timedelta] = {
+    "h": datetime.timedelta(hours=1),
+    "d": datetime.timedelta(days=1),
+    "w": datetime.timedelta(weeks=1),
+}
+
+_INTERVAL_PATTERN = re.compile(r"(\d+)\s*([hdw])")
+
+
+class InvalidRecurrence(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class Recurrence:
+    """A recurrence rule, either a fixed interval like "2w" or a crontab like "0 10 * * mon".
+
+    The rule is stored as text next to the precomputed date of the next occurrence, so
+    computing the following occurrence only needs the rule and that date.
+    """
+
+    rule: str
+    interval: datetime.timedelta | None = None
+    cron: CronTrigger | None = None
+
+    def next_after(
+        self, previous: datetime.datetime, now: datetime.datetime
+    ) -> datetime.datetime | None:
+        """Compute the first occurrence after both the previous occurrence and now.
+
+        Occurrences missed e.g. while the bot was down are skipped, without iterating
+        over them.
+
+        Args:
+            previous (datetime.datetime): The previous occurrence, in UTC.
+            now (datetime.datetime): The current time, in UTC.
+
+        Returns:
+            datetime.datetime | None: The next occurrence, in UTC, None if a crontab never
+                fires again, e.g. "0 0 30 2 *".
+        """
+
+        if self.interval is not None:
+            missed = max((now - previous) // self.interval, 0)
+            return previous + (missed + 1) * self.interval
+
+        assert self.cron is not None
+        # cron fires on whole minutes, so a second later excludes the previous occurrence
+        start = max(previous, now) + datetime.timedelta(seconds=1)
+        next_fire_time: datetime.datetime | None = self.cron.get_next_fire_time(
+            None, start.replace(tzinfo=datetime.timezone.utc)
+        )
+        if next_fire_time is None:
+            return None
+
+        return next_fire_time.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+
+
+def parse_recurrence(rule: str) -> Recurrence:
+    """Parse a recurrence rule.
+
+    Args:
+        rule (str): An interval like "1w", "3d" or "12h", or a five-field crontab in UTC.
+
+    Raises:
+        InvalidRecurrence: The rule is invalid or repeats more often than every hour.
+
+    Returns:
+        Recurrence: The parsed rule.
+    """
+
+    rule = " ".join(rule.lower().split())
+
+    interval_match = _INTERVAL_PATTERN.fullmatch(rule)
+    if interval_match is not None:
+        count, unit = interval_match.groups()
+        recurrence = Recurrence(
+            rule=f"{int(count)}{unit}", interval=int(count) * INTERVAL_UNITS[unit]
+        )
+        if recurrence.interval < MIN_RECURRENCE_INTERVAL:  # type: ignore
+            raise InvalidRecurrence("Reminders can't repeat more often than every hour.")
+        return recurrence
+
+    try:
+        cron = CronTrigger.from_crontab(rule, timezone=datetime.timezone.utc)
+    except ValueError as error:
+        raise InvalidRecurrence(
+            'Invalid repeat rule. Use an interval like "1w", "3d" or "12h", '
+            'or a crontab like "0 10 * * mon" (in UTC).'
+        ) from error
+
+    recurrence = Recurrence(rule=rule, cron=cron)
+    now = datetime.datetime.utcnow()
+    occurrence = recurrence.next_after(now, now)
+    if occurrence is None:
+        raise InvalidRecurrence("The repeat rule never matches a date.")
+
+    for _ in range(RECURRENCE_CHECKED_OCCURRENCES):
+        following = recurrence.next_after(occurrence, occurrence)
+        if following is None:
+            break
+        if following - occurrence < MIN_RECURRENCE_INTERVAL:
+            raise InvalidRecurrence("Reminders can't repeat more often than every hour.")
+        occurrence = following
+
+    return recurrence
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import asyncio
+from collections import OrderedDict
+import logging
+import time
+from typing import TYPE_CHECKING, NamedTuple
+
+import discord
+
+from app.metrics import DESTINATION_LOOKUPS_BY_OUTCOME
+
+if TYPE_CHECKING:
+    from app.reminders.delivery import Destination
+
+logger = logging.getLogger(__name__)
+
+
+class _CachedTarget(NamedTuple):
+    target: discord.abc.Messageable
+    resolved_at: float  # time.monotonic() of the resolution
+
+
+class DestinationResolver:
+    """Resolves reminder destinations to channels, threads and DM channels.
+
+    Channels are taken from the client's cache and fetched when they aren't cached, e.g.
+    threads or channels of guilds on the shards of other processes. DM channels are opened
+    once per user. Resolved targets are kept in an LRU cache for `ttl` seconds, and
+    concurrent resolutions of the same destination share one request.
+    """
+
+    def __init__(self, client: discord.Client, max_size: int = 1024, ttl: float = 600.0) -> None:
+        self._client = client
+        self._max_size = max_size
+        self._ttl = ttl
+        self._cache: OrderedDict[Destination, _CachedTarget] = OrderedDict()
+        self._in_flight: dict[Destination, asyncio.Task[discord.abc.Messageable]] = {}
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    async def resolve(self, destination: Destination) -> discord.abc.Messageable:
+        """Get the channel to which messages for a destination are sent.
+
+        Args:
+            destination (Destination): The destination.
+
+        Raises:
+            discord.HTTPException: The channel couldn't be fetched, e.g. it was deleted.
+
+        Returns:
+            discord.abc.Messageable: The channel, thread or DM channel.
+        """
+
+        cached = self._cache.get(destination)
+        if cached is not None and time.monotonic() - cached.resolved_at < self._ttl:
+            self._cache.move_to_end(destination)
+            DESTINATION_LOOKUPS_BY_OUTCOME["hit"].inc()
+            return cached.target
+
+        task = self._in_flight.get(destination)
+        if task is None:
+            DESTINATION_LOOKUPS_BY_OUTCOME["miss"].inc()
+            task = asyncio.create_task(self._resolve(destination))
+            self._in_flight[destination] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(destination, None))
+        else:
+            DESTINATION_LOOKUPS_BY_OUTCOME["coalesced"].inc()
+
+        return await asyncio.shield(task)
+
+    def invalidate(self, destination: Destination) -> None:
+        """Forget the resolved target of a destination, e.g. after a failed send.
+
+        Args:
+            destination (Destination): The destination.
+        """
+
+        self._cache.pop(destination, None)
+
+    async def _resolve(self, destination: Destination) -> discord.abc.Messageable:
+        target: discord.abc.Messageable
+        if destination.kind == "user":
+            target = await self._client.create_dm(discord.Object(id=destination.id))
+        else:
+            channel = self._client.get_channel(destination.id)
+            if channel is None:
+                channel = await self._client.fetch_channel(destination.id)
+            target = channel  # type: ignore
+
+        self._cache[destination] = _CachedTarget(target, time.monotonic())
+        self._cache.move_to_end(destination)
+        while len(self._cache) > self._max_size:
+            self._cache.popitem(last=False)
+
+        return target
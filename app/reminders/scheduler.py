@@ -0,0 +1,342 @@
+from __future__ import annotations
+
+import asyncio
+import datetime
+import heapq
+import logging
+import time
+from typing import Awaitable, Callable, Iterable
+
+logger = logging.getLogger(__name__)
+
+# Returns (reminder ID, due date) pairs of the pending reminders with IDs above the given one.
+PendingLoader = Callable[[int], Awaitable[Iterable[tuple[int, datetime.datetime]]]]
+DueHandler = Callable[[list[int]], Awaitable[None]]
+
+# Upper bound for a single sleep, so that wall clock adjustments are picked up.
+MAX_SLEEP_SECONDS: float = 60.0
+# Reminders overdue by more than this, e.g. after downtime, are caught up through the backlog.
+CATCH_UP_AFTER = datetime.timedelta(minutes=1)
+
+
+class ReminderScheduler:
+    """Fires reminders at their due time using an in-memory min-heap.
+
+    Every kind of reminder (e.g. personal or group reminders) registers a loader,
+    which returns pending reminders, and a handler, which is called with the IDs of the
+    reminders that became due. New reminders are pushed with `schedule`.
+
+    Only an active scheduler fires reminders, so that when several processes share the
+    database only the elected one does. An active scheduler loads all the pending
+    reminders on activation and then polls every `poll_interval` seconds only for the
+    reminders created since, e.g. by the other processes.
+
+    Reminders overdue by more than CATCH_UP_AFTER when they are popped, e.g. everything
+    that became due while the bot was offline, go to a backlog instead of being fired at
+    once. The backlog is handed to the handlers by a separate task, one batch at a time,
+    oldest first at `backlog_rate` reminders per second, so that waiting for its deliveries
+    never delays the reminders due on time. Reminders overdue by more
+    than `digest_after` are handed over together, as delivery condenses them into a digest
+    message per destination instead of sending them one by one.
+    """
+
+    def __init__(
+        self,
+        wait_until_ready: Callable[[], Awaitable[None]],
+        poll_interval: float = 5.0,
+        backlog_rate: float = 5.0,
+        digest_after: datetime.timedelta = datetime.timedelta(hours=1),
+    ) -> None:
+        self._wait_until_ready = wait_until_ready
+        self._poll_interval = poll_interval
+        self._backlog_rate = backlog_rate
+        self._digest_after = digest_after
+        self._heap: list[tuple[datetime.datetime, str, int]] = []
+        # overdue reminders waiting to be caught up, they stay in _entries until handed over
+        self._backlog: list[tuple[datetime.datetime, str, int]] = []
+        # token bucket limiting the backlog to backlog_rate reminders per second
+        self._backlog_tokens: float = 1.0
+        self._backlog_refilled_at: float = time.monotonic()
+        self._entries: dict[tuple[str, int], datetime.datetime] = {}
+        self._handlers: dict[str, DueHandler] = {}
+        self._loaders: dict[str, PendingLoader] = {}
+        # highest reminder ID loaded per kind, the next poll only loads newer reminders
+        self._last_ids: dict[str, int] = {}
+        self._wakeup: asyncio.Event = asyncio.Event()
+        self._backlog_wakeup: asyncio.Event = asyncio.Event()
+        self._task: asyncio.Task[None] | None = None
+        self._backlog_task: asyncio.Task[None] | None = None
+        self.active: bool = False
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def register(self, kind: str, loader: PendingLoader, handler: DueHandler) -> None:
+        """Register a kind of reminders, loading its pending reminders if the scheduler is active.
+
+        Args:
+            kind (str): The name of the reminder kind.
+            loader (PendingLoader): Coroutine returning (reminder ID, due date) pairs.
+            handler (DueHandler): Coroutine called with the IDs of due reminders.
+        """
+
+        self._handlers[kind] = handler
+        self._loaders[kind] = loader
+        self._last_ids[kind] = 0
+
+        if self.active:
+            count = await self._load(kind)
+            logger.info(f"Loaded {count} pending reminders of kind {kind}")
+
+    async def activate(self) -> None:
+        """Start firing reminders, loading all the pending reminders of every kind."""
+
+        self._clear()
+        self.active = True
+
+        for kind in self._loaders:
+            count = await self._load(kind)
+            logger.info(f"Loaded {count} pending reminders of kind {kind}")
+
+        self._wakeup.set()
+
+    async def deactivate(self) -> None:
+        """Stop firing reminders and forget the scheduled ones."""
+
+        self.active = False
+        self._clear()
+        self._wakeup.set()
+
+    def _clear(self) -> None:
+        self._heap.clear()
+        self._backlog.clear()
+        self._entries.clear()
+        self._last_ids = dict.fromkeys(self._loaders, 0)
+
+    async def _load(self, kind: str) -> int:
+        """Schedule the pending reminders of a kind newer than the ones loaded before."""
+
+        count = 0
+        for reminder_id, due_date in await self._loaders[kind](self._last_ids[kind]):
+            self.schedule(kind, reminder_id, due_date)
+            self._last_ids[kind] = max(self._last_ids[kind], reminder_id)
+            count += 1
+
+        return count
+
+    def schedule(self, kind: str, reminder_id: int, due_date: datetime.datetime) -> None:
+        """Add a reminder to the heap, replacing its previous due date if it had one.
+
+        Args:
+            kind (str): The name of the reminder kind.
+            reminder_id (int): The ID of the reminder.
+            due_date (datetime.datetime): The due date of the reminder, in UTC.
+        """
+
+        if not self.active:
+            return  # the active scheduler of another process will load it
+
+        # the poll cursor only moves with loads, a reminder scheduled here may have a higher
+        # ID than reminders committed meanwhile by other processes and not polled yet
+        self._entries[(kind, reminder_id)] = due_date
+        heapq.heappush(self._heap, (due_date, kind, reminder_id))
+
+        if self._heap[0][0] == due_date:
+            self._wakeup.set()
+
+    def discard(self, kind: str, reminder_id: int) -> None:
+        """Remove a reminder from the schedule, if it is present.
+
+        The heap entry is dropped lazily when it reaches the top of the heap.
+
+        Args:
+            kind (str): The name of the reminder kind.
+            reminder_id (int): The ID of the reminder.
+        """
+
+        self._entries.pop((kind, reminder_id), None)
+
+    def start(self) -> None:
+        """Start the scheduler and backlog tasks."""
+
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="reminder-scheduler")
+        if self._backlog_task is None:
+            self._backlog_task = asyncio.create_task(self._run_backlog(), name="reminder-backlog")
+
+    async def stop(self) -> None:
+        """Stop the scheduler and backlog tasks."""
+
+        for task in (self._task, self._backlog_task):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+
+        self._task = None
+        self._backlog_task = None
+
+    def _pop_due(self, now: datetime.datetime) -> dict[str, list[int]]:
+        """Pop all the reminders which are due on time, grouped by kind.
+
+        Reminders overdue by more than CATCH_UP_AFTER are moved to the backlog instead.
+        """
+
+        due: dict[str, list[int]] = {}
+
+        while self._heap and self._heap[0][0] <= now:
+            entry = heapq.heappop(self._heap)
+            due_date, kind, reminder_id = entry
+
+            if self._entries.get((kind, reminder_id)) != due_date:
+                continue  # discarded or rescheduled
+
+            if now - due_date > CATCH_UP_AFTER:
+                heapq.heappush(self._backlog, entry)
+                continue
+
+            del self._entries[(kind, reminder_id)]
+            due.setdefault(kind, []).append(reminder_id)
+
+        return due
+
+    def _pop_backlog(self, now: datetime.datetime) -> dict[str, list[int]]:
+        """Pop the backlog reminders which may be caught up now, oldest first, grouped by kind.
+
+        All the reminders old enough to be digested are popped at once, the others as many
+        as the backlog rate allows.
+        """
+
+        elapsed = time.monotonic() - self._backlog_refilled_at
+        self._backlog_refilled_at += elapsed
+        self._backlog_tokens = min(
+            self._backlog_tokens + elapsed * self._backlog_rate, max(self._backlog_rate, 1.0)
+        )
+
+        due: dict[str, list[int]] = {}
+
+        while self._backlog:
+            due_date, kind, reminder_id = self._backlog[0]
+
+            if self._entries.get((kind, reminder_id)) != due_date:
+                heapq.heappop(self._backlog)  # discarded or rescheduled
+                continue
+
+            if now - due_date <= self._digest_after:
+                if self._backlog_tokens < 1:
+                    break
+                self._backlog_tokens -= 1
+
+            heapq.heappop(self._backlog)
+            del self._entries[(kind, reminder_id)]
+            due.setdefault(kind, []).append(reminder_id)
+
+        return due
+
+    def _seconds_until_backlog(self) -> float | None:
+        """Get the number of seconds until the backlog may be popped, None if it's empty."""
+
+        if not self._backlog:
+            return None
+
+        return max((1 - self._backlog_tokens) / self._backlog_rate, 0.0)
+
+    async def _fire(self, due: dict[str, list[int]]) -> None:
+        """Hand the due reminders to the handlers of all their kinds at once.
+
+        The handlers run concurrently, so the messages of all the kinds reach delivery
+        within the same coalescing window instead of each kind waiting out its own.
+        """
+
+        results = await asyncio.gather(
+            *(self._handlers[kind](reminder_ids) for kind, reminder_ids in due.items()),
+            return_exceptions=True,
+        )
+        for kind, result in zip(due, results):
+            if isinstance(result, Exception):
+                logger.error(
+                    f"Failed to handle due reminders of kind {kind}",
+                    exc_info=(type(result), result, result.__traceback__),
+                )
+            elif isinstance(result, BaseException):
+                raise result
+
+    def _seconds_until_next(self, now: datetime.datetime) -> float:
+        """Get the number of seconds to sleep until the next reminder is due."""
+
+        while self._heap:
+            due_date, kind, reminder_id = self._heap[0]
+            if self._entries.get((kind, reminder_id)) == due_date:
+                return min(max((due_date - now).total_seconds(), 0.0), MAX_SLEEP_SECONDS)
+            heapq.heappop(self._heap)
+
+        return MAX_SLEEP_SECONDS
+
+    async def _poll(self) -> None:
+        """Load the reminders created since the last poll."""
+
+        for kind in self._loaders:
+            try:
+                count = await self._load(kind)
+            except Exception:
+                logger.exception(f"Failed to poll reminders of kind {kind}")
+                continue
+
+            if count:
+                logger.info(f"Loaded {count} new reminders of kind {kind}")
+
+    async def _run(self) -> None:
+        await self._wait_until_ready()
+        next_poll = time.monotonic() + self._poll_interval
+
+        while True:
+            self._wakeup.clear()
+
+            if self.active and time.monotonic() >= next_poll:
+                await self._poll()
+                next_poll = time.monotonic() + self._poll_interval
+
+            if self.active:
+                due = self._pop_due(datetime.datetime.utcnow())
+                if self._backlog:
+                    self._backlog_wakeup.set()
+                await self._fire(due)
+
+            timeout = self._seconds_until_next(datetime.datetime.utcnow())
+            if self.active:
+                timeout = min(timeout, max(next_poll - time.monotonic(), 0.0))
+
+            # asyncio.timeout instead of wait_for, which may swallow a cancellation that
+            # arrives together with a wakeup
+            try:
+                async with asyncio.timeout(timeout):
+                    await self._wakeup.wait()
+            except TimeoutError:
+                pass
+
+    async def _run_backlog(self) -> None:
+        await self._wait_until_ready()
+
+        while True:
+            self._backlog_wakeup.clear()
+
+            if self.active:
+                backlog = self._pop_backlog(datetime.datetime.utcnow())
+                if backlog:
+                    logger.info(
+                        f"Catching up {sum(map(len, backlog.values()))} overdue reminders, "
+                        f"{len(self._backlog)} left in the backlog"
+                    )
+                    await self._fire(backlog)
+
+            timeout = self._seconds_until_backlog()
+            if timeout is None:
+                timeout = MAX_SLEEP_SECONDS
+
+            try:
+                async with asyncio.timeout(timeout):
+                    await self._backlog_wakeup.wait()
+            except TimeoutError:
+                pass
@@ -0,0 +1,370 @@
+from __future__ import annotations
+
+import asyncio
+import csv
+from dataclasses import dataclass, field
+import datetime
+import io
+import json
+import logging
+from typing import IO, Any, AsyncIterable, AsyncIterator, Iterable, Literal, cast
+
+from sqlalchemy import Table, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.cogs.utils.reminder_utils import get_date, get_recurrence_columns, validate_text
+from app.database.models.base import OUTBOX_FAILED
+from app.database.models.group_reminders import GroupReminders
+from app.database.models.reminders import Reminders
+
+logger = logging.getLogger(__name__)
+
+TransferFormat = Literal["jsonl", "csv"]
+ReminderKind = Literal["reminders", "group_reminders"]
+
+DATE_FORMAT = "%Y-%m-%d %H:%M"
+IMPORT_BATCH_SIZE: int = 500
+EXPORT_BATCH_SIZE: int = 1000
+# Number of invalid records reported back, the others are only counted.
+MAX_REPORTED_ERRORS: int = 20
+
+MODELS: dict[ReminderKind, type[Reminders] | type[GroupReminders]] = {
+    "reminders": Reminders,
+    "group_reminders": GroupReminders,
+}
+
+COLUMNS: dict[ReminderKind, tuple[str, ...]] = {
+    "reminders": (
+        "AuthorID",
+        "RemindAt",
+        "ChannelID",
+        "Message",
+        "SendDirectMessage",
+        "Recurrence",
+        "RecurrenceEnd",
+        "RemainingOccurrences",
+        "CreationDate",
+    ),
+    "group_reminders": (
+        "AuthorID",
+        "RemindAt",
+        "ChannelID",
+        "Message",
+        "SignupMessageID",
+        "Recurrence",
+        "RecurrenceEnd",
+        "RemainingOccurrences",
+        "CreationDate",
+    ),
+}
+
+
+class InvalidRecord(ValueError):
+    pass
+
+
+@dataclass
+class ImportResult:
+    imported: int = 0
+    invalid: int = 0
+    errors: list[str] = field(default_factory=list)
+
+    def add_error(self, line_number: int, error: Exception) -> None:
+        self.invalid += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(f"line {line_number}: {error}")
+
+
+def _serialize(value: Any) -> Any:
+    if isinstance(value, datetime.datetime):
+        return value.strftime(DATE_FORMAT)
+
+    return value
+
+
+async def export_reminders(
+    session: async_sessionmaker[AsyncSession],
+    kind: ReminderKind,
+    output: IO[str],
+    file_format: TransferFormat,
+) -> int:
+    """Write the pending reminders of a kind to a file, streaming them from the database.
+
+    Args:
+        session (async_sessionmaker[AsyncSession]): The database session factory.
+        kind (ReminderKind): The kind of the exported reminders.
+        output (IO[str]): The file to write to.
+        file_format (TransferFormat): Either JSON lines or CSV with a header.
+
+    Returns:
+        int: The number of exported reminders.
+    """
+
+    table = cast(Table, MODELS[kind].__table__)
+    columns = COLUMNS[kind]
+    statement = (
+        select(*(table.c[column] for column in columns))
+        .where(table.c.Status != OUTBOX_FAILED)
+        .order_by(table.c.ReminderID)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+
+    writer = csv.writer(output) if file_format == "csv" else None
+    if writer is not None:
+        writer.writerow(columns)
+
+    exported = 0
+    async with session() as db_session:
+        result = await db_session.stream(statement)
+        async for partition in result.partitions():
+            for row in partition:
+                values = [_serialize(value) for value in row]
+                if writer is not None:
+                    writer.writerow(values)
+                else:
+                    output.write(json.dumps(dict(zip(columns, values))) + "\n")
+
+            exported += len(partition)
+
+    logger.info(f"Exported {exported} {kind}")
+    return exported
+
+
+async def parse_records(
+    lines: AsyncIterable[str], file_format: TransferFormat
+) -> AsyncIterator[tuple[int, dict[str, Any] | Exception]]:
+    """Parse the records of an import file line by line.
+
+    Args:
+        lines (AsyncIterable[str]): The lines of the file.
+        file_format (TransferFormat): Either JSON lines or CSV with a header.
+
+    Yields:
+        tuple[int, dict[str, Any] | Exception]: The line number with the parsed record, or the
+            error if the line couldn't be parsed.
+    """
+
+    parse = _parse_jsonl if file_format == "jsonl" else _parse_csv
+    async for parsed in parse(lines):
+        yield parsed
+
+
+async def _parse_jsonl(
+    lines: AsyncIterable[str],
+) -> AsyncIterator[tuple[int, dict[str, Any] | Exception]]:
+    line_number = 0
+    async for line in lines:
+        line_number += 1
+        if not line.strip():
+            continue
+
+        try:
+            record = json.loads(line)
+        except ValueError as error:
+            yield line_number, error
+            continue
+
+        if not isinstance(record, dict):
+            yield line_number, InvalidRecord("a record must be a JSON object")
+            continue
+
+        yield line_number, record
+
+
+async def _parse_csv(
+    lines: AsyncIterable[str],
+) -> AsyncIterator[tuple[int, dict[str, Any] | Exception]]:
+    header: list[str] | None = None
+    line_number = 0
+    # a CSV record spans several lines when a quoted value contains a line break
+    pending = ""
+    record_line_number = 0
+
+    async for line in lines:
+        line_number += 1
+        if not pending:
+            if not line.strip():
+                continue
+            record_line_number = line_number
+
+        pending += line
+        if pending.count('"') % 2:
+            continue  # inside a quoted value
+
+        try:
+            values = next(csv.reader(io.StringIO(pending)))
+        except csv.Error as error:
+            pending = ""
+            yield record_line_number, error
+            continue
+
+        pending = ""
+        if header is None:
+            header = values
+        elif len(values) != len(header):
+            yield record_line_number, InvalidRecord(
+                f"expected {len(header)} values, got {len(values)}"
+            )
+        else:
+            yield record_line_number, {
+                name: value for name, value in zip(header, values) if value != ""
+            }
+
+    if pending:
+        yield record_line_number, InvalidRecord("unterminated quoted value")
+
+
+def _optional_int(record: dict[str, Any], column: str) -> int | None:
+    value = record.get(column)
+    if value is None:
+        return None
+
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise InvalidRecord(f"{column} must be an integer") from None
+
+
+def _required_int(record: dict[str, Any], column: str) -> int:
+    value = _optional_int(record, column)
+    if value is None:
+        raise InvalidRecord(f"missing {column}")
+
+    return value
+
+
+def _optional_str(record: dict[str, Any], column: str) -> str | None:
+    value = record.get(column)
+    if value is not None and not isinstance(value, str):
+        raise InvalidRecord(f"{column} must be a string")
+
+    return value
+
+
+def _boolean(record: dict[str, Any], column: str) -> bool:
+    value = record.get(column, False)
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "yes")
+
+    return bool(value)
+
+
+async def validate_record(kind: ReminderKind, record: dict[str, Any]) -> dict[str, Any]:
+    """Validate an imported record the same way the reminder commands validate their options.
+
+    Args:
+        kind (ReminderKind): The kind of the imported reminders.
+        record (dict[str, Any]): The parsed record.
+
+    Raises:
+        ValueError: The record is invalid.
+
+    Returns:
+        dict[str, Any]: The column values of the reminder to insert.
+    """
+
+    message = record.get("Message")
+    remind_at = record.get("RemindAt")
+    if not isinstance(message, str) or not isinstance(remind_at, str):
+        raise InvalidRecord("Message and RemindAt are required")
+
+    await validate_text(message)
+    remind_at_date = get_date(remind_at)
+
+    remaining_occurrences = _optional_int(record, "RemainingOccurrences")
+    recurrence_columns = get_recurrence_columns(
+        remind_at_date,
+        _optional_str(record, "Recurrence"),
+        _optional_str(record, "RecurrenceEnd"),
+        remaining_occurrences,
+    )
+
+    values = {
+        "AuthorID": _required_int(record, "AuthorID"),
+        "RemindAt": remind_at_date,
+        "ChannelID": _required_int(record, "ChannelID"),
+        "Message": message,
+        "CreationDate": _optional_str(record, "CreationDate")
+        or datetime.datetime.utcnow().strftime(DATE_FORMAT),
+        **recurrence_columns,
+    }
+
+    if kind == "group_reminders":
+        values["SignupMessageID"] = _required_int(record, "SignupMessageID")
+        # the signups are read from the reactions to the signup message when it's due
+        values["SignupsTracked"] = False
+    else:
+        values["SendDirectMessage"] = _boolean(record, "SendDirectMessage")
+
+    return values
+
+
+async def import_reminders(
+    session: async_sessionmaker[AsyncSession],
+    kind: ReminderKind,
+    lines: AsyncIterable[str],
+    file_format: TransferFormat,
+    batch_size: int = IMPORT_BATCH_SIZE,
+) -> ImportResult:
+    """Insert the valid reminders of an import file, one transaction per batch.
+
+    Only one batch is kept in memory. Invalid records are skipped and reported. The
+    scheduler picks the imported reminders up on its next poll.
+
+    Args:
+        session (async_sessionmaker[AsyncSession]): The database session factory.
+        kind (ReminderKind): The kind of the imported reminders.
+        lines (AsyncIterable[str]): The lines of the file.
+        file_format (TransferFormat): Either JSON lines or CSV with a header.
+        batch_size (int, optional): The number of reminders inserted per transaction.
+
+    Returns:
+        ImportResult: The numbers of imported and invalid records.
+    """
+
+    model = MODELS[kind]
+    result = ImportResult()
+    batch: list[dict[str, Any]] = []
+
+    async def flush() -> None:
+        async with session() as db_session:
+            await db_session.execute(insert(model), batch)
+            await db_session.commit()
+
+        result.imported += len(batch)
+        batch.clear()
+        await asyncio.sleep(0)  # let the event loop run between batches
+
+    async for line_number, record in parse_records(lines, file_format):
+        if isinstance(record, Exception):
+            result.add_error(line_number, record)
+            continue
+
+        try:
+            batch.append(await validate_record(kind, record))
+        except ValueError as error:
+            result.add_error(line_number, error)
+            continue
+
+        if len(batch) >= batch_size:
+            await flush()
+
+    if batch:
+        await flush()
+
+    logger.info(f"Imported {result.imported} {kind}, skipped {result.invalid} invalid records")
+    return result
+
+
+async def iterate_lines(lines: Iterable[str]) -> AsyncIterator[str]:
+    """Adapt the lines of a synchronous file for the import.
+
+    Args:
+        lines (Iterable[str]): The lines, e.g. an open text file.
+
+    Yields:
+        str: The lines.
+    """
+
+    for line in lines:
+        yield line
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import contextlib
+from dataclasses import dataclass
+import logging
+import time
+from typing import Awaitable, Iterator, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class StartupPhase:
+    name: str
+    offset: float  # seconds since the start of the process when the phase started
+    duration: float
+
+
+class StartupTimeline:
+    """Records how long the phases of the startup took, until the bot becomes ready.
+
+    The timeline starts when it's created, so the module should be imported first.
+    Phases may overlap when they run concurrently.
+    """
+
+    def __init__(self) -> None:
+        self._origin = time.perf_counter()
+        self.phases: list[StartupPhase] = []
+        self.ready_after: float | None = None
+
+    @contextlib.contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Measure a phase of the startup.
+
+        Args:
+            name (str): The name of the phase.
+        """
+
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            finished = time.perf_counter()
+            self.phases.append(StartupPhase(name, started - self._origin, finished - started))
+            if self.ready_after is not None:
+                logger.info(f"Startup phase {name} took {finished - started:.3f}s")
+
+    async def measure(self, name: str, awaitable: Awaitable[T]) -> T:
+        """Await an awaitable as a phase of the startup.
+
+        Args:
+            name (str): The name of the phase.
+            awaitable (Awaitable[T]): The work of the phase.
+
+        Returns:
+            T: The result of the awaitable.
+        """
+
+        with self.phase(name):
+            return await awaitable
+
+    def mark_ready(self) -> bool:
+        """Record that the bot is ready and log the timeline, only the first time.
+
+        Returns:
+            bool: False if the bot was already ready before, e.g. after a reconnect.
+        """
+
+        if self.ready_after is not None:
+            return False
+
+        self.ready_after = time.perf_counter() - self._origin
+        logger.info(f"Startup timeline:\n{self.format()}")
+        return True
+
+    def format(self) -> str:
+        """Format the timeline as a table of the phases ordered by their start.
+
+        Returns:
+            str: The formatted timeline.
+        """
+
+        lines = [f"{'start':>9} {'duration':>9}  phase"]
+        for phase in sorted(self.phases, key=lambda phase: phase.offset):
+            lines.append(f"{phase.offset:>8.3f}s {phase.duration:>8.3f}s  {phase.name}")
+
+        if self.ready_after is not None:
+            lines.append(f"{self.ready_after:>8.3f}s {'':>9}  ready")
+
+        return "\n".join(lines)
+
+
+STARTUP_TIMELINE = StartupTimeline()
@@ -0,0 +1,317 @@
+from __future__ import annotations
+
+import contextlib
+import contextvars
+from dataclasses import dataclass, field
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import re
+import time
+from types import SimpleNamespace
+from typing import Any, Iterator
+
+import aiohttp
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from yarl import URL
+
+from app.logger import CompressingRotatingFileHandler
+
+logger = logging.getLogger(__name__)
+
+TRACES_FILE_NAME = "traces.jsonl"
+
+_current_span: contextvars.ContextVar[Span | None] = contextvars.ContextVar(
+    "current_span", default=None
+)
+
+_SNOWFLAKE = re.compile(r"\d{15,}")
+
+
+@dataclass
+class Span:
+    """A timed phase of an interaction, the root span covers the whole interaction."""
+
+    name: str
+    trace_id: str
+    parent_id: str | None
+    attributes: dict[str, Any]
+    span_id: str = field(default_factory=lambda: os.urandom(8).hex())
+    started_at: float = field(default_factory=time.time)
+    started: float = field(default_factory=time.perf_counter)
+    duration: float | None = None
+    error: str | None = None
+    # finished spans of the whole trace, shared by all the spans of a trace
+    finished: list[Span] = field(default_factory=list, repr=False)
+
+    def child(self, name: str, attributes: dict[str, Any]) -> Span:
+        return Span(
+            name=name,
+            trace_id=self.trace_id,
+            parent_id=self.span_id,
+            attributes=attributes,
+            finished=self.finished,
+        )
+
+    def end(self, error: BaseException | None = None) -> None:
+        self.duration = time.perf_counter() - self.started
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+
+        self.finished.append(self)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "started_at": self.started_at,
+            "duration": self.duration,
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+def current_span() -> Span | None:
+    """Get the span of the phase which is currently running, if any."""
+
+    return _current_span.get()
+
+
+def start_span(name: str, **attributes: Any) -> Span | None:
+    """Start a child span of the current span, which has to be ended by the caller.
+
+    Meant for hooks which can't wrap the traced work in a `with` block. Outside of a trace
+    nothing is recorded and None is returned.
+
+    Args:
+        name (str): The name of the phase.
+
+    Returns:
+        Span | None: The started span.
+    """
+
+    parent = _current_span.get()
+    if parent is None:
+        return None
+
+    return parent.child(name, attributes)
+
+
+@contextlib.contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Span | None]:
+    """Trace a phase of the current interaction as a child of the current span.
+
+    Args:
+        name (str): The name of the phase.
+
+    Yields:
+        Span | None: The span, None when not inside a trace.
+    """
+
+    child = start_span(name, **attributes)
+    if child is None:
+        yield None
+        return
+
+    token = _current_span.set(child)
+    try:
+        yield child
+    except BaseException as error:
+        child.end(error)
+        raise
+    else:
+        child.end()
+    finally:
+        _current_span.reset(token)
+
+
+def record_error(error: BaseException) -> None:
+    """Mark the current span as failed, e.g. from an error handler."""
+
+    current = _current_span.get()
+    if current is not None:
+        current.error = f"{type(error).__name__}: {error}"
+
+
+class _SpanFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        span = record.msg
+        assert isinstance(span, Span)
+        return json.dumps(span.as_dict(), default=str)
+
+
+class JsonlSpanExporter:
+    """Writes finished spans as JSON lines to a rotating file.
+
+    Spans are put on a queue and serialized and written by a background thread, so exporting
+    a trace only costs the event loop a few queue operations.
+    """
+
+    def __init__(self, path: str, max_bytes: int, backup_count: int) -> None:
+        self._queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+        handler = CompressingRotatingFileHandler(path, max_bytes, backup_count)
+        handler.setFormatter(_SpanFormatter())
+        self._listener = logging.handlers.QueueListener(self._queue, handler)
+        self._started = False
+
+    def start(self) -> None:
+        self._listener.start()
+        self._started = True
+
+    def stop(self) -> None:
+        # the bot is closed even when its setup failed before the exporter was started
+        if self._started:
+            self._listener.stop()
+            self._started = False
+
+    def export(self, spans: list[Span]) -> None:
+        for finished in spans:
+            self._queue.put_nowait(logging.makeLogRecord({"msg": finished}))
+
+
+class Tracer:
+    """Records a trace per interaction and exports the sampled ones.
+
+    Besides a random sample, traces which failed or took longer than `slow_threshold`
+    seconds are always exported, since those are the ones worth looking at.
+    """
+
+    def __init__(
+        self,
+        exporter: JsonlSpanExporter | None,
+        sample_rate: float = 0.0,
+        slow_threshold: float = 2.0,
+    ) -> None:
+        self._exporter = exporter
+        self._sample_rate = sample_rate
+        self._slow_threshold = slow_threshold
+
+    @contextlib.contextmanager
+    def trace(self, name: str, **attributes: Any) -> Iterator[Span]:
+        """Trace a unit of work as the root span of a new trace.
+
+        Args:
+            name (str): The name of the root span.
+
+        Yields:
+            Span: The root span.
+        """
+
+        root = Span(
+            name=name, trace_id=os.urandom(16).hex(), parent_id=None, attributes=attributes
+        )
+        token = _current_span.set(root)
+        try:
+            yield root
+        except BaseException as error:
+            root.end(error)
+            raise
+        else:
+            root.end()
+        finally:
+            _current_span.reset(token)
+            self._finish(root)
+
+    def _finish(self, root: Span) -> None:
+        if self._exporter is None:
+            return
+
+        assert root.duration is not None
+        failed = any(finished.error is not None for finished in root.finished)
+        if failed or root.duration >= self._slow_threshold or random.random() < self._sample_rate:
+            self._exporter.export(root.finished)
+
+
+def describe_discord_request(method: str, url: URL) -> str:
+    """Name a request to the Discord API without leaking IDs or interaction tokens.
+
+    Args:
+        method (str): The HTTP method.
+        url (URL): The requested URL.
+
+    Returns:
+        str: The span name.
+    """
+
+    parts = url.path.split("/")
+    if "interactions" in parts and parts[-1] == "callback":
+        return "interaction.response"
+
+    if "webhooks" in parts:
+        return "interaction.followup" if method == "POST" else f"interaction.{method.lower()}"
+
+    return f"discord {method} {_SNOWFLAKE.sub('{id}', url.path)}"
+
+
+def create_discord_trace_config() -> aiohttp.TraceConfig:
+    """Create a trace config which records the requests to the Discord API as spans.
+
+    Interaction responses (e.g. `defer`) and followups go through the client's HTTP session,
+    so they show up in the trace of the interaction which made them.
+
+    Returns:
+        aiohttp.TraceConfig: the trace config to pass to the client.
+    """
+
+    async def on_request_start(
+        session: aiohttp.ClientSession,
+        context: SimpleNamespace,
+        params: aiohttp.TraceRequestStartParams,
+    ) -> None:
+        context.span = start_span(describe_discord_request(params.method, params.url))
+
+    async def on_request_end(
+        session: aiohttp.ClientSession,
+        context: SimpleNamespace,
+        params: aiohttp.TraceRequestEndParams,
+    ) -> None:
+        if context.span is not None:
+            context.span.attributes["status"] = params.response.status
+            context.span.end()
+
+    async def on_request_exception(
+        session: aiohttp.ClientSession,
+        context: SimpleNamespace,
+        params: aiohttp.TraceRequestExceptionParams,
+    ) -> None:
+        if context.span is not None:
+            context.span.end(params.exception)
+
+    trace_config = aiohttp.TraceConfig(trace_config_ctx_factory=SimpleNamespace)
+    trace_config.on_request_start.append(on_request_start)
+    trace_config.on_request_end.append(on_request_end)
+    trace_config.on_request_exception.append(on_request_exception)
+    return trace_config
+
+
+def trace_engine(engine: AsyncEngine) -> None:
+    """Record the SQL statements executed during a trace as spans.
+
+    Args:
+        engine (AsyncEngine): The database engine.
+    """
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn: Any, cursor: Any, statement: str, *args: Any) -> None:
+        query_span = start_span("db.query", statement=statement.split(None, 1)[0])
+        conn.info.setdefault("query_spans", []).append(query_span)
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn: Any, *args: Any) -> None:
+        query_span = conn.info["query_spans"].pop()
+        if query_span is not None:
+            query_span.end()
+
+    @event.listens_for(engine.sync_engine, "handle_error")
+    def handle_error(context: Any) -> None:
+        query_spans = context.connection.info.get("query_spans") if context.connection else None
+        if query_spans:
+            query_span = query_spans.pop()
+            if query_span is not None:
+                query_span.end(context.original_exception)
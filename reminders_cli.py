@@ -0,0 +1,73 @@
+import argparse
+import asyncio
+import contextlib
+import logging
+import sys
+from typing import IO, ContextManager
+
+from app.config import get_settings
+from app.database.database_handler import DatabaseHandler, create_database_directory
+from app.reminders.transfer import (
+    IMPORT_BATCH_SIZE,
+    MODELS,
+    export_reminders,
+    import_reminders,
+    iterate_lines,
+)
+
+
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Export or import reminders as JSONL or CSV.")
+    parser.add_argument("action", choices=("export", "import"))
+    parser.add_argument("kind", choices=tuple(MODELS))
+    parser.add_argument("file", help='The file to write or read, "-" for stdout or stdin.')
+    parser.add_argument("--format", choices=("jsonl", "csv"), default="jsonl")
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+    return parser.parse_args()
+
+
+def open_file(path: str, mode: str) -> ContextManager[IO[str]]:
+    if path == "-":
+        return contextlib.nullcontext(sys.stdout if mode == "w" else sys.stdin)
+
+    return open(path, mode, encoding="utf-8", newline="")
+
+
+async def main(arguments: argparse.Namespace) -> int:
+    database_path = get_settings().database_path
+    create_database_directory(database_path)
+    database_handler = DatabaseHandler(database_path)
+    await database_handler.create_database()
+
+    try:
+        if arguments.action == "export":
+            with open_file(arguments.file, "w") as output:
+                count = await export_reminders(
+                    database_handler.session, arguments.kind, output, arguments.format
+                )
+            print(f"Exported {count} {arguments.kind}", file=sys.stderr)
+            return 0
+
+        with open_file(arguments.file, "r") as input_file:
+            result = await import_reminders(
+                database_handler.session,
+                arguments.kind,
+                iterate_lines(input_file),
+                arguments.format,
+                arguments.batch_size,
+            )
+    finally:
+        await database_handler.close()
+
+    print(f"Imported {result.imported} {arguments.kind}", file=sys.stderr)
+    for error in result.errors:
+        print(error, file=sys.stderr)
+    if result.invalid > len(result.errors):
+        print(f"... and {result.invalid - len(result.errors)} more", file=sys.stderr)
+
+    return 1 if result.invalid else 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    sys.exit(asyncio.run(main(parse_arguments())))
@@ -1,6 +1,10 @@
-from app.bot import Bot
-from app.config import get_token
+from app.startup import STARTUP_TIMELINE
+
+with STARTUP_TIMELINE.phase("imports"):
+    from app.bot import Bot
+    from app.config import get_settings
 
 if __name__ == "__main__":
+    settings = get_settings()  # reports all the configuration errors at once
     bot = Bot()
-    bot.run(get_token())
+    bot.run(settings.token, log_handler=None)  # logging is set up in Bot.setup_hook